@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, Request, current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
 from flask_limiter import Limiter
@@ -7,9 +7,11 @@ from flask_babel import Babel
 from dotenv import load_dotenv
 import os
 import logging
+import tempfile
+import weakref
 from logging.handlers import RotatingFileHandler
 from datetime import timedelta
-from config import Config
+from config import Config, ensure_instance_dir
 from version import APP_NAME, APP_VERSION, APP_AUTHOR
 
 db = SQLAlchemy()
@@ -20,11 +22,31 @@ limiter = Limiter(
 )
 babel = Babel()
 
+# Engines of every app built in this process, disposed in forked children
+# by a single os.register_at_fork hook (create_app may run many times)
+_fork_engines = weakref.WeakSet()
+_fork_hook_registered = False
+
+class SpoolingRequest(Request):
+    """Request whose uploaded files spill from memory to disk past a small threshold"""
+
+    # Non-file form fields are kept in memory; cap them
+    max_form_memory_size = Config.MAX_FORM_MEMORY_SIZE
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(
+            max_size=current_app.config['UPLOAD_SPOOL_THRESHOLD'],
+            mode='rb+',
+            dir=current_app.config['UPLOAD_SPOOL_DIR'],
+        )
+
 def create_app():
     load_dotenv()  
 
     app = Flask(__name__)
+    app.request_class = SpoolingRequest
     app.config.from_object(Config)
+    ensure_instance_dir()
     app.config['UPLOAD_FOLDER'] = os.path.join(app.root_path, 'static/uploads')
     
     # Session configuration
@@ -40,25 +62,26 @@ def create_app():
     app.config['APP_AUTHOR'] = APP_AUTHOR
 
     db.init_app(app)
+    configure_sqlite(app)
+    from app.search import register_search_index
+    register_search_index()
+    from app.archive import register_sold_timestamps
+    register_sold_timestamps()
+    register_fork_safety(app)
+    # Registered first so it runs after every other after_request hook
+    from app.responses import register_compression
+    register_compression(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     limiter.init_app(app)
     
-    # Update session activity on each request
+    # Update session activity on each request (throttled, see app/identity.py)
     @app.before_request
     def update_session_activity():
         from flask_login import current_user
-        from flask import session
-        if current_user.is_authenticated and 'session_id' in session:
-            from app.models import UserSession
-            user_session = UserSession.query.filter_by(
-                session_id=session['session_id'],
-                user_id=current_user.id,
-                is_active=True
-            ).first()
-            if user_session:
-                user_session.last_activity = db.func.now()
-                db.session.commit()
+        if current_user.is_authenticated:
+            from app.identity import touch_session_activity
+            touch_session_activity()
 
     from app.routes.main import main
     from app.routes.auth import auth
@@ -69,6 +92,15 @@ def create_app():
     app.register_blueprint(admin, url_prefix='/admin')
 
     def get_locale():
+        """Locale for the current request, resolved once and memoized on g"""
+        from flask import g, has_request_context
+        if not has_request_context():
+            return resolve_locale()
+        if '_locale' not in g:
+            g._locale = resolve_locale()
+        return g._locale
+
+    def resolve_locale():
         """Enhanced locale selector with proper fallback chain"""
         try:
             from flask import session, request
@@ -113,6 +145,21 @@ def create_app():
     app.config['BABEL_DEFAULT_TIMEZONE'] = 'UTC'
     
     babel.init_app(app, locale_selector=get_locale)
+
+    # Read all catalogs now so preloaded gunicorn workers share them
+    from app.catalogs import load_catalogs, get_catalog
+    load_catalogs(os.path.join(app.root_path, 'translations'), app.config['LANGUAGES'])
+
+    # Critical CSS and vendored asset URLs from build_assets.py
+    from app.assets import load_assets
+    assets = load_assets(app)
+
+    from app.media import MEDIA_MODES, media_url
+    if app.config['MEDIA_SERVING'] not in MEDIA_MODES:
+        raise ValueError(f"MEDIA_SERVING must be one of {', '.join(MEDIA_MODES)}")
+    from app.storage import STORAGE_BACKENDS
+    if app.config['STORAGE_BACKEND'] not in STORAGE_BACKENDS:
+        raise ValueError(f"STORAGE_BACKEND must be one of {', '.join(STORAGE_BACKENDS)}")
     
     @app.template_filter('nl2br')
     def nl2br_filter(text):
@@ -154,26 +201,23 @@ def create_app():
         def get_site_currency():
             return settings.currency if settings else 'SEK'
         
-        # Safe translation function with fallback
-        def safe_gettext(text):
-            try:
-                from flask_babel import gettext
-                return gettext(text)
-            except:
-                # Fallback to our simple translation system
-                from app.translations_fallback import get_translation
-                current_language = get_locale()
-                return get_translation(text, current_language)
+        # Catalog (compiled + fallback translations) for this request's locale
+        catalog = get_catalog(get_locale())
+
+        def translate(text):
+            return catalog.get(text, text)
         
         return dict(
             app_name=app.config['APP_NAME'],
             app_version=app.config['APP_VERSION'],
             app_author=app.config['APP_AUTHOR'],
             settings=settings,
-            _=safe_gettext,  # Make safe translation function available in templates
+            _=translate,  # Make translation function available in templates
             get_locale=get_locale,  # Make locale function available in templates
             get_site_currency=get_site_currency,  # Make site currency function available in templates
-            supported_languages=app.config.get('LANGUAGES', {})  # Make supported languages available
+            supported_languages=app.config.get('LANGUAGES', {}),  # Make supported languages available
+            media_url=media_url,  # URL of an item image (see app/media.py)
+            assets=assets  # stylesheet/script URLs and critical CSS (see app/assets.py)
         )
 
     # Configure logging
@@ -187,6 +231,48 @@ def create_app():
 
     return app
 
+def configure_sqlite(app):
+    """Enable WAL and a busy timeout so threads and workers can share SQLite.
+
+    WAL lets readers proceed while a writer commits; the busy timeout makes a
+    second writer wait instead of failing with "database is locked".
+    """
+    if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+        return
+
+    from sqlalchemy import event
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute(f"PRAGMA busy_timeout={app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)}")
+        cursor.close()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
+
+def register_fork_safety(app):
+    """Drop pooled DB connections inherited from the parent after a fork.
+
+    gunicorn --preload builds the app in the master; any connection opened
+    there would otherwise be shared by every worker. dispose(close=False)
+    forgets the inherited sockets without closing them under the parent.
+    The hook is registered once per process; apps add their engines to it.
+    """
+    global _fork_hook_registered
+    if not hasattr(os, 'register_at_fork'):
+        return
+
+    with app.app_context():
+        _fork_engines.update(db.engines.values())
+    if not _fork_hook_registered:
+        os.register_at_fork(after_in_child=_dispose_fork_engines)
+        _fork_hook_registered = True
+
+def _dispose_fork_engines():
+    for engine in list(_fork_engines):
+        engine.dispose(close=False)
+
 def configure_logging(app):
     """Configure application logging"""
     
@@ -286,13 +372,19 @@ def add_security_headers(app):
         # Referrer policy
         response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
         
+        # Item images may come from a bucket or CDN (app/storage.py)
+        img_src = "'self' data:"
+        if app.config['STORAGE_BACKEND'] != 'local':
+            from app.storage import get_storage
+            img_src += f' {get_storage().origin}'
+
         # Content Security Policy (basic)
         response.headers['Content-Security-Policy'] = (
             "default-src 'self'; "
             "script-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
             "style-src 'self' 'unsafe-inline' https://cdn.jsdelivr.net https://cdnjs.cloudflare.com; "
             "font-src 'self' https://cdnjs.cloudflare.com; "
-            "img-src 'self' data:; "
+            f"img-src {img_src}; "
             "connect-src 'self';"
         )
         
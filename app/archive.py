@@ -0,0 +1,159 @@
+"""
+Archive of items sold long ago.
+
+Sold items used to stay in Item for good, so the catalog snapshot, facet
+counts, search and the admin dashboard all worked through every item ever
+sold. archive_sold_items() moves items sold more than ARCHIVE_AFTER_DAYS
+ago (by Item.sold_at) into ArchivedItem and ArchivedItemImage, one
+transaction per batch, and records a 'removed' event for each, so catalog
+snapshots, the live feed and the static export drop them like deleted
+items. The hot tables then only grow with what is for sale or recently
+sold.
+
+Admins list, search and restore archived items at /admin/archive; with
+ARCHIVE_PUBLIC the public site pages through them at /sold, apart from the
+catalog. Image files stay in the upload folder and count as used for the
+file sweep and the upload GC. With prune_images an archived item keeps
+only its primary image, and the files of the others are removed.
+
+Item.sold_at is kept by ORM hooks registered here; the bulk actions, which
+update with a single statement, set it themselves.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import selectinload
+
+from app import db
+from app.events import record_item_event, record_item_events
+from app.models import ArchivedItem, ArchivedItemImage, Item, ItemImage, ItemTrigram
+from app.search import normalize
+
+def _stamp_sold_at(mapper, connection, item):
+    if not item.is_sold:
+        item.sold_at = None
+    elif item.sold_at is None:
+        item.sold_at = datetime.utcnow()
+
+def register_sold_timestamps():
+    """Keep Item.sold_at in step with is_sold for ORM writes"""
+    if event.contains(Item, 'before_insert', _stamp_sold_at):
+        return
+    event.listen(Item, 'before_insert', _stamp_sold_at)
+    event.listen(Item, 'before_update', _stamp_sold_at)
+
+def sold_timestamp(is_sold):
+    """Item.sold_at value for a set-based UPDATE of is_sold (keeps earlier sale dates)"""
+    return db.func.coalesce(Item.sold_at, datetime.utcnow()) if is_sold else None
+
+def _archivable(cutoff):
+    return db.and_(Item.is_sold == db.true(), Item.sold_at < cutoff)
+
+def _archive_batch(item_ids, prune_images, now):
+    """Copy items into the archive and delete them (the caller commits); returns pruned filenames"""
+    items = db.session.execute(
+        db.select(Item).where(Item.id.in_(item_ids)).options(selectinload(Item.images))
+    ).scalars().all()
+    pruned = []
+    for item in items:
+        images = sorted(item.images, key=lambda image: image.id)
+        if prune_images and len(images) > 1:
+            keep = next((image for image in images if image.is_primary), images[0])
+            pruned.extend(image.filename for image in images if image is not keep)
+            images = [keep]
+        db.session.add(ArchivedItem(
+            item_id=item.id, name=item.name, description=item.description, price=item.price,
+            created_at=item.created_at, sold_at=item.sold_at, archived_at=now,
+            view_count=item.view_count, search_text=item.search_text,
+            images=[ArchivedItemImage(filename=image.filename, is_primary=image.is_primary,
+                                      blurhash=image.blurhash, dominant_color=image.dominant_color)
+                    for image in images],
+        ))
+    db.session.flush()
+    ids = [item.id for item in items]
+    record_item_events('removed', ids)
+    db.session.execute(db.delete(ItemImage).where(ItemImage.item_id.in_(ids)))
+    db.session.execute(db.delete(ItemTrigram).where(ItemTrigram.item_id.in_(ids)))
+    db.session.execute(db.delete(Item).where(Item.id.in_(ids)))
+    return pruned
+
+def archive_sold_items(days=None, prune_images=False, batch_size=500, dry_run=False):
+    """
+    Move items sold more than days ago (default ARCHIVE_AFTER_DAYS) into the archive.
+
+    Each batch of batch_size items is one transaction. With dry_run only
+    counts them. Returns a report dict; does nothing if days is 0.
+    """
+    from app.file_sweep import schedule_removal
+
+    if days is None:
+        days = current_app.config['ARCHIVE_AFTER_DAYS']
+    report = {'archived': 0, 'pruned_images': 0, 'days': days}
+    if not days or days <= 0:
+        return report
+    cutoff = datetime.utcnow() - timedelta(days=days)
+
+    if dry_run:
+        report['archived'] = db.session.execute(
+            db.select(db.func.count()).select_from(Item).where(_archivable(cutoff))
+        ).scalar()
+        return report
+
+    while True:
+        item_ids = db.session.execute(
+            db.select(Item.id).where(_archivable(cutoff)).order_by(Item.id).limit(batch_size)
+        ).scalars().all()
+        if not item_ids:
+            break
+        try:
+            pruned = _archive_batch(item_ids, prune_images, datetime.utcnow())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        report['archived'] += len(item_ids)
+        report['pruned_images'] += len(pruned)
+        # Removed once no item, hot or archived, uses them
+        schedule_removal(pruned)
+
+    if report['archived']:
+        current_app.logger.info(
+            f"Archived {report['archived']} items sold more than {days:g} days ago, "
+            f"pruned {report['pruned_images']} images"
+        )
+    return report
+
+def restore_item(archived_id):
+    """
+    Move an archived item back into the catalog, still sold, with its
+    archive clock restarted. Returns the new Item, or None if not archived.
+    """
+    archived = db.session.get(ArchivedItem, archived_id)
+    if archived is None:
+        return None
+    item = Item(
+        name=archived.name, description=archived.description, price=archived.price,
+        is_sold=True, sold_at=datetime.utcnow(), created_at=archived.created_at,
+        view_count=archived.view_count,
+        images=[ItemImage(filename=image.filename, is_primary=image.is_primary,
+                          blurhash=image.blurhash, dominant_color=image.dominant_color)
+                for image in archived.images],
+    )
+    db.session.add(item)
+    db.session.delete(archived)
+    db.session.flush()
+    record_item_event('new', item)
+    db.session.commit()
+    return item
+
+def archived_items_query(search=''):
+    """Archived items matching every word of search, most recently sold first"""
+    query = (db.select(ArchivedItem)
+             .options(selectinload(ArchivedItem.images))
+             .order_by(ArchivedItem.sold_at.desc(), ArchivedItem.id.desc()))
+    # No trigram index here: the archive is only read on its own pages
+    for word in normalize(search).split():
+        query = query.where(ArchivedItem.search_text.like(f'%{word}%'))
+    return query
@@ -0,0 +1,61 @@
+"""
+Front-end assets for base.html, from the output of build_assets.py.
+
+Read once per process when the app is created: the critical CSS of the
+catalog page (inlined by base.html, which then loads the full stylesheets
+without blocking rendering) and the URLs of the vendored Bootstrap and Font
+Awesome files, falling back to the CDNs when they haven't been vendored.
+
+The critical CSS is ignored when style.css changed after it was built,
+since it could then be missing rules the page needs; base.html goes back to
+render-blocking stylesheets until build_assets.py runs again.
+"""
+
+import hashlib
+import json
+import os
+
+from markupsafe import Markup
+
+BOOTSTRAP_CSS_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css'
+BOOTSTRAP_JS_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/js/bootstrap.bundle.min.js'
+FONTAWESOME_CSS_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css'
+
+def _read(path, mode='r'):
+    kwargs = {'encoding': 'utf-8'} if mode == 'r' else {}
+    with open(path, mode, **kwargs) as f:
+        return f.read()
+
+def load_assets(app):
+    """Asset URLs and critical CSS for the templates (see base.html)"""
+    assets = {
+        'critical_css': None,
+        'critical_includes_bootstrap': False,
+        'bootstrap_css': BOOTSTRAP_CSS_CDN,
+        'bootstrap_js': BOOTSTRAP_JS_CDN,
+        'fontawesome_css': FONTAWESOME_CSS_CDN,
+    }
+    static = app.static_folder
+    try:
+        manifest = json.loads(_read(os.path.join(static, 'build', 'manifest.json')))
+    except (OSError, ValueError):
+        return assets
+
+    for key in ('bootstrap_css', 'bootstrap_js', 'fontawesome_css'):
+        url = manifest.get(key)
+        if url and os.path.exists(os.path.join(static, os.path.relpath(url, app.static_url_path))):
+            assets[key] = url
+
+    style = hashlib.sha256(_read(os.path.join(static, 'css', 'style.css'), 'rb')).hexdigest()
+    if style != manifest.get('style_sha256'):
+        app.logger.warning('Critical CSS is out of date with style.css; run build_assets.py')
+        return assets
+    critical_url = manifest.get('critical_css') or ''
+    try:
+        critical = _read(os.path.join(static, os.path.relpath(critical_url, app.static_url_path)))
+    except (OSError, ValueError):
+        return assets
+    # "</" can't occur in valid CSS outside strings; keep it from closing the <style>
+    assets['critical_css'] = Markup(critical.replace('</', '<\\/'))
+    assets['critical_includes_bootstrap'] = manifest.get('critical_includes_bootstrap', False)
+    return assets
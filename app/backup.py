@@ -0,0 +1,346 @@
+"""
+Backup, verification and restore of the SQLite database and the uploads.
+
+Copying instance/flea_market.db while workers write can produce a torn
+file: pages from before and after a commit, and none of the commits still
+in the WAL. create_backup() instead writes a backup directory with
+
+    flea_market.db  a consistent copy made with SQLite's online backup API,
+                    BACKUP_PAGES_PER_STEP pages per step with a pause in
+                    between. Each step is a short read transaction, which in
+                    WAL mode never blocks writers. A commit by another
+                    process restarts the copy at its next step; after
+                    MAX_RESTARTS restarts the rest is copied in one step
+                    (still one read transaction, so writers go on).
+    uploads/        a mirror of the upload folder. Files that, like their
+                    copies, still have the size and mtime in the previous
+                    manifest are not read again; the others are hashed
+                    (SHA-256) as they are copied.
+                    Files gone from the upload folder are dropped from the
+                    mirror unless the database copy still references them.
+    manifest.json   the database copy's SHA-256 and row counts, and size,
+                    mtime and SHA-256 of every mirrored upload. Written
+                    last, by rename.
+
+verify_backup() checks a backup against its manifest (hashes, PRAGMA
+integrity_check, and that every image the database copy references was
+copied). restore_backup() verifies, then copies the database back with the
+same API and restores uploads that are missing or differ. It then records
+a 'restored' event; running workers notice that the events they followed
+were replaced, rebuild their catalog snapshots and suggestions, the static
+export is redone and open catalog pages reload.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.events import record_restore_event
+from app.images import STATIC_IMAGES
+
+DATABASE_FILE = 'flea_market.db'
+UPLOADS_DIR = 'uploads'
+MANIFEST_FILE = 'manifest.json'
+MAX_RESTARTS = 3
+COPY_CHUNK = 1024 * 1024
+
+class BackupError(Exception):
+    """The database can't be backed up or restored this way"""
+
+class _Restarted(Exception):
+    pass
+
+def database_path():
+    """Path of the app's SQLite database (BackupError for other databases)"""
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or not url.database or url.database == ':memory:':
+        raise BackupError(f'Online backup needs an SQLite database file, not {url.get_backend_name()}; '
+                          'use the database\'s own tools (e.g. pg_dump)')
+    return os.path.abspath(url.database)
+
+def _connect(path):
+    return sqlite3.connect(path, timeout=current_app.config['SQLITE_BUSY_TIMEOUT_MS'] / 1000)
+
+def _copy_database(source_path, target_path, pages, pause):
+    """Online backup of source into target; returns (seconds, steps, restarts)"""
+    source, target = _connect(source_path), _connect(target_path)
+    state = {'steps': 0, 'restarts': 0, 'remaining': None}
+
+    def progress(status, remaining, total):
+        state['steps'] += 1
+        if state['remaining'] is not None and remaining >= state['remaining']:
+            # Another connection wrote; SQLite starts the copy over
+            state['restarts'] += 1
+            if state['restarts'] >= MAX_RESTARTS:
+                raise _Restarted()
+        state['remaining'] = remaining
+
+    started = time.perf_counter()
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=pause)
+        except _Restarted:
+            source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return time.perf_counter() - started, state['steps'], state['restarts']
+
+def _hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def _copy_file(source, target, mtime_ns):
+    """Copy a file via a temporary name, keeping its mtime; returns its SHA-256"""
+    digest = hashlib.sha256()
+    partial = f'{target}.partial'
+    with open(source, 'rb') as src, open(partial, 'wb') as dst:
+        for chunk in iter(lambda: src.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+    os.utime(partial, ns=(mtime_ns, mtime_ns))
+    os.replace(partial, target)
+    return digest.hexdigest()
+
+def _same_stat(path, entry):
+    """Whether a file has the size and mtime a manifest entry records"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    return stat.st_size == entry['size'] and stat.st_mtime_ns == entry['mtime_ns']
+
+def _upload_files(folder):
+    """name -> stat of the regular, non-hidden files in the upload folder"""
+    files = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not entry.name.startswith('.') and entry.is_file(follow_symlinks=False):
+                    files[entry.name] = entry.stat(follow_symlinks=False)
+    except FileNotFoundError:
+        pass
+    return files
+
+def _referenced_images(database_file):
+    """Image filenames a database copy references (shipped static images excluded)"""
+    connection = sqlite3.connect(f'file:{database_file}?mode=ro', uri=True)
+    try:
+        tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        names = set()
+        for table in ('item_image', 'archived_item_image'):
+            if table in tables:
+                names.update(row[0] for row in connection.execute(f'SELECT DISTINCT filename FROM {table}'))
+        return names - set(STATIC_IMAGES)
+    finally:
+        connection.close()
+
+SUMMARY_QUERIES = {
+    'schema_version': 'SELECT version FROM schema_version',
+    'items': 'SELECT count(*) FROM item',
+    'archived_items': 'SELECT count(*) FROM archived_item',
+}
+
+def _database_summary(database_file):
+    """Schema version and row counts of a database copy, for the manifest"""
+    connection = sqlite3.connect(f'file:{database_file}?mode=ro', uri=True)
+    try:
+        summary = {}
+        for key, query in SUMMARY_QUERIES.items():
+            try:
+                summary[key] = connection.execute(query).fetchone()[0]
+            except (sqlite3.OperationalError, TypeError):
+                continue
+        return summary
+    finally:
+        connection.close()
+
+def read_manifest(backup_dir):
+    """The manifest of a backup directory, or None if it has none"""
+    try:
+        with open(os.path.join(backup_dir, MANIFEST_FILE), encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+def _write_manifest(backup_dir, manifest):
+    path = os.path.join(backup_dir, MANIFEST_FILE)
+    with open(f'{path}.partial', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(f'{path}.partial', path)
+
+def create_backup(backup_dir=None):
+    """
+    Back up the database and the upload folder into backup_dir (default
+    BACKUP_DIR), reusing the unchanged uploads of the previous backup there.
+    Returns a report dict.
+    """
+    config = current_app.config
+    backup_dir = backup_dir or config['BACKUP_DIR']
+    uploads_dir = os.path.join(backup_dir, UPLOADS_DIR)
+    os.makedirs(uploads_dir, exist_ok=True)
+    previous = (read_manifest(backup_dir) or {}).get('uploads', {})
+
+    # The database first: uploads copied after it cover every image it references
+    database_file = os.path.join(backup_dir, DATABASE_FILE)
+    partial = f'{database_file}.partial'
+    if os.path.exists(partial):
+        os.remove(partial)
+    seconds, steps, restarts = _copy_database(
+        database_path(), partial, config['BACKUP_PAGES_PER_STEP'], config['BACKUP_STEP_PAUSE_MS'] / 1000)
+    database = {'file': DATABASE_FILE, 'size': os.path.getsize(partial), 'sha256': _hash_file(partial)}
+    database.update(_database_summary(partial))
+
+    report = {'database_seconds': seconds, 'steps': steps, 'restarts': restarts,
+              'copied': 0, 'copied_bytes': 0, 'unchanged': 0, 'dropped': 0, 'kept': 0}
+    started = time.perf_counter()
+    uploads = {}
+    for name, stat in _upload_files(config['UPLOAD_FOLDER']).items():
+        entry = previous.get(name)
+        target = os.path.join(uploads_dir, name)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns \
+                and _same_stat(target, entry):
+            uploads[name] = entry
+            report['unchanged'] += 1
+            continue
+        try:
+            sha256 = _copy_file(os.path.join(config['UPLOAD_FOLDER'], name), target, stat.st_mtime_ns)
+        except FileNotFoundError:
+            continue  # deleted while we were copying
+        uploads[name] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        report['copied'] += 1
+        report['copied_bytes'] += stat.st_size
+
+    # Files that left the upload folder stay while the database copy uses them
+    gone = {name: entry for name, entry in previous.items() if name not in uploads}
+    if gone:
+        still_used = _referenced_images(partial)
+        for name, entry in gone.items():
+            if name in still_used and _same_stat(os.path.join(uploads_dir, name), entry):
+                uploads[name] = entry
+                report['kept'] += 1
+                continue
+            try:
+                os.remove(os.path.join(uploads_dir, name))
+            except FileNotFoundError:
+                pass
+            report['dropped'] += 1
+    report['uploads_seconds'] = time.perf_counter() - started
+
+    os.replace(partial, database_file)
+    _write_manifest(backup_dir, {
+        'created_at': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
+        'database': database,
+        'uploads': uploads,
+    })
+    report.update(backup_dir=backup_dir, database=database, files=len(uploads))
+    current_app.logger.info(
+        f"Backup to {backup_dir}: database {database['size']} bytes in {seconds:.2f}s "
+        f"({steps} steps, {restarts} restarts), uploads {report['copied']} copied, "
+        f"{report['unchanged']} unchanged, {report['dropped']} dropped"
+    )
+    return report
+
+def verify_backup(backup_dir=None, quick=False):
+    """
+    Check a backup against its manifest. quick compares upload sizes
+    instead of hashing them. Returns a report dict; report['ok'] is the verdict.
+    """
+    backup_dir = backup_dir or current_app.config['BACKUP_DIR']
+    report = {'ok': False, 'problems': [], 'files': 0}
+    manifest = read_manifest(backup_dir)
+    if manifest is None:
+        report['problems'].append(f'no {MANIFEST_FILE} in {backup_dir}')
+        return report
+    report['created_at'] = manifest.get('created_at')
+
+    database = manifest['database']
+    database_file = os.path.join(backup_dir, database['file'])
+    if not os.path.exists(database_file):
+        report['problems'].append(f"{database['file']} is missing")
+        return report
+    if _hash_file(database_file) != database['sha256']:
+        report['problems'].append(f"{database['file']} does not match its checksum")
+    else:
+        connection = sqlite3.connect(f'file:{database_file}?mode=ro', uri=True)
+        try:
+            result = [row[0] for row in connection.execute('PRAGMA integrity_check')]
+        finally:
+            connection.close()
+        if result != ['ok']:
+            report['problems'].extend(f'integrity_check: {line}' for line in result[:10])
+
+    uploads_dir = os.path.join(backup_dir, UPLOADS_DIR)
+    for name, entry in manifest['uploads'].items():
+        path = os.path.join(uploads_dir, name)
+        report['files'] += 1
+        try:
+            if os.path.getsize(path) != entry['size'] or (not quick and _hash_file(path) != entry['sha256']):
+                report['problems'].append(f'uploads/{name} does not match its checksum')
+        except FileNotFoundError:
+            report['problems'].append(f'uploads/{name} is missing')
+
+    if not report['problems']:
+        missing = _referenced_images(database_file) - manifest['uploads'].keys()
+        # Not fatal: the live upload folder lacked them too when the backup ran
+        report['missing_images'] = sorted(missing)
+    report['ok'] = not report['problems']
+    return report
+
+def restore_backup(backup_dir=None):
+    """
+    Verify a backup, then copy its database over the app's database and
+    restore uploads that are missing or differ. Running workers resync from
+    the 'restored' event recorded afterwards.
+    Returns a report dict; raises BackupError if the backup doesn't verify.
+    """
+    config = current_app.config
+    backup_dir = backup_dir or config['BACKUP_DIR']
+    verification = verify_backup(backup_dir)
+    if not verification['ok']:
+        raise BackupError('; '.join(verification['problems'][:5]))
+    manifest = read_manifest(backup_dir)
+
+    target = database_path()
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    db.session.remove()
+    db.engine.dispose()
+    seconds, _, _ = _copy_database(os.path.join(backup_dir, manifest['database']['file']), target, -1, 0)
+    record_restore_event(created_at=manifest.get('created_at'))
+    db.session.commit()
+
+    report = {'database_seconds': seconds, 'restored': 0, 'restored_bytes': 0, 'unchanged': 0}
+    started = time.perf_counter()
+    folder = config['UPLOAD_FOLDER']
+    os.makedirs(folder, exist_ok=True)
+    current = _upload_files(folder)
+    uploads_dir = os.path.join(backup_dir, UPLOADS_DIR)
+    for name, entry in manifest['uploads'].items():
+        stat = current.get(name)
+        if stat is not None and stat.st_size == entry['size'] and (
+                stat.st_mtime_ns == entry['mtime_ns'] or _hash_file(os.path.join(folder, name)) == entry['sha256']):
+            report['unchanged'] += 1
+            continue
+        _copy_file(os.path.join(uploads_dir, name), os.path.join(folder, name), entry['mtime_ns'])
+        report['restored'] += 1
+        report['restored_bytes'] += entry['size']
+    report['uploads_seconds'] = time.perf_counter() - started
+    report['created_at'] = manifest.get('created_at')
+    current_app.logger.info(
+        f"Restored backup of {manifest.get('created_at')} from {backup_dir}: "
+        f"{report['restored']} uploads restored, {report['unchanged']} unchanged"
+    )
+    return report
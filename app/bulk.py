@@ -0,0 +1,74 @@
+"""
+Bulk item actions for the admin dashboard.
+
+Each action is one set-based statement (or, for delete, four) over the
+selected ids, committed in a single transaction. Image files of deleted
+items are handed to the background file sweep instead of being unlinked
+inside the request.
+"""
+
+from app import db
+from app.archive import sold_timestamp
+from app.events import record_item_events
+from app.file_sweep import schedule_removal
+from app.models import Item, ItemImage, ItemTrigram
+
+BULK_ACTIONS = ('mark_sold', 'mark_unsold', 'reprice', 'delete')
+
+def parse_item_ids(values):
+    """Distinct integer ids from form values, ignoring anything else"""
+    ids = set()
+    for value in values:
+        try:
+            ids.add(int(value))
+        except (TypeError, ValueError):
+            continue
+    return sorted(ids)
+
+def apply_bulk_action(action, item_ids, percent=None):
+    """
+    Apply an action to the given items in one transaction.
+
+    percent is the price change for 'reprice' (e.g. -20 for 20% off).
+    Returns the number of items affected. Raises ValueError for an unknown
+    action or an invalid percentage.
+    """
+    if action not in BULK_ACTIONS:
+        raise ValueError(f'Unknown bulk action: {action}')
+    if not item_ids:
+        return 0
+
+    selected = Item.id.in_(item_ids)
+    try:
+        if action in ('mark_sold', 'mark_unsold'):
+            is_sold = action == 'mark_sold'
+            count = db.session.execute(
+                db.update(Item).where(selected).values(is_sold=is_sold, sold_at=sold_timestamp(is_sold))
+            ).rowcount
+            record_item_events('sold' if action == 'mark_sold' else 'unsold', item_ids)
+            filenames = ()
+        elif action == 'reprice':
+            if percent is None or percent <= -100:
+                raise ValueError('Percentage must be greater than -100')
+            factor = 1 + percent / 100
+            count = db.session.execute(
+                db.update(Item).where(selected).values(price=db.func.round(Item.price * factor, 2))
+            ).rowcount
+            record_item_events('price', item_ids)
+            filenames = ()
+        else:
+            filenames = db.session.execute(
+                db.select(ItemImage.filename).where(ItemImage.item_id.in_(item_ids)).distinct()
+            ).scalars().all()
+            db.session.execute(db.delete(ItemImage).where(ItemImage.item_id.in_(item_ids)))
+            db.session.execute(db.delete(ItemTrigram).where(ItemTrigram.item_id.in_(item_ids)))
+            count = db.session.execute(db.delete(Item).where(selected)).rowcount
+            record_item_events('removed', item_ids)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    if filenames:
+        schedule_removal(filenames)
+    return count
@@ -0,0 +1,187 @@
+"""
+Read-only catalog snapshot for the public pages.
+
+Rendering the catalog from the database builds an ORM Item (plus its
+ItemImage objects) for every card, tracked in the session's identity map,
+only to read a few attributes. Each worker instead keeps a snapshot: one
+ItemRecord (a __slots__ object holding plain values, with the image
+filenames as a tuple) per item, and for every sort option a tuple of the
+records in that order, sorted on first use.
+
+The snapshot follows the item events of app/events.py. On each request it
+applies the events recorded since its last sync by reloading only the items
+they name, in two queries. Orderings the change can affect (a view only
+touches 'views' and 'trending') are re-sorted on next use, starting from
+their previous order, which is nearly sorted already. It is rebuilt from
+scratch after a catalog-wide event (a bulk import, a trending rebase) or
+when the hub can no longer replay the events it missed.
+"""
+
+import json
+import threading
+from datetime import datetime
+
+from flask import current_app
+
+from app import db
+from app.events import get_hub
+from app.models import Item, ItemImage
+
+class ItemRecord:
+    """The fields of an item the catalog page shows, filters and sorts on"""
+
+    __slots__ = ('id', 'name', 'description', 'price', 'is_sold', 'created_at',
+                 'view_count', 'trending_score', 'search_text', 'images', 'primary_image',
+                 'primary_blurhash', 'primary_color')
+
+    def __init__(self, row, images):
+        (self.id, self.name, self.description, self.price, self.is_sold, self.created_at,
+         self.view_count, self.trending_score, self.search_text) = row
+        self.is_sold = bool(self.is_sold)
+        self.created_at = self.created_at or datetime.min
+        self.view_count = self.view_count or 0
+        self.trending_score = self.trending_score or 0.0
+        self.search_text = self.search_text or ''
+        # (filename, is_primary, blurhash, dominant_color) in upload order;
+        # the primary image, else the first
+        self.images = tuple(image[0] for image in images)
+        primary = next((image for image in images if image[1]), images[0] if images else None)
+        self.primary_image, _, self.primary_blurhash, self.primary_color = primary or (None, None, None, None)
+
+ITEM_COLUMNS = (Item.id, Item.name, Item.description, Item.price, Item.is_sold, Item.created_at,
+                Item.view_count, Item.trending_score, Item.search_text)
+
+# sort option -> (key, reverse), the orders the catalog page offers
+ORDERINGS = {
+    'newest': (lambda r: (r.created_at, r.id), True),
+    'oldest': (lambda r: (r.created_at, r.id), False),
+    'price_low': (lambda r: r.price, False),
+    'price_high': (lambda r: r.price, True),
+    'name': (lambda r: r.name, False),
+    'views': (lambda r: r.view_count, True),
+    'trending': (lambda r: (r.trending_score, r.created_at), True),
+}
+VIEW_ORDERINGS = ('views', 'trending')
+
+def load_records(item_ids=None):
+    """ItemRecords for the given ids (all items if None), in two queries"""
+    items = db.select(*ITEM_COLUMNS)
+    images = (db.select(ItemImage.item_id, ItemImage.filename, ItemImage.is_primary,
+                        ItemImage.blurhash, ItemImage.dominant_color)
+              .order_by(ItemImage.id))
+    if item_ids is not None:
+        items = items.where(Item.id.in_(item_ids))
+        images = images.where(ItemImage.item_id.in_(item_ids))
+    images_by_item = {}
+    for item_id, *image in db.session.execute(images):
+        images_by_item.setdefault(item_id, []).append(tuple(image))
+    return {row.id: ItemRecord(row, images_by_item.get(row.id, ())) for row in db.session.execute(items)}
+
+class CatalogSnapshot:
+    """Per-process snapshot of the catalog, kept current with item events"""
+
+    def __init__(self):
+        self._records = {}  # item_id -> ItemRecord
+        self._orderings = {}  # sort option -> tuple of records
+        self._stale = set()  # orderings to re-sort before use
+        self._event_id = None
+        self._generation = None  # of the event hub, see EventHub.generation
+        self._lock = threading.Lock()
+
+    def _rebuild(self, hub):
+        # Take the event id first: events that land during the load are
+        # applied again afterwards, which is harmless
+        event_id, generation = hub.latest_id(), hub.generation()
+        self._records = load_records()
+        self._orderings = {}
+        self._stale = set()
+        self._event_id = event_id
+        self._generation = generation
+
+    def sync(self):
+        """Apply item events recorded since the last sync (rebuild if they are gone)"""
+        hub = get_hub()
+        with self._lock:
+            events = hub.events_since(self._event_id) if self._event_id is not None else None
+            if events is None or hub.generation() != self._generation:
+                self._rebuild(hub)
+                return
+            if not events:
+                return
+            changed, removed, views_only = set(), set(), True
+            for _, kind, payload in events:
+                item_id = json.loads(payload).get('id')
+                if item_id is None:
+                    self._rebuild(hub)  # catalog-wide change (bulk import, trending rebase)
+                    return
+                if kind == 'removed':
+                    removed.add(item_id)
+                    changed.discard(item_id)
+                else:
+                    changed.add(item_id)
+                    removed.discard(item_id)
+                views_only = views_only and kind == 'views'
+
+            records = self._records
+            for item_id in removed:
+                records.pop(item_id, None)
+            if changed:
+                loaded = load_records(changed)
+                records.update(loaded)
+                # Changed items that are gone were removed in a later transaction
+                for item_id in changed - loaded.keys():
+                    records.pop(item_id, None)
+            self._stale.update(VIEW_ORDERINGS if views_only and not removed else ORDERINGS)
+            self._event_id = events[-1][0]
+
+    def ordered(self, sort_by):
+        """All records in the order of a sort option (unknown options: newest)"""
+        if sort_by not in ORDERINGS:
+            sort_by = 'newest'
+        with self._lock:
+            ordering = self._orderings.get(sort_by)
+            if ordering is None:
+                records = list(self._records.values())
+            elif sort_by in self._stale:
+                # Start from the previous order with current records: the list
+                # is nearly sorted, which the sort handles in close to linear time
+                current = self._records
+                records = [current[record.id] for record in ordering if record.id in current]
+                if len(records) < len(current):
+                    listed = {record.id for record in records}
+                    records.extend(record for item_id, record in current.items() if item_id not in listed)
+            else:
+                return ordering
+            key, reverse = ORDERINGS[sort_by]
+            records.sort(key=key, reverse=reverse)
+            ordering = self._orderings[sort_by] = tuple(records)
+            self._stale.discard(sort_by)
+            return ordering
+
+    def items(self, sort_by, words=(), filters=None):
+        """
+        Records in sort order whose search_text contains every (normalized)
+        word and that pass the price/availability filters.
+        """
+        filters = filters or {}
+        price_min = filters.get('price_min')
+        price_max = filters.get('price_max')
+        price_below = filters.get('price_below')
+        available_only = filters.get('available_only')
+        return [
+            record for record in self.ordered(sort_by)
+            if (not available_only or not record.is_sold)
+            and (price_min is None or record.price >= price_min)
+            and (price_max is None or record.price <= price_max)
+            and (price_below is None or record.price < price_below)
+            and all(word in record.search_text for word in words)
+        ]
+
+    def __len__(self):
+        return len(self._records)
+
+def get_catalog():
+    """The CatalogSnapshot of this process for the current app, synced with the catalog"""
+    snapshot = current_app.extensions.setdefault('catalog_snapshot', CatalogSnapshot())
+    snapshot.sync()
+    return snapshot
@@ -0,0 +1,40 @@
+"""
+Frozen in-memory translation catalogs.
+
+All compiled catalogs are read once when the app is created (in the gunicorn
+master with --preload, so workers share them copy-on-write) and merged with
+the fallback dictionary into one read-only lookup table per language.
+Translating a string is then a single dict lookup.
+"""
+
+import gettext
+import os
+from types import MappingProxyType
+
+from app.translations_fallback import TRANSLATIONS as FALLBACK_TRANSLATIONS
+
+_EMPTY = MappingProxyType({})
+_catalogs = {}
+
+def load_catalogs(translations_dir, languages):
+    """Build the lookup table for every supported language"""
+    for language in languages:
+        # Compiled catalog entries win; the fallback only fills the gaps
+        table = dict(FALLBACK_TRANSLATIONS.get(language, {}))
+        mo_path = os.path.join(translations_dir, language, 'LC_MESSAGES', 'messages.mo')
+        if os.path.exists(mo_path):
+            with open(mo_path, 'rb') as f:
+                compiled = gettext.GNUTranslations(f)
+            table.update(
+                (msgid, msgstr) for msgid, msgstr in compiled._catalog.items()
+                if isinstance(msgid, str) and msgid and msgstr
+            )
+        _catalogs[language] = MappingProxyType(table)
+
+def get_catalog(language):
+    """Lookup table for a language (empty if the language is unknown)"""
+    return _catalogs.get(language, _EMPTY)
+
+def translate(text, language):
+    """Translate text, returning it unchanged if there is no translation"""
+    return _catalogs.get(language, _EMPTY).get(text, text)
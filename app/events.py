@@ -0,0 +1,283 @@
+"""
+Live item updates for the catalog page (Server-Sent Events).
+
+Admin routes record an ItemEvent in the same transaction as the change they
+make, so a rolled-back change never reaches visitors and every gunicorn
+worker sees every event. Each worker process has one EventHub that reads new
+events from the table at most every SSE_POLL_SECONDS and keeps the recent
+ones in memory; all visitors connected to that worker are served from it,
+so the database sees one small query per worker per interval, not one per
+visitor.
+
+/events does not hold a worker per visitor: by default it answers with the
+events the client has not seen yet and ends the response with a retry hint,
+and the browser's EventSource reconnects (sending Last-Event-ID) after
+SSE_RETRY_MS. With threaded workers, SSE_STREAM_SECONDS > 0 keeps each
+response open for that long, pushing events as they arrive.
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import inspect
+from sqlalchemy.exc import DBAPIError
+
+from app import db
+from app.models import Item, ItemEvent, SiteSettings
+
+ITEM_KINDS = ('new', 'updated', 'sold', 'unsold', 'price', 'views', 'removed')
+# The database was restored from a backup; nothing before it can be replayed
+RESTORED = 'restored'
+
+def _currency():
+    settings = SiteSettings.get_settings()
+    return settings.currency if settings else 'SEK'
+
+def _item_payload(item_id, name, price, is_sold, view_count, currency):
+    return {
+        'id': item_id,
+        'name': name,
+        'price': price,
+        'price_display': current_app.jinja_env.filters['currency'](price, currency),
+        'is_sold': bool(is_sold),
+        'view_count': view_count or 0,
+    }
+
+def _expire_hub():
+    # This worker reads its own changes on the next request, without
+    # waiting for the poll interval
+    get_hub().expire()
+
+def record_item_event(kind, item):
+    """Add an event for one item to the current transaction (the caller commits)"""
+    _expire_hub()
+    if kind == 'removed':
+        payload = {'id': item.id}
+    else:
+        payload = _item_payload(item.id, item.name, item.price, item.is_sold, item.view_count, _currency())
+    db.session.add(ItemEvent(item_id=item.id, kind=kind, payload=json.dumps(payload)))
+
+def record_item_events(kind, item_ids):
+    """Add events for many items with one SELECT and one INSERT (bulk actions)"""
+    if not item_ids:
+        return
+    _expire_hub()
+    if kind == 'removed':
+        rows = [{'item_id': i, 'kind': kind, 'payload': json.dumps({'id': i})} for i in item_ids]
+    else:
+        currency = _currency()
+        rows = [
+            {'item_id': row.id, 'kind': kind,
+             'payload': json.dumps(_item_payload(*row, currency=currency))}
+            for row in db.session.execute(
+                db.select(Item.id, Item.name, Item.price, Item.is_sold, Item.view_count)
+                .where(Item.id.in_(item_ids))
+            )
+        ]
+    if rows:
+        db.session.execute(db.insert(ItemEvent), rows)
+
+def record_catalog_event(kind, **payload):
+    """An event not tied to a single item, e.g. 'new' after a bulk import"""
+    _expire_hub()
+    db.session.add(ItemEvent(item_id=None, kind=kind, payload=json.dumps(payload)))
+
+def record_restore_event(**payload):
+    """
+    A catalog-wide 'restored' event after the database was replaced (see
+    app/backup.py). Running workers find the newest event they saw gone or
+    different and rebuild; events before this one describe the replaced
+    catalog, so live clients that missed it reload.
+    """
+    _expire_hub()
+    db.session.add(ItemEvent(item_id=None, kind=RESTORED, payload=json.dumps(payload)))
+
+class EventHub:
+    """Per-process cache of recent events, refreshed from the database by polling"""
+
+    def __init__(self, backlog=500):
+        self._events = deque(maxlen=backlog)  # (id, kind, payload json)
+        self._last_id = None
+        self._covered_from = None  # every event after this id is cached
+        self._catalog_version = None  # last event that was not just a view
+        self._generation = 0  # bumped when the table no longer continues the cache
+        self._checked_at = 0.0
+        self._pruned_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._table_missing = False
+
+    def refresh(self, force=False):
+        """Read events newer than the last one seen, at most every SSE_POLL_SECONDS"""
+        config = current_app.config
+        now = time.monotonic()
+        if not force and self._last_id is not None and now - self._checked_at < config['SSE_POLL_SECONDS']:
+            return
+        # One thread polls; the others keep serving the cached events
+        if not self._lock.acquire(blocking=force or self._last_id is None):
+            return
+        try:
+            self._checked_at = now
+            # A connection of its own, so the request's session is left alone
+            try:
+                with db.engine.connect() as connection:
+                    if self._last_id is None:
+                        self._load_recent(connection)
+                    else:
+                        self._load_new(connection)
+            except DBAPIError:
+                if inspect(db.engine).has_table(ItemEvent.__tablename__):
+                    raise
+                self._no_table()
+                return
+            self._table_missing = False
+            if now - self._pruned_at > 600:
+                self._pruned_at = now
+                self._prune(config['SSE_EVENT_RETENTION_MINUTES'])
+        finally:
+            self._lock.release()
+
+    def _no_table(self):
+        """A database from before item_event (init_db.py not run yet): no events"""
+        if not self._table_missing:
+            self._table_missing = True
+            current_app.logger.warning('No item_event table: live updates are off until '
+                                       'the database is upgraded with python init_db.py')
+        if self._last_id is None:
+            self._last_id = self._covered_from = self._catalog_version = 0
+
+    def expire(self):
+        """Poll on the next refresh, whatever the interval"""
+        self._checked_at = float('-inf')
+
+    def _load_recent(self, connection):
+        rows = connection.execute(
+            db.select(ItemEvent.id, ItemEvent.kind, ItemEvent.payload)
+            .order_by(ItemEvent.id.desc())
+            .limit(self._events.maxlen)
+        ).all()
+        rows.reverse()
+        self._events.extend(tuple(row) for row in rows)
+        self._last_id = rows[-1].id if rows else 0
+        if len(rows) < self._events.maxlen:
+            self._covered_from = 0
+        else:
+            self._covered_from = rows[0].id - 1
+        for row in rows:
+            if row.kind == RESTORED:
+                self._covered_from = row.id
+        # Without a non-view event in the backlog, assume the newest changed items
+        changes = [row.id for row in rows if row.kind != 'views']
+        self._catalog_version = changes[-1] if changes else self._covered_from
+
+    def _load_new(self, connection):
+        rows = connection.execute(
+            db.select(ItemEvent.id, ItemEvent.kind, ItemEvent.payload)
+            .where(ItemEvent.id >= self._last_id)
+            .order_by(ItemEvent.id)
+        ).all()
+        if self._last_id:
+            # The newest event seen is gone or different: the ids were reset,
+            # the database replaced, or the events after it pruned unseen
+            if not rows or tuple(rows[0]) != self._events[-1]:
+                self._reset(connection)
+                return
+            rows = rows[1:]
+        for row in rows:
+            if len(self._events) == self._events.maxlen:
+                self._covered_from = self._events[0][0]
+            self._events.append(tuple(row))
+            if row.kind != 'views':
+                self._catalog_version = row.id
+            if row.kind == RESTORED:
+                self._covered_from = row.id
+        if rows:
+            self._last_id = rows[-1].id
+
+    def _reset(self, connection):
+        """Start over from the table, forgetting the events cached so far"""
+        self._generation += 1
+        self._events.clear()
+        self._load_recent(connection)
+        # Ids handed out before can't be told apart from the new ones
+        self._covered_from = self._last_id
+
+    def _prune(self, minutes):
+        # The newest event stays, so the next one never reuses its id and
+        # other workers can tell that nothing they have seen was replaced
+        cutoff = datetime.utcnow() - timedelta(minutes=minutes)
+        newest = db.select(db.func.max(ItemEvent.id)).scalar_subquery()
+        with db.engine.begin() as connection:
+            connection.execute(db.delete(ItemEvent).where(ItemEvent.created_at < cutoff, ItemEvent.id < newest))
+
+    def latest_id(self):
+        self.refresh()
+        return self._last_id
+
+    def generation(self):
+        """
+        Changes whenever the cached events stop continuing the ones before,
+        e.g. after a restore. Event ids from different generations can't be
+        compared; whatever was built from the events should be rebuilt.
+        """
+        self.refresh()
+        return self._generation
+
+    def catalog_version(self):
+        """
+        The generation and the id of the last event that changed items
+        beyond their view counts. Anything derived from names, prices or
+        availability stays valid while this is unchanged.
+        """
+        self.refresh()
+        return self._generation, self._catalog_version
+
+    def events_since(self, last_id):
+        """
+        Events after last_id, or None if some of them are no longer cached
+        (the client should then reload the page).
+        """
+        self.refresh()
+        if last_id > self._last_id:
+            # Newer than anything seen here: another worker may be ahead, or
+            # the id is from before a reset
+            self.refresh(force=True)
+            if last_id > self._last_id:
+                return None
+        if last_id == self._last_id:
+            return []
+        if last_id < self._covered_from:
+            return None
+        return [event for event in list(self._events) if event[0] > last_id]
+
+def get_hub():
+    """The EventHub of this process for the current app"""
+    return current_app.extensions.setdefault('event_hub', EventHub())
+
+def format_event(event_id, kind, payload):
+    return f'id: {event_id}\nevent: item\ndata: {{"kind": "{kind}", "item": {payload}}}\n\n'
+
+def event_stream(last_id):
+    """Generator of SSE text for a client that has seen events up to last_id"""
+    config = current_app.config
+    hub = get_hub()
+    yield f"retry: {config['SSE_RETRY_MS']}\n\n"
+    deadline = time.monotonic() + config['SSE_STREAM_SECONDS']
+    heartbeat_at = time.monotonic() + 15
+    while True:
+        events = hub.events_since(last_id)
+        if events is None:
+            yield f'id: {hub.latest_id()}\nevent: reset\ndata: {{}}\n\n'
+            return
+        for event in events:
+            yield format_event(*event)
+            last_id = event[0]
+        if time.monotonic() >= deadline:
+            return
+        if time.monotonic() >= heartbeat_at:
+            heartbeat_at = time.monotonic() + 15
+            yield ': keep-alive\n\n'
+        time.sleep(config['SSE_POLL_SECONDS'])
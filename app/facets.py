@@ -0,0 +1,180 @@
+"""
+Price and availability filters for the catalog, with facet counts.
+
+The filters (price_min, price_max, price_below, available_only) become
+WHERE conditions that the (is_sold, price) and price indexes serve.
+price_max is the inclusive bound typed into the price form; price_below is
+the exclusive one of the price buckets, which are half-open ([100, 250)),
+so an item priced at a bucket limit is counted and listed in one bucket
+only. Facet counts (available vs sold, and items per price bucket) are
+computed in one aggregate query over the items matching the search. Each
+facet applies the other facet's filter, so the counts next to a link are
+the number of items that link shows.
+
+Counts are cached per worker, keyed by the catalog version from the event
+hub (app/events.py), the search text and the filters. Views don't change
+the version, so pages keep hitting the cache until an item is added,
+edited, sold or removed.
+"""
+
+import threading
+
+from flask import current_app, url_for
+
+from app import db
+from app.events import get_hub
+from app.models import Item
+
+CACHE_SIZE = 512
+
+def _parse_price(value):
+    try:
+        price = float(value)
+    except (TypeError, ValueError):
+        return None
+    return price if price >= 0 else None
+
+def parse_filters(args):
+    """Filters from request args; invalid values are ignored"""
+    price_min = _parse_price(args.get('price_min'))
+    price_max = _parse_price(args.get('price_max'))
+    if price_min is not None and price_max is not None and price_min > price_max:
+        price_min, price_max = price_max, price_min
+    return {
+        'price_min': price_min,
+        'price_max': price_max,
+        'price_below': _parse_price(args.get('price_below')),
+        'available_only': args.get('available_only') in ('1', 'true', 'on'),
+    }
+
+def filter_args(filters):
+    """The active filters as url_for() arguments, to carry them through links"""
+    args = {}
+    for key in ('price_min', 'price_max', 'price_below'):
+        if filters.get(key) is not None:
+            args[key] = f'{filters[key]:g}'
+    if filters['available_only']:
+        args['available_only'] = 1
+    return args
+
+# "= false" rather than "IS false": SQLite only uses indexes for the former
+AVAILABLE = Item.is_sold == db.false()
+SOLD = Item.is_sold == db.true()
+
+def _price_conditions(price_min, price_max, price_below=None):
+    conditions = []
+    if price_min is not None:
+        conditions.append(Item.price >= price_min)
+    if price_max is not None:
+        conditions.append(Item.price <= price_max)
+    if price_below is not None:
+        conditions.append(Item.price < price_below)
+    return conditions
+
+def _filter_prices(filters):
+    return _price_conditions(filters['price_min'], filters['price_max'], filters.get('price_below'))
+
+def filter_conditions(filters):
+    """WHERE conditions for the active filters"""
+    conditions = _filter_prices(filters)
+    if filters['available_only']:
+        conditions.append(AVAILABLE)
+    return conditions
+
+def price_buckets():
+    """[min, max) bounds of the price facet, from PRICE_FACET_LIMITS"""
+    limits = current_app.config['PRICE_FACET_LIMITS']
+    bounds = [None, *limits, None]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _count(condition):
+    return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+def _compute_counts(search, filters, buckets):
+    """All facet counts in one aggregate query"""
+    price = _filter_prices(filters)
+    availability = [AVAILABLE] if filters['available_only'] else []
+    columns = [
+        _count(db.and_(AVAILABLE, *price)),
+        _count(db.and_(SOLD, *price)),
+    ]
+    columns += [_count(db.and_(*availability, *_price_conditions(low, None, high))) for low, high in buckets]
+    statement = db.select(*columns).select_from(Item)
+    if search is not None:
+        statement = statement.where(search)
+    row = db.session.execute(statement).one()
+    return {
+        'available': row[0],
+        'sold': row[1],
+        'buckets': [{'min': low, 'max': high, 'count': count}
+                    for (low, high), count in zip(buckets, row[2:])],
+    }
+
+class FacetCache:
+    """Facet counts of this worker, dropped whenever the catalog version changes"""
+
+    def __init__(self, size=CACHE_SIZE):
+        self._size = size
+        self._version = None
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, version, key, compute):
+        with self._lock:
+            if version != self._version:
+                self._version = version
+                self._entries = {}
+            if key in self._entries:
+                return self._entries[key]
+        counts = compute()
+        with self._lock:
+            if version == self._version:
+                if len(self._entries) >= self._size:
+                    self._entries.pop(next(iter(self._entries)))
+                self._entries[key] = counts
+        return counts
+
+def facet_links(counts, filters, **args):
+    """
+    Counts plus the URL each facet links to: the current page (args, e.g.
+    search and sort) with that facet's filter toggled or replaced.
+    """
+    def url(price_min, price_max, price_below, available_only):
+        return url_for('main.index', **args, **filter_args({
+            'price_min': price_min, 'price_max': price_max, 'price_below': price_below,
+            'available_only': available_only,
+        }))
+
+    prices = (filters['price_min'], filters['price_max'], filters.get('price_below'))
+    links = dict(counts)
+    links['available_url'] = url(*prices, not filters['available_only'])
+    links['clear_price_url'] = url(None, None, None, filters['available_only'])
+    # Bucket links filter on the same half-open ranges the counts use
+    links['buckets'] = [
+        dict(bucket,
+             url=url(bucket['min'], None, bucket['max'], filters['available_only']),
+             active=(bucket['min'], None, bucket['max']) == prices)
+        for bucket in counts['buckets']
+    ]
+    return links
+
+def facet_counts(search_query, filters, fuzzy=False):
+    """
+    Facet counts for the items matching search_query (exactly, or the close
+    matches if fuzzy) under filters, from the cache when the catalog hasn't
+    changed.
+    """
+    from app.search import fuzzy_matches, normalize, search_condition
+
+    def compute():
+        search = None
+        if search_query and fuzzy:
+            search = Item.id.in_(db.select(fuzzy_matches(search_query).c.item_id))
+        elif search_query:
+            search = search_condition(search_query)
+        return _compute_counts(search, filters, price_buckets())
+
+    cache = current_app.extensions.setdefault('facet_cache', FacetCache())
+    key = (normalize(search_query), fuzzy, filters['price_min'], filters['price_max'],
+           filters.get('price_below'), filters['available_only'])
+    return cache.get(get_hub().catalog_version(), key, compute)
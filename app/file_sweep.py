@@ -0,0 +1,87 @@
+"""
+Deferred removal of uploaded image files.
+
+Requests that delete items or images only queue the filenames here; a
+daemon thread in each worker process deletes them from the media storage
+(app/storage.py) after the response is sent. Before deleting, the sweep
+checks that no remaining ItemImage or ArchivedItemImage still references
+the file (uploads are not uniquely named, so two items can share one), and
+shipped static images are never touched. A file whose removal is lost
+(e.g. the worker is killed) is just an orphan in storage, never a broken
+image.
+"""
+
+import os
+import queue
+import threading
+
+from flask import current_app
+
+from app.images import STATIC_IMAGES
+
+_queue = queue.Queue()
+_worker = None
+_worker_pid = None
+_lock = threading.Lock()
+
+def schedule_removal(filenames):
+    """Queue upload files for removal once they are no longer referenced"""
+    filenames = {f for f in filenames if f and f not in STATIC_IMAGES}
+    if not filenames:
+        return
+    _ensure_worker()
+    _queue.put((current_app._get_current_object(), filenames))
+
+def wait_for_sweep():
+    """Block until every queued removal has been processed"""
+    _queue.join()
+
+def _ensure_worker():
+    # Threads don't survive fork, so each gunicorn worker starts its own
+    global _worker, _worker_pid
+    with _lock:
+        if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run, name='file-sweep', daemon=True)
+        _worker_pid = os.getpid()
+        _worker.start()
+
+def _run():
+    while True:
+        app, filenames = _queue.get()
+        try:
+            with app.app_context():
+                sweep(filenames)
+        except Exception as e:
+            app.logger.error(f'File sweep failed for {len(filenames)} file(s): {e}')
+        finally:
+            _queue.task_done()
+
+def referenced_filenames(filenames):
+    """The subset of filenames that some item image, in the catalog or the archive, uses"""
+    from app import db
+    from app.models import ArchivedItemImage, ItemImage
+
+    return set(db.session.execute(
+        db.union(
+            db.select(ItemImage.filename).where(ItemImage.filename.in_(filenames)),
+            db.select(ArchivedItemImage.filename).where(ArchivedItemImage.filename.in_(filenames)),
+        )
+    ).scalars())
+
+def sweep(filenames):
+    """Remove the given upload files that no item image references any more"""
+    from app.storage import get_storage
+
+    still_used = referenced_filenames(filenames)
+    storage = get_storage()
+    removed = 0
+    for filename in filenames - still_used:
+        try:
+            if storage.delete(filename):
+                removed += 1
+        except Exception as e:
+            current_app.logger.error(f'Failed to delete {filename}: {e}')
+    if removed:
+        current_app.logger.info(f'File sweep removed {removed} image file(s)')
+    return removed
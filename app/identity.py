@@ -0,0 +1,173 @@
+"""
+Cached identity of logged-in users.
+
+Every authenticated request used to load the User row (Flask-Login's user
+loader), look up its UserSession row, and write last_activity with a
+commit, all before the view ran. Now:
+
+- The user and the request's UserSession row are read in one query
+  (users without a session_id, e.g. restored from the remember-me cookie,
+  just get no session row), and the result is kept per worker for
+  USER_CACHE_SECONDS. Logout and password changes drop the entries of that
+  user and bump User.user_version. Every worker compares the versions of
+  the users it has cached at most once per VERSION_CHECK_SECONDS (one
+  query, not one per request) and drops entries that are out of date.
+- last_activity is written at most every SESSION_ACTIVITY_INTERVAL seconds
+  per session, which is plenty for the 2-hour expiry of
+  UserSession.cleanup_expired_sessions.
+
+current_user is then a CachedUser, which isn't bound to a database
+session. Code that modifies the user loads the User row itself.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+from flask import current_app, g, session
+from flask_login import UserMixin
+
+from app import db
+
+MAX_ENTRIES = 1000
+VERSION_CHECK_SECONDS = 1.0
+
+class CachedUser(UserMixin):
+    """The parts of a User that requests read, detached from the database session"""
+
+    def __init__(self, user_id, username):
+        self.id = user_id
+        self.username = username
+
+    def __repr__(self):
+        return f'<CachedUser {self.id} {self.username!r}>'
+
+class Identity:
+    """A cached user plus the UserSession row of the browser session"""
+
+    __slots__ = ('user', 'version', 'session_row_id', 'activity_written_at', 'expires_at')
+
+    def __init__(self, user, version, session_row_id, activity_written_at, expires_at):
+        self.user = user
+        self.version = version
+        self.session_row_id = session_row_id
+        self.activity_written_at = activity_written_at
+        self.expires_at = expires_at
+
+class IdentityCache:
+    """(user id, session id) -> Identity, for this worker"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._checked_at = float('-inf')
+
+    def get(self, key, now):
+        identity = self._entries.get(key)
+        if identity is not None and identity.expires_at > now:
+            return identity
+        return None
+
+    def put(self, key, identity, now):
+        with self._lock:
+            if len(self._entries) >= MAX_ENTRIES:
+                self._entries = {k: v for k, v in self._entries.items() if v.expires_at > now}
+                if len(self._entries) >= MAX_ENTRIES:
+                    self._entries.clear()
+            self._entries[key] = identity
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if k[0] != user_id}
+
+    def check_versions(self, now):
+        """Drop entries of users invalidated by any worker, at most every VERSION_CHECK_SECONDS"""
+        if not self._entries or now - self._checked_at < VERSION_CHECK_SECONDS:
+            return
+        self._checked_at = now
+        from app.models import User
+        user_ids = {key[0] for key in list(self._entries)}
+        # A connection of its own, so the request's session is left alone
+        with db.engine.connect() as connection:
+            versions = dict(connection.execute(
+                db.select(User.id, User.user_version).where(User.id.in_(user_ids))
+            ).all())
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if versions.get(k[0]) == v.version}
+
+def _cache():
+    return current_app.extensions.setdefault('identity_cache', IdentityCache())
+
+def _load(user_id, session_id):
+    """User and active UserSession row in one query; None if the user is gone"""
+    from app.models import User, UserSession
+
+    session_match = db.and_(
+        UserSession.user_id == User.id,
+        UserSession.session_id == session_id,
+        UserSession.is_active == db.true(),
+    )
+    row = db.session.execute(
+        db.select(User.id, User.username, User.user_version, UserSession.id, UserSession.last_activity)
+        .outerjoin(UserSession, session_match)
+        .where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    user_id, username, version, session_row_id, last_activity = row
+    # Age of the stored last_activity, on the monotonic clock the cache uses
+    written_at = float('-inf')
+    if last_activity is not None:
+        written_at = time.monotonic() - (datetime.utcnow() - last_activity).total_seconds()
+    return Identity(CachedUser(user_id, username), version, session_row_id, written_at, 0.0)
+
+def load_identity(user_id):
+    """Flask-Login user loader: the CachedUser for user_id, or None"""
+    session_id = session.get('session_id')
+    key = (user_id, session_id)
+    now = time.monotonic()
+    cache = _cache()
+    cache.check_versions(now)
+    identity = cache.get(key, now)
+    if identity is None:
+        identity = _load(user_id, session_id)
+        if identity is None:
+            return None
+        ttl = current_app.config['USER_CACHE_SECONDS']
+        if ttl > 0:
+            identity.expires_at = now + ttl
+            cache.put(key, identity, now)
+    g.identity = identity
+    return identity.user
+
+def touch_session_activity():
+    """Record activity on the request's UserSession row, at most once per interval"""
+    identity = g.get('identity')
+    if identity is None or identity.session_row_id is None:
+        return
+    now = time.monotonic()
+    if now - identity.activity_written_at < current_app.config['SESSION_ACTIVITY_INTERVAL']:
+        return
+    from app.models import UserSession
+    db.session.execute(
+        db.update(UserSession)
+        # A session ended elsewhere (logout, cleanup) is left as it was
+        .where(UserSession.id == identity.session_row_id, UserSession.is_active == db.true())
+        .values(last_activity=db.func.now())
+    )
+    db.session.commit()
+    identity.activity_written_at = now
+
+def invalidate_user(user_id):
+    """
+    Forget the cached identities of a user (logout, password change) in
+    every worker. This worker drops them at once; the others when they see
+    the bumped user_version after the caller commits.
+    """
+    from app.models import User
+    db.session.execute(
+        db.update(User)
+        .where(User.id == user_id)
+        .values(user_version=db.func.coalesce(User.user_version, 0) + 1)
+    )
+    _cache().invalidate_user(user_id)
@@ -0,0 +1,166 @@
+"""
+Image processing for uploads.
+
+Pillow is imported on first use rather than at app start, so workers that
+never handle an upload don't pay for loading it.
+
+Uploads are decoded with a bounded amount of memory. JPEGs are decoded in
+draft mode at the smallest DCT scale (1/2, 1/4 or 1/8) that is still at least
+twice the target size, so a 48 MP phone photo never exists as a 48 MP bitmap.
+The decoded size is checked against MAX_IMAGE_PIXELS before any pixel is
+decoded.
+
+Saving an upload also returns its placeholder: a blurhash and the dominant
+color, computed from a 32x32 copy of the resized image and stored on
+ItemImage, so catalog cards can show something before the image loads.
+
+The resized image is encoded into a spooled temp file and handed to the
+media storage (app/storage.py), which may be a local folder or a bucket.
+"""
+
+import io
+import math
+import mimetypes
+import os
+import tempfile
+from contextlib import closing
+
+from config import Config
+
+MAX_IMAGE_SIZE = (800, 600)
+ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+# Shipped in app/static and shared by items; never deleted with an item
+STATIC_IMAGES = ('demo.jpg', 'noimage.jpeg')
+
+# Decode at least this many times the target size before the final
+# resample, the same trade-off as Image.thumbnail's reducing_gap
+REDUCING_GAP = 2.0
+
+EXIF_ORIENTATION = 0x0112
+
+# Side of the downscaled copy the placeholder is computed from
+PLACEHOLDER_SAMPLE = 32
+
+class ImageTooLarge(ValueError):
+    """Decoding the image would take more than MAX_IMAGE_PIXELS pixels"""
+
+def allowed_file(filename):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+
+def image_placeholder(image):
+    """ItemImage placeholder columns (blurhash, dominant_color) of a decoded image"""
+    from PIL import Image
+    from app import blurhash
+
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        # Transparent areas show the card's white background
+        background = Image.new('RGB', image.size, (255, 255, 255))
+        background.paste(image.convert('RGBA'), mask=image.convert('RGBA').getchannel('A'))
+        image = background
+    sample = image.convert('RGB').resize((PLACEHOLDER_SAMPLE, PLACEHOLDER_SAMPLE), Image.Resampling.BOX)
+    # Most common color of a 5-color palette of the sample
+    palette = sample.quantize(5)
+    _, index = max(palette.getcolors())
+    r, g, b = palette.getpalette()[index * 3:index * 3 + 3]
+    return {
+        'blurhash': blurhash.encode(list(sample.getdata()), PLACEHOLDER_SAMPLE, PLACEHOLDER_SAMPLE),
+        'dominant_color': f'#{r:02x}{g:02x}{b:02x}',
+    }
+
+def file_placeholder(path):
+    """image_placeholder() of an image file already saved (a path or file object)"""
+    from PIL import Image
+
+    with Image.open(path) as image:
+        image.draft('RGB', (PLACEHOLDER_SAMPLE * 4, PLACEHOLDER_SAMPLE * 4))
+        return image_placeholder(image)
+
+def open_image(filename):
+    """
+    Binary file object of an item image (shipped demo images live in
+    app/static, uploads in the media storage); FileNotFoundError if missing
+    """
+    from flask import current_app
+    from app.storage import get_storage
+
+    if filename in STATIC_IMAGES:
+        return open(os.path.join(current_app.static_folder, filename), 'rb')
+    return get_storage().open(filename)
+
+def backfill_placeholders(connection, batch_size=200):
+    """Compute missing ItemImage placeholders from the files (migration, repair)"""
+    from sqlalchemy import bindparam
+    from app import db
+    from app.models import ItemImage
+
+    table = ItemImage.__table__
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            db.select(table.c.id, table.c.filename)
+            .where(table.c.blurhash.is_(None), table.c.id > last_id)
+            .order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return
+        rows = []
+        for image_id, filename in batch:
+            try:
+                with closing(open_image(filename)) as source:
+                    data = source.read()
+                rows.append({'image_id': image_id, **file_placeholder(io.BytesIO(data))})
+            except (OSError, ValueError):
+                continue  # missing or unreadable file: the card just has no placeholder
+        if rows:
+            connection.execute(
+                db.update(table).where(table.c.id == bindparam('image_id'))
+                .values(blurhash=bindparam('blurhash'), dominant_color=bindparam('dominant_color')),
+                rows
+            )
+        last_id = batch[-1].id
+
+def save_upload_image(file, filename, storage, max_pixels=None):
+    """
+    Rotate by EXIF, shrink to MAX_IMAGE_SIZE and save an uploaded image as
+    filename in storage. Returns its placeholder columns (see image_placeholder).
+    max_pixels defaults to the app's MAX_IMAGE_PIXELS; pass it when calling
+    without an app context, e.g. from a thread pool.
+    """
+    from flask import current_app
+    from PIL import Image, ImageOps
+
+    if max_pixels is None:
+        max_pixels = current_app.config['MAX_IMAGE_PIXELS']
+    try:
+        source = Image.open(file)
+    except Image.DecompressionBombError as e:
+        raise ImageTooLarge(str(e))
+
+    with source:
+        # Only the header and EXIF have been read at this point
+        width, height = source.size
+        rotated = source.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+        box = MAX_IMAGE_SIZE[::-1] if rotated else MAX_IMAGE_SIZE
+        scale = min(box[0] / width, box[1] / height)
+        if source.format == 'JPEG' and scale * REDUCING_GAP < 1:
+            source.draft(None, (math.ceil(width * scale * REDUCING_GAP), math.ceil(height * scale * REDUCING_GAP)))
+
+        decoded = source.size[0] * source.size[1]
+        if decoded > max_pixels:
+            raise ImageTooLarge(
+                f'{width}x{height} image would decode to {decoded / 1e6:.1f} MP, '
+                f'the limit is {max_pixels / 1e6:.1f} MP'
+            )
+
+        # Automatically rotate to correct orientation using EXIF (a decoded copy)
+        image = ImageOps.exif_transpose(source)
+
+    image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+    image_format = Image.registered_extensions().get(os.path.splitext(filename)[1].lower())
+    with tempfile.SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_THRESHOLD,
+                                       dir=Config.UPLOAD_SPOOL_DIR) as encoded:
+        image.save(encoded, format=image_format, optimize=True, quality=85)
+        encoded.seek(0)
+        storage.save(filename, encoded, mimetypes.guess_type(filename)[0])
+    return image_placeholder(image)
@@ -0,0 +1,69 @@
+"""
+Serving uploaded images.
+
+MEDIA_SERVING picks who sends the file body:
+
+    app         the worker sends it. Werkzeug hands the open file to the
+                server's wsgi.file_wrapper (gunicorn uses sendfile(2)) and
+                answers Range and conditional requests (ETag/Last-Modified)
+    x-accel     nginx sends it. The response carries only an
+                X-Accel-Redirect header pointing at MEDIA_ACCEL_PREFIX, an
+                internal location aliased to the upload folder
+    x-sendfile  Apache (mod_xsendfile) or lighttpd sends it, given the
+                absolute path in an X-Sendfile header
+
+With a proxy mode the worker is free as soon as the headers are written,
+however slow the client's connection is. These modes apply to the local
+storage; with STORAGE_BACKEND=s3 images are loaded from the bucket.
+"""
+
+import mimetypes
+import os
+from urllib.parse import quote
+
+from flask import abort, current_app, redirect, request, url_for
+from werkzeug.security import safe_join
+from werkzeug.utils import send_from_directory
+
+from app.images import STATIC_IMAGES
+from app.storage import get_storage
+
+MEDIA_MODES = ('app', 'x-accel', 'x-sendfile')
+
+def media_url(filename):
+    """URL of an item image; shipped demo images stay on the static route"""
+    if filename in STATIC_IMAGES:
+        return url_for('static', filename=filename)
+    return get_storage().url(filename)
+
+def send_media(filename):
+    """Response for an uploaded image in the configured MEDIA_SERVING mode"""
+    storage = get_storage()
+    if not storage.local:
+        # Images live in a bucket; old /media links are sent there
+        return redirect(storage.url(filename))
+    config = current_app.config
+    folder = storage.folder
+    path = safe_join(folder, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+
+    mode = config['MEDIA_SERVING']
+    if mode == 'x-accel':
+        response = current_app.response_class(
+            mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = f"{config['MEDIA_ACCEL_PREFIX'].rstrip('/')}/{quote(filename)}"
+        response.cache_control.public = True
+        response.cache_control.max_age = config['MEDIA_MAX_AGE']
+        return response
+
+    response = send_from_directory(
+        folder, filename, request.environ,
+        max_age=config['MEDIA_MAX_AGE'],
+        use_x_sendfile=(mode == 'x-sendfile'),
+        conditional=True,
+        etag=True,
+    )
+    response.cache_control.public = True
+    return response
@@ -5,12 +5,16 @@ from werkzeug.security import generate_password_hash, check_password_hash
 
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    from app.identity import load_identity
+    return load_identity(int(user_id))
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(120), nullable=False)
+    # Bumped on logout and password change; workers drop cached identities
+    # of an older version (see app/identity.py)
+    user_version = db.Column(db.Integer, nullable=False, default=0)
 
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
@@ -22,17 +26,72 @@ class Item(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     description = db.Column(db.Text)
-    price = db.Column(db.Float, nullable=False)
+    price = db.Column(db.Float, nullable=False, index=True)
     is_sold = db.Column(db.Boolean, default=False)
+    # Set when the item is marked sold, cleared when unsold (see app/archive.py)
+    sold_at = db.Column(db.DateTime, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     view_count = db.Column(db.Integer, default=0)
+    # Time-decayed views, see app/trending.py
+    trending_score = db.Column(db.Float, default=0.0, index=True)
+    # Folded name + description, written on flush, see app/search.py
+    search_text = db.Column(db.Text)
     images = db.relationship('ItemImage', backref='item', lazy=True, cascade='all, delete-orphan')
 
+    # Serves available_only with or without a price range (app/facets.py)
+    __table_args__ = (db.Index('ix_item_is_sold_price', 'is_sold', 'price'),)
+
 class ItemImage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    filename = db.Column(db.String(128), nullable=False)
+    filename = db.Column(db.String(128), nullable=False, index=True)
     item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
     is_primary = db.Column(db.Boolean, default=False)
+    # Shown until the image loads (see app/images.py image_placeholder)
+    blurhash = db.Column(db.String(64))
+    dominant_color = db.Column(db.String(7))
+
+class ArchivedItem(db.Model):
+    """An item sold long ago, moved out of Item by app/archive.py"""
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, index=True)  # its id in Item; SQLite may reuse it
+    name = db.Column(db.String(100), nullable=False)
+    description = db.Column(db.Text)
+    price = db.Column(db.Float, nullable=False)
+    created_at = db.Column(db.DateTime)
+    sold_at = db.Column(db.DateTime, index=True)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    view_count = db.Column(db.Integer, default=0)
+    search_text = db.Column(db.Text)
+    images = db.relationship('ArchivedItemImage', backref='item', lazy=True,
+                             cascade='all, delete-orphan', order_by='ArchivedItemImage.id')
+
+    @property
+    def primary_image(self):
+        """The primary ArchivedItemImage, else the first (None without images)"""
+        return next((image for image in self.images if image.is_primary), self.images[0] if self.images else None)
+
+class ArchivedItemImage(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    filename = db.Column(db.String(128), nullable=False, index=True)
+    archived_item_id = db.Column(db.Integer, db.ForeignKey('archived_item.id'), nullable=False, index=True)
+    is_primary = db.Column(db.Boolean, default=False)
+    blurhash = db.Column(db.String(64))
+    dominant_color = db.Column(db.String(7))
+
+class ItemTrigram(db.Model):
+    """Trigrams of Item.search_text; the primary key doubles as the lookup index"""
+    trigram = db.Column(db.String(3), primary_key=True)
+    item_id = db.Column(db.Integer, primary_key=True, index=True)
+
+class ItemEvent(db.Model):
+    """Item changes for the live feed, written in the same transaction as the change"""
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer)  # not a foreign key: 'removed' outlives the item
+    kind = db.Column(db.String(16), nullable=False)
+    payload = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    # Ids are never reused, even after every event was pruned
+    __table_args__ = {'sqlite_autoincrement': True}
 
 class SiteSettings(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -42,6 +101,7 @@ class SiteSettings(db.Model):
     contact_info = db.Column(db.Text, nullable=False, default='Kontakta oss för mer information.')
     language = db.Column(db.String(5), nullable=False, default='sv')  # 'sv' or 'en'
     currency = db.Column(db.String(3), nullable=False, default='SEK')  # 'SEK' or 'USD'
+    trending_epoch = db.Column(db.DateTime)  # see app/trending.py
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -0,0 +1,141 @@
+"""
+Streamed page rendering and response compression.
+
+stream_page() sends a template as it renders, in chunks of at least
+STREAM_CHUNK_SIZE, so the browser gets the <head> (and starts on the
+stylesheets) while the item grid is still being rendered; time to first
+byte no longer grows with the catalog. The view does its queries first, so
+errors there still get the normal error page.
+
+register_compression() compresses responses in an after_request hook:
+brotli when the optional brotli package is installed and the browser
+accepts it, gzip otherwise. Streamed responses are compressed chunk by
+chunk with a sync flush after each one, so streaming survives compression.
+Skipped are small bodies (below COMPRESS_MIN_SIZE), types that are
+already compressed (images, zip files), files sent with send_file (the
+proxy or sendfile() handles those), Server-Sent Events, range responses
+and anything already encoded.
+"""
+
+import zlib
+
+from flask import current_app, request, stream_template
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/plain', 'text/css', 'text/csv', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+
+def _close(chunks):
+    # Ends the wrapped generator (and the request context it holds) now when
+    # the client goes away mid-stream, not whenever it is garbage-collected
+    if hasattr(chunks, 'close'):
+        chunks.close()
+
+def _buffered(chunks, size):
+    buffer, buffered = [], 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered += len(chunk)
+            if buffered >= size:
+                yield ''.join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield ''.join(buffer)
+    finally:
+        _close(chunks)
+
+def stream_page(template_name, **context):
+    """A streamed HTML response of a template, in chunks of STREAM_CHUNK_SIZE"""
+    return current_app.response_class(
+        _buffered(stream_template(template_name, **context), STREAM_CHUNK_SIZE),
+        mimetype='text/html')
+
+class _Encoder:
+    """Incremental gzip or brotli compressor"""
+
+    def __init__(self, encoding, config):
+        self.encoding = encoding
+        if encoding == 'br':
+            self._compressor = brotli.Compressor(quality=config['COMPRESS_BR_QUALITY'])
+        else:
+            # wbits 31: gzip container
+            self._compressor = zlib.compressobj(config['COMPRESS_LEVEL'], zlib.DEFLATED, 31)
+
+    def chunk(self, data):
+        """Compressed data, flushed so the client can decode it right away"""
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        if self.encoding == 'br':
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+    def all(self, data):
+        if self.encoding == 'br':
+            return self._compressor.process(data) + self._compressor.finish()
+        return self._compressor.compress(data) + self._compressor.flush()
+
+def _encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def _compressed_stream(chunks, encoder):
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield encoder.chunk(chunk)
+        yield encoder.finish()
+    finally:
+        _close(chunks)
+
+def compress_response(response):
+    """Compress a response for the current request if worthwhile (see module docstring)"""
+    config = current_app.config
+    if (not config['COMPRESS_ENABLED']
+            or request.method == 'HEAD'
+            or response.status_code not in (200, 201, 203, 404, 410, 500)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or 'Content-Range' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = _encoding()
+    if encoding is None:
+        return response
+
+    encoder = _Encoder(encoding, config)
+    if response.is_streamed:
+        response.response = _compressed_stream(response.response, encoder)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(encoder.all(data))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)  # the bytes differ from the identity encoding
+    return response
+
+def register_compression(app):
+    app.after_request(compress_response)
@@ -1,19 +1,26 @@
 import os
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, jsonify
+from datetime import datetime
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, jsonify, Response, stream_with_context, abort
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash
-from PIL import Image, ImageOps
 from app import db
-from app.models import Item, ItemImage, SiteSettings, UserSession, FailedLoginAttempt
-
-ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
-
-def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+from app.events import record_item_event
+from app.identity import invalidate_user
+from app.images import ImageTooLarge, allowed_file, save_upload_image
+from app.models import Item, ItemImage, SiteSettings, User, UserSession, FailedLoginAttempt
+from app.storage import get_storage
 
 admin = Blueprint('admin', __name__)
 
+@admin.after_request
+def refresh_static_export(response):
+    """Re-export the static catalog pages after a successful write (if enabled)"""
+    if request.method == 'POST' and response.status_code < 400:
+        from app.static_export import schedule_export
+        schedule_export()
+    return response
+
 @admin.route('/dashboard')
 @login_required
 def dashboard():
@@ -21,6 +28,8 @@ def dashboard():
     
     if sort_by == 'views':
         items = Item.query.order_by(Item.view_count.desc()).all()
+    elif sort_by == 'trending':
+        items = Item.query.order_by(Item.trending_score.desc(), Item.created_at.desc()).all()
     elif sort_by == 'name':
         items = Item.query.order_by(Item.name.asc()).all()
     elif sort_by == 'price':
@@ -43,11 +52,12 @@ def dashboard():
         FailedLoginAttempt.attempted_at.desc()
     ).limit(10).all()
     
-    return render_template('admin/dashboard.html', 
-                         items=items, 
-                         current_sort=sort_by,
-                         active_sessions=active_sessions,
-                         recent_failed_attempts=recent_failed_attempts)
+    from app.responses import stream_page
+    return stream_page('admin/dashboard.html',
+                       items=items,
+                       current_sort=sort_by,
+                       active_sessions=active_sessions,
+                       recent_failed_attempts=recent_failed_attempts)
 
 @admin.route('/item/new', methods=['GET', 'POST'])
 @login_required
@@ -66,16 +76,14 @@ def new_item():
         for file in files:
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                image = Image.open(file)
-                
-                # Automatically rotate to correct orientation using EXIF
-                image = ImageOps.exif_transpose(image)
-                
-                image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-                image.save(filepath, optimize=True, quality=85)
-                item_image = ItemImage(item_id=item.id, filename=filename)
+                try:
+                    placeholder = save_upload_image(file, filename, get_storage())
+                except ImageTooLarge as e:
+                    flash(f'Image {filename} was skipped: {e}', 'warning')
+                    continue
+                item_image = ItemImage(item_id=item.id, filename=filename, **placeholder)
                 db.session.add(item_image)
+        record_item_event('new', item)
         db.session.commit()
         
         # Log item creation
@@ -89,6 +97,8 @@ def new_item():
 @admin.route('/item/<int:item_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_item(item_id):
+    from app.file_sweep import schedule_removal
+
     item = Item.query.get_or_404(item_id)
     if request.method == 'POST':
         item.name = request.form.get('name')
@@ -96,48 +106,36 @@ def edit_item(item_id):
         item.price = request.form.get('price', type=float)
         item.is_sold = bool(request.form.get('is_sold'))
 
-        # Handle image deletions
+        # Handle image deletions; the files are removed after the commit
+        removed_files = []
         images_to_delete = request.form.getlist('delete_images')
         for img_id in images_to_delete:
             img = ItemImage.query.get(int(img_id))
             if img and img in item.images:
-                # Delete the file from the uploads folder
-                image_path = os.path.join(current_app.root_path, 'static', 'uploads', img.filename)
-                # Only delete if not a protected static image
-                if img.filename not in ['noimage.jpeg', 'demo.jpg']:
-                    try:
-                        if os.path.exists(image_path):
-                            os.remove(image_path)
-                    except Exception as e:
-                        print(f"Error deleting file {img.filename}: {e}")
-                else:
-                    print(f"Skipped deleting protected image: {img.filename}")
+                removed_files.append(img.filename)
+                item.images.remove(img)
                 db.session.delete(img)
-        db.session.commit()
 
         # Handle new uploads
         files = request.files.getlist('images')
         for file in files:
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
-                filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-                image = Image.open(file)
-                
-                # Automatically rotate to correct orientation using EXIF
-                image = ImageOps.exif_transpose(image)
-                
-                image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-                image.save(filepath, optimize=True, quality=85)
-                new_img = ItemImage(filename=filename, item_id=item.id)
-                db.session.add(new_img)
-        db.session.commit()
+                try:
+                    placeholder = save_upload_image(file, filename, get_storage())
+                except ImageTooLarge as e:
+                    flash(f'Image {filename} was skipped: {e}', 'warning')
+                    continue
+                item.images.append(ItemImage(filename=filename, **placeholder))
 
         # Handle primary image selection
         primary_image_id = request.form.get('primary_image')
         if primary_image_id:
             for img in item.images:
                 img.is_primary = (str(img.id) == primary_image_id)
-            db.session.commit()
+        record_item_event('updated', item)
+        db.session.commit()
+        schedule_removal(removed_files)
 
         # Log item update
         current_app.logger.info(f'User {current_user.username} updated item: {item.name} (ID: {item.id})')
@@ -150,28 +148,101 @@ def edit_item(item_id):
 @admin.route('/item/<int:item_id>/delete', methods=['POST'])
 @login_required
 def delete_item(item_id):
-    item = Item.query.get_or_404(item_id)
+    from app.file_sweep import schedule_removal
 
-    # Delete associated image files from disk
-    for img in item.images:
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], img.filename)
-        try:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-                current_app.logger.info(f"Deleted image file: {filepath}")
-        except Exception as e:
-            current_app.logger.error(f"Failed to delete {filepath}: {e}")
+    item = Item.query.get_or_404(item_id)
+    filenames = [img.filename for img in item.images]
 
     # Log item deletion
     current_app.logger.info(f'User {current_user.username} deleted item: {item.name} (ID: {item.id})')
     
-    # Then delete the item record and cascade delete images from DB
+    # Delete the item record and cascade delete images from DB
+    record_item_event('removed', item)
     db.session.delete(item)
     db.session.commit()
 
+    # Image files are removed in the background once nothing references them
+    schedule_removal(filenames)
+
     flash('Item deleted along with its images', 'success')
     return redirect(url_for('admin.dashboard'))
 
+@admin.route('/items/bulk', methods=['POST'])
+@login_required
+def bulk_items():
+    """Mark sold/unsold, reprice or delete the selected items in one transaction"""
+    from app.bulk import apply_bulk_action, parse_item_ids
+
+    action = request.form.get('action')
+    item_ids = parse_item_ids(request.form.getlist('item_ids'))
+    percent = request.form.get('percent', type=float)
+    if not item_ids:
+        flash('No items selected.', 'warning')
+        return redirect(url_for('admin.dashboard', sort=request.form.get('sort')))
+
+    try:
+        count = apply_bulk_action(action, item_ids, percent=percent)
+    except ValueError as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('admin.dashboard', sort=request.form.get('sort')))
+
+    current_app.logger.info(
+        f'User {current_user.username} applied bulk {action}'
+        f"{f' ({percent:+g}%)' if action == 'reprice' else ''} to {count} items: {item_ids}"
+    )
+    messages = {
+        'mark_sold': f'{count} items marked as sold.',
+        'mark_unsold': f'{count} items marked as available.',
+        'reprice': f'{count} items repriced.',
+        'delete': f'{count} items deleted along with their images.',
+    }
+    flash(messages[action], 'success')
+    return redirect(url_for('admin.dashboard', sort=request.form.get('sort')))
+
+@admin.route('/archive')
+@login_required
+def archive():
+    """Sold items moved out of the catalog (see app/archive.py), searchable and paginated"""
+    from app.archive import archived_items_query
+
+    search_query = request.args.get('search', '').strip()
+    page = db.paginate(archived_items_query(search_query),
+                       page=request.args.get('page', 1, type=int),
+                       per_page=current_app.config['ARCHIVE_PAGE_SIZE'],
+                       error_out=False)
+    return render_template('admin/archive.html', page=page, search_query=search_query,
+                           archive_after_days=current_app.config['ARCHIVE_AFTER_DAYS'])
+
+@admin.route('/archive/run', methods=['POST'])
+@login_required
+def run_archive():
+    """Archive items sold more than the given number of days ago"""
+    from app.archive import archive_sold_items
+
+    days = request.form.get('days', type=float)
+    if not days or days <= 0:
+        flash('Enter a number of days greater than 0.', 'danger')
+        return redirect(url_for('admin.archive'))
+
+    report = archive_sold_items(days, prune_images=bool(request.form.get('prune_images')))
+    current_app.logger.info(
+        f"User {current_user.username} archived {report['archived']} items sold more than {days:g} days ago"
+    )
+    flash(f"{report['archived']} sold items archived.", 'success')
+    return redirect(url_for('admin.archive'))
+
+@admin.route('/archive/<int:archived_id>/restore', methods=['POST'])
+@login_required
+def restore_archived_item(archived_id):
+    """Move an archived item back into the catalog"""
+    from app.archive import restore_item
+
+    item = restore_item(archived_id)
+    if item is None:
+        abort(404)
+    current_app.logger.info(f'User {current_user.username} restored item from the archive: {item.name} (ID: {item.id})')
+    flash('Item restored to the catalog. It is still marked as sold.', 'success')
+    return redirect(url_for('admin.edit_item', item_id=item.id))
 
 @admin.route('/upload', methods=['POST'])
 @login_required
@@ -185,18 +256,73 @@ def upload_file():
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
-        filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-        image = Image.open(file)
-
-        # Automatically rotate to correct orientation using EXIF
-        image = ImageOps.exif_transpose(image)
-
-        image.thumbnail((800, 600), Image.Resampling.LANCZOS)
-        image.save(filepath, optimize=True, quality=85)
+        try:
+            save_upload_image(file, filename, get_storage())
+        except ImageTooLarge as e:
+            return jsonify({'error': str(e)}), 413
         return jsonify({'filename': filename}), 200
 
     return jsonify({'error': 'File type not allowed'}), 400
 
+@admin.route('/export')
+@login_required
+def export_items():
+    """Stream the whole catalog as CSV, JSON lines or a zip including images"""
+    from app.transfer import EXPORT_FORMATS, export_items as generate_export
+
+    fmt = request.args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        flash('Unknown export format.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    content_types = {
+        'csv': 'text/csv; charset=utf-8',
+        'jsonl': 'application/x-ndjson; charset=utf-8',
+        'zip': 'application/zip',
+    }
+    filename = f"items-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    current_app.logger.info(f'User {current_user.username} exported items as {fmt}')
+
+    return Response(
+        stream_with_context(generate_export(fmt)),
+        content_type=content_types[fmt],
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+@admin.route('/import', methods=['POST'])
+@login_required
+def import_items():
+    """Import items from an uploaded .csv, .jsonl or .zip (with images) file"""
+    from app.transfer import open_import, import_items as run_import
+
+    file = request.files.get('import_file')
+    if not file or file.filename == '':
+        flash('No import file selected.', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    try:
+        records, images = open_import(file.stream, file.filename)
+        summary = run_import(records, images)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Import of {file.filename} failed: {e}')
+        flash(f'Import failed: {e}', 'danger')
+        return redirect(url_for('admin.dashboard'))
+
+    current_app.logger.info(
+        f"User {current_user.username} imported {summary['imported']}/{summary['rows']} items "
+        f"and {summary['images']} images from {file.filename} ({len(summary['errors'])} errors)"
+    )
+    flash(f"Imported {summary['imported']} of {summary['rows']} items and {summary['images']} images.",
+          'success' if not summary['errors'] else 'warning')
+    for line_number, message in summary['errors'][:10]:
+        flash(f'Line {line_number}: {message}', 'warning')
+    if len(summary['errors']) > 10:
+        flash(f"...and {len(summary['errors']) - 10} more errors (see logs).", 'warning')
+    for line_number, message in summary['errors']:
+        current_app.logger.warning(f'Import {file.filename} line {line_number}: {message}')
+    return redirect(url_for('admin.dashboard'))
+
 @admin.route('/change-password', methods=['GET', 'POST'])
 @login_required
 def change_password():
@@ -212,14 +338,17 @@ def change_password():
         new_password = request.form.get('new_password')
         confirm_password = request.form.get('confirm_password')
 
-        if not current_user.check_password(current_password):
+        # current_user is a cached snapshot (app/identity.py); change the row
+        user = db.session.get(User, current_user.id)
+        if not user.check_password(current_password):
             flash('Current password is incorrect.', 'danger')
         elif new_password != confirm_password:
             flash('New passwords do not match.', 'danger')
         elif len(new_password) < 6:
             flash('New password must be at least 6 characters.', 'danger')
         else:
-            current_user.set_password(new_password)
+            user.set_password(new_password)
+            invalidate_user(user.id)
             db.session.commit()
             
             # Log password change
@@ -2,6 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User, UserSession, FailedLoginAttempt
 from app import db, limiter
+from app.identity import invalidate_user
 import uuid
 from datetime import datetime, timedelta
 
@@ -77,7 +78,8 @@ def logout():
         ).first()
         if user_session:
             user_session.is_active = False
-            db.session.commit()
-    
+
+    invalidate_user(current_user.id)
+    db.session.commit()
     logout_user()
     return redirect(url_for('main.index'))
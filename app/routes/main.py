@@ -1,4 +1,4 @@
-from flask import Blueprint, render_template, jsonify, current_app, request, session, redirect, url_for
+from flask import Blueprint, render_template, jsonify, current_app, request, session, redirect, url_for, Response, stream_with_context, abort
 from app.models import Item, SiteSettings
 from app import db, limiter
 
@@ -6,58 +6,151 @@ main = Blueprint('main', __name__)
 
 @main.route('/')
 def index():
-    # Get search and sort parameters
+    from app.catalog import get_catalog
+    from app.facets import facet_counts, facet_links, filter_args, parse_filters
+    from app.search import normalize
+
+    # Get search, sort and filter parameters
     search_query = request.args.get('search', '').strip()
     sort_by = request.args.get('sort', 'newest')
+    filters = parse_filters(request.args)
     
-    # Start with base query
-    query = Item.query
-    
-    # Apply search filter if provided
-    if search_query:
-        query = query.filter(
-            db.or_(
-                Item.name.ilike(f'%{search_query}%'),
-                Item.description.ilike(f'%{search_query}%')
-            )
-        )
-    
-    # Apply sorting
-    if sort_by == 'oldest':
-        query = query.order_by(Item.created_at.asc())
-    elif sort_by == 'price_low':
-        query = query.order_by(Item.price.asc())
-    elif sort_by == 'price_high':
-        query = query.order_by(Item.price.desc())
-    elif sort_by == 'name':
-        query = query.order_by(Item.name.asc())
-    elif sort_by == 'views':
-        query = query.order_by(Item.view_count.desc())
-    else:  # newest (default)
-        query = query.order_by(Item.created_at.desc())
-    
-    items = query.all()
+    # Cards come from this worker's in-memory snapshot (see app/catalog.py)
+    catalog = get_catalog()
+    words = normalize(search_query).split()
+    items = catalog.items(sort_by, words, filters)
+    fuzzy_search = False
+
+    # Nothing matches exactly, even without the filters: fall back to close
+    # matches, best first (ties keep the chosen sort)
+    if words and not items and not catalog.items(sort_by, words):
+        from app.search import fuzzy_matches
+        matches = fuzzy_matches(search_query)
+        shared = dict(db.session.execute(db.select(matches.c.item_id, matches.c.shared)).all())
+        fuzzy_search = True
+        items = sorted((record for record in catalog.items(sort_by, (), filters) if record.id in shared),
+                       key=lambda record: -shared[record.id])
+
     settings = SiteSettings.get_settings()
+    facets = facet_links(facet_counts(search_query, filters, fuzzy=fuzzy_search), filters,
+                         search=search_query, sort=sort_by)
+
+    # Live updates pick up from the last event this page already reflects
+    from app.events import get_hub
+    events_url = url_for('main.events', since=get_hub().latest_id())
     
-    return render_template(
+    # Streamed: the page head goes out while the item grid renders
+    from app.responses import stream_page
+    return stream_page(
         'index.html', 
         items=items,
         settings=settings,
         search_query=search_query,
-        current_sort=sort_by
+        fuzzy_search=fuzzy_search,
+        current_sort=sort_by,
+        filters=filters,
+        filter_args=filter_args(filters),
+        facets=facets,
+        events_url=events_url,
+        archive_url=url_for('main.sold_items') if current_app.config['ARCHIVE_PUBLIC'] else None
     )
 
+@main.route('/sold')
+def sold_items():
+    """Archived items, paginated apart from the catalog (only with ARCHIVE_PUBLIC)"""
+    from app.archive import archived_items_query
+
+    if not current_app.config['ARCHIVE_PUBLIC']:
+        abort(404)
+    page = db.paginate(archived_items_query(),
+                       page=request.args.get('page', 1, type=int),
+                       per_page=current_app.config['ARCHIVE_PAGE_SIZE'],
+                       error_out=False)
+    return render_template('sold.html', page=page, settings=SiteSettings.get_settings())
+
 @main.route('/item/<int:item_id>/view', methods=['POST'])
 def track_item_view(item_id):
     """Track when an item is viewed by incrementing its view count"""
+    from app.events import record_item_events
+    from app.trending import record_views
+    from app.views import new_views
+
     item = Item.query.get_or_404(item_id)
-    item.view_count += 1
-    db.session.commit()
+    name, view_count = item.name, item.view_count or 0
+    if new_views([item_id]):
+        # Increments in SQL so concurrent threads/workers don't lose updates;
+        # the loaded item doesn't see that, so count this view here
+        record_views({item_id: 1})
+        record_item_events('views', [item_id])
+        db.session.commit()
+        view_count += 1
     
     # Log item view (debug level to avoid spam)
-    current_app.logger.debug(f'Item viewed: {item.name} (ID: {item_id}) from {request.remote_addr}')
+    current_app.logger.debug(f'Item viewed: {name} (ID: {item_id}) from {request.remote_addr}')
     
-    return jsonify({'success': True, 'view_count': item.view_count})
+    return jsonify({'success': True, 'view_count': view_count})
+
+@main.route('/item/views', methods=['POST'])
+@limiter.limit("60 per minute")
+def track_item_views():
+    """Record a batch of item views queued by the gallery (see app/views.py)"""
+    from app.events import record_item_events
+    from app.trending import record_views
+    from app.views import new_views, parse_item_ids
+
+    # force: navigator.sendBeacon may send the body as text/plain
+    item_ids = parse_item_ids(request.get_json(force=True, silent=True))
+    if item_ids:
+        existing = set(db.session.scalars(db.select(Item.id).where(Item.id.in_(item_ids))))
+        counted = new_views([item_id for item_id in item_ids if item_id in existing])
+        if counted:
+            record_views(dict.fromkeys(counted, 1))
+            record_item_events('views', counted)
+            db.session.commit()
+            current_app.logger.debug(f'Item views: {len(counted)} of {len(item_ids)} counted from {request.remote_addr}')
+    return '', 204
+
+@main.route('/search/suggest')
+@limiter.limit("120 per minute")  # one request per typed prefix, cached by the browser
+def search_suggest():
+    """Item name completions for the search box (see app/suggest.py)"""
+    from app.suggest import get_suggest_index, SUGGEST_LIMIT
+
+    query = request.args.get('q', '').strip()[:100]
+    limit = min(request.args.get('limit', SUGGEST_LIMIT, type=int), 20)
+    suggestions = get_suggest_index().suggest(query, limit) if query else []
+
+    response = jsonify({'query': query, 'suggestions': suggestions})
+    response.cache_control.public = True
+    response.cache_control.max_age = 30
+    return response
+
+@main.route('/media/<path:filename>')
+@limiter.exempt
+def media(filename):
+    """Serve an uploaded image (directly or via the front proxy, see app/media.py)"""
+    from app.media import send_media
+    return send_media(filename)
+
+@main.route('/events')
+@limiter.exempt
+def events():
+    """Server-Sent Events feed of item changes (see app/events.py)"""
+    from app.events import event_stream, get_hub
+
+    # EventSource sends Last-Event-ID when reconnecting; the first
+    # connection uses the ?since= id rendered into the page
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    if last_id is None:
+        last_id = request.args.get('since', type=int)
+    if last_id is None:
+        last_id = get_hub().latest_id()
+
+    return Response(
+        stream_with_context(event_stream(last_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
 @main.route('/set-language/<language>')
 @limiter.limit("10 per minute")  # Rate limit to prevent abuse
@@ -0,0 +1,151 @@
+"""
+Accent- and case-insensitive catalog search with a trigram index.
+
+Item.search_text holds the name and description folded by normalize():
+accents stripped, case folded and punctuation turned into spaces, so
+"stol" finds "Stöl" and "kosik" finds "košík". ItemTrigram holds the
+trigrams of that text, one row per (trigram, item), and both are written
+whenever an item is flushed with a new name or description.
+
+Each search word of three or more letters contains trigrams that every
+matching item must have. The index finds the items that have all of them,
+and LIKE on search_text then checks only those candidates. A search
+therefore reads index ranges, not the whole item table. Only searches made
+entirely of one- and two-letter words fall back to scanning search_text.
+
+If nothing matches exactly, fuzzy_matches() ranks items by how many of the
+query's trigrams (words padded with spaces, as in PostgreSQL's pg_trgm) they
+share. That tolerates a typo or a missing letter ("kosk" still finds
+"košík").
+"""
+
+import math
+import re
+import unicodedata
+
+from sqlalchemy import bindparam, event, inspect
+
+from app import db
+from app.models import Item, ItemTrigram
+
+# Letters NFKD does not decompose into a base letter plus accent
+_FOLD_EXTRA = str.maketrans({'ø': 'o', 'đ': 'd', 'ł': 'l', 'æ': 'ae', 'œ': 'oe', 'þ': 'th'})
+_NON_WORD = re.compile(r'[\W_]+')
+
+# Share of the query's trigrams an item needs for a fuzzy match, and how
+# many of the closest matches are shown
+FUZZY_MIN_SHARED = 0.5
+FUZZY_LIMIT = 100
+
+def normalize(text):
+    """Fold text for matching: 'Stöl, KOŠÍK!' -> 'stol kosik'"""
+    decomposed = unicodedata.normalize('NFKD', (text or '').casefold())
+    stripped = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return ' '.join(_NON_WORD.sub(' ', stripped.translate(_FOLD_EXTRA)).split())
+
+def item_search_text(name, description):
+    return normalize(f'{name or ""} {description or ""}')
+
+def padded_trigrams(text):
+    """Trigrams of every word padded like pg_trgm: 'sofa' -> '  s', ' so', 'sof', 'ofa', 'fa '"""
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+def inner_trigrams(word):
+    """Trigrams every text containing word also contains"""
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+def search_condition(query_text):
+    """WHERE clause matching items that contain every word of query_text"""
+    conditions = []
+    for word in normalize(query_text).split():
+        grams = inner_trigrams(word)
+        if grams:
+            conditions.append(Item.id.in_(
+                db.select(ItemTrigram.item_id)
+                .where(ItemTrigram.trigram.in_(grams))
+                .group_by(ItemTrigram.item_id)
+                .having(db.func.count() == len(grams))
+            ))
+        # The trigrams narrow the candidates; LIKE checks the word is really there
+        conditions.append(Item.search_text.like(f'%{word}%'))
+    return db.and_(*conditions)
+
+def fuzzy_matches(query_text):
+    """
+    Subquery of (item_id, shared) for the FUZZY_LIMIT items sharing the most
+    of the query's trigrams (at least FUZZY_MIN_SHARED of them), or None if
+    the query has no words.
+    """
+    grams = padded_trigrams(normalize(query_text))
+    if not grams:
+        return None
+    needed = max(1, math.ceil(len(grams) * FUZZY_MIN_SHARED))
+    return (
+        db.select(ItemTrigram.item_id, db.func.count().label('shared'))
+        .where(ItemTrigram.trigram.in_(grams))
+        .group_by(ItemTrigram.item_id)
+        .having(db.func.count() >= needed)
+        .order_by(db.func.count().desc())
+        .limit(FUZZY_LIMIT)
+        .subquery()
+    )
+
+def index_rows(item_id, search_text):
+    return [{'trigram': gram, 'item_id': item_id} for gram in padded_trigrams(search_text)]
+
+def _set_search_text(mapper, connection, item):
+    item.search_text = item_search_text(item.name, item.description)
+
+def _reindex_flushed_items(session, flush_context):
+    """Rewrite the trigrams of items inserted, renamed or deleted in this flush"""
+    stale, rows = [], []
+    for item in session.new:
+        if isinstance(item, Item):
+            rows.extend(index_rows(item.id, item.search_text))
+    for item in session.dirty:
+        if isinstance(item, Item) and inspect(item).attrs.search_text.history.has_changes():
+            stale.append(item.id)
+            rows.extend(index_rows(item.id, item.search_text))
+    for item in session.deleted:
+        if isinstance(item, Item):
+            stale.append(item.id)
+    if stale:
+        session.execute(db.delete(ItemTrigram).where(ItemTrigram.item_id.in_(stale)))
+    if rows:
+        session.execute(db.insert(ItemTrigram), rows)
+
+def register_search_index():
+    """Keep Item.search_text and ItemTrigram in step with ORM writes"""
+    if event.contains(Item, 'before_insert', _set_search_text):
+        return
+    event.listen(Item, 'before_insert', _set_search_text)
+    event.listen(Item, 'before_update', _set_search_text)
+    event.listen(db.session, 'after_flush', _reindex_flushed_items)
+
+def rebuild_search_index(connection, batch_size=1000):
+    """Recompute search_text and trigrams of every item (migration, repair)"""
+    connection.execute(db.delete(ItemTrigram))
+    last_id = 0
+    while True:
+        batch = connection.execute(
+            db.select(Item.id, Item.name, Item.description)
+            .where(Item.id > last_id).order_by(Item.id).limit(batch_size)
+        ).all()
+        if not batch:
+            return
+        texts = [{'item_id': item_id, 'text': item_search_text(name, description)}
+                 for item_id, name, description in batch]
+        connection.execute(
+            db.update(Item.__table__)
+            .where(Item.__table__.c.id == bindparam('item_id'))
+            .values(search_text=bindparam('text')),
+            texts
+        )
+        rows = [row for text in texts for row in index_rows(text['item_id'], text['text'])]
+        if rows:
+            connection.execute(db.insert(ItemTrigram), rows)
+        last_id = batch[-1].id
@@ -10,6 +10,12 @@ document.addEventListener('DOMContentLoaded', function () {
   
   // Initialize modern gallery
   initModernGallery();
+  
+  // Initialize live item updates
+  initLiveUpdates();
+  
+  // Blurred previews for card images that are still loading
+  initImagePlaceholders();
 });
 
 // Theme System - Performance Optimized
@@ -408,6 +414,75 @@ function initMobileNavigation() {
   });
 }
 
+// View tracking: gallery views are queued and sent together with
+// navigator.sendBeacon every few seconds and when the page is hidden
+function createViewTracker() {
+  const FLUSH_DELAY_MS = 10000;
+  const DEDUP_MS = 10 * 60 * 1000;  // matches the server's VIEW_DEDUP_SECONDS default
+  const STORAGE_KEY = 'recentItemViews';
+  const grid = document.getElementById('itemsGrid');
+  const url = grid ? grid.dataset.viewsUrl : null;
+  let pending = [];
+  let timer = null;
+  
+  function recentViews(now) {
+    let recent = {};
+    try {
+      recent = JSON.parse(sessionStorage.getItem(STORAGE_KEY)) || {};
+    } catch (e) {
+      // Unavailable or corrupt storage: rely on the server's de-duplication
+    }
+    Object.keys(recent).forEach(id => {
+      if (now - recent[id] >= DEDUP_MS) delete recent[id];
+    });
+    return recent;
+  }
+  
+  function record(itemId) {
+    if (!url) return;
+    const now = Date.now();
+    const recent = recentViews(now);
+    if (recent[itemId]) return;
+    recent[itemId] = now;
+    try {
+      sessionStorage.setItem(STORAGE_KEY, JSON.stringify(recent));
+    } catch (e) {
+      // Storage full or disabled
+    }
+    pending.push(Number(itemId));
+    if (!timer) {
+      timer = setTimeout(flush, FLUSH_DELAY_MS);
+    }
+  }
+  
+  function flush() {
+    clearTimeout(timer);
+    timer = null;
+    if (!pending.length) return;
+    const body = JSON.stringify({ item_ids: pending });
+    pending = [];
+    const queued = navigator.sendBeacon &&
+      navigator.sendBeacon(url, new Blob([body], { type: 'application/json' }));
+    if (!queued) {
+      fetch(url, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: body,
+        keepalive: true
+      }).catch(error => {
+        console.log('View tracking failed:', error);
+      });
+    }
+  }
+  
+  document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'hidden') flush();
+  });
+  window.addEventListener('pagehide', flush);
+  
+  return { record, flush };
+}
+
 // Modern Gallery
 function initModernGallery() {
   let currentIndex = 0;
@@ -427,6 +502,8 @@ function initModernGallery() {
   
   if (!gallery) return;
   
+  const viewTracker = createViewTracker();
+  
   // Touch and pan variables
   let isDragging = false;
   let startX = 0;
@@ -442,16 +519,9 @@ function initModernGallery() {
     currentIndex = 0;
     scale = 1;
     
-    // Track the view
+    // Track the view (queued, sent in batches)
     if (itemId) {
-      fetch(`/item/${itemId}/view`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        }
-      }).catch(error => {
-        console.log('View tracking failed:', error);
-      });
+      viewTracker.record(itemId);
     }
     
     createThumbnails();
@@ -676,6 +746,172 @@ function initModernGallery() {
 
 
 
+// Image Placeholders - decode each card's blurhash (https://blurha.sh) into a
+// small blurred background shown until the image itself has loaded
+const BLURHASH_CHARS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~';
+
+function decodeBase83(str) {
+  let value = 0;
+  for (const char of str) {
+    value = value * 83 + BLURHASH_CHARS.indexOf(char);
+  }
+  return value;
+}
+
+function srgbToLinear(value) {
+  const v = value / 255;
+  return v <= 0.04045 ? v / 12.92 : Math.pow((v + 0.055) / 1.055, 2.4);
+}
+
+function linearToSrgb(value) {
+  const v = Math.max(0, Math.min(1, value));
+  return v <= 0.0031308 ? Math.round(v * 12.92 * 255) : Math.round((1.055 * Math.pow(v, 1 / 2.4) - 0.055) * 255);
+}
+
+function decodeBlurhash(hash, width, height) {
+  const size = decodeBase83(hash[0]);
+  const numX = (size % 9) + 1;
+  const numY = Math.floor(size / 9) + 1;
+  if (hash.length !== 4 + 2 * numX * numY) return null;
+  
+  const maxValue = (decodeBase83(hash[1]) + 1) / 166;
+  const colors = [];
+  const dc = decodeBase83(hash.substring(2, 6));
+  colors.push([srgbToLinear(dc >> 16), srgbToLinear((dc >> 8) & 255), srgbToLinear(dc & 255)]);
+  for (let i = 1; i < numX * numY; i++) {
+    const value = decodeBase83(hash.substring(4 + i * 2, 6 + i * 2));
+    colors.push([Math.floor(value / 361), Math.floor(value / 19) % 19, value % 19].map(q => {
+      const v = (q - 9) / 9;
+      return Math.sign(v) * v * v * maxValue;
+    }));
+  }
+  
+  const pixels = new Uint8ClampedArray(width * height * 4);
+  for (let y = 0; y < height; y++) {
+    for (let x = 0; x < width; x++) {
+      let r = 0, g = 0, b = 0;
+      for (let j = 0; j < numY; j++) {
+        const basisY = Math.cos(Math.PI * y * j / height);
+        for (let i = 0; i < numX; i++) {
+          const basis = Math.cos(Math.PI * x * i / width) * basisY;
+          const color = colors[i + j * numX];
+          r += color[0] * basis;
+          g += color[1] * basis;
+          b += color[2] * basis;
+        }
+      }
+      const offset = 4 * (x + y * width);
+      pixels[offset] = linearToSrgb(r);
+      pixels[offset + 1] = linearToSrgb(g);
+      pixels[offset + 2] = linearToSrgb(b);
+      pixels[offset + 3] = 255;
+    }
+  }
+  return pixels;
+}
+
+function initImagePlaceholders() {
+  const canvas = document.createElement('canvas');
+  canvas.width = canvas.height = 32;
+  const context = canvas.getContext && canvas.getContext('2d');
+  if (!context) return;
+  
+  document.querySelectorAll('img[data-blurhash]').forEach(img => {
+    if (img.complete && img.naturalWidth) return;
+    const pixels = decodeBlurhash(img.getAttribute('data-blurhash'), 32, 32);
+    if (!pixels) return;
+    context.putImageData(new ImageData(pixels, 32, 32), 0, 0);
+    img.style.backgroundImage = `url(${canvas.toDataURL()})`;
+    img.style.backgroundSize = 'cover';
+    // Transparent images shouldn't show the preview behind them
+    img.addEventListener('load', () => {
+      img.style.backgroundImage = '';
+      img.style.backgroundColor = '';
+    }, { once: true });
+  });
+}
+
+// Live Updates - patch item cards from the server's event feed
+function initLiveUpdates() {
+  const notice = document.getElementById('liveUpdates');
+  if (!notice || !window.EventSource) return;
+  
+  const soldLabel = notice.getAttribute('data-sold-label');
+  const source = new EventSource(notice.getAttribute('data-events-url'));
+  
+  function findCard(itemId) {
+    return document.querySelector(`.item-card[data-item-id="${itemId}"]`);
+  }
+  
+  function patchCard(card, item) {
+    card.classList.toggle('sold', item.is_sold);
+    
+    const title = card.querySelector('.card-title');
+    if (title) title.textContent = item.name;
+    
+    const price = card.querySelector('.price-value');
+    if (price) price.textContent = item.price_display;
+    
+    const views = card.querySelector('.item-views');
+    if (views) {
+      views.querySelector('.view-count-value').textContent = item.view_count;
+      views.classList.toggle('d-none', !item.view_count);
+    }
+    
+    let badge = card.querySelector('.sold-badge');
+    if (item.is_sold && !badge) {
+      badge = document.createElement('span');
+      badge.className = 'badge bg-danger mt-2 sold-badge';
+      badge.textContent = soldLabel;
+      card.querySelector('.card-body').appendChild(badge);
+    } else if (!item.is_sold && badge) {
+      badge.remove();
+    }
+  }
+  
+  source.addEventListener('item', (e) => {
+    let event;
+    try {
+      event = JSON.parse(e.data);
+    } catch (error) {
+      return;
+    }
+    
+    if (event.kind === 'new') {
+      notice.classList.remove('d-none');
+      return;
+    }
+    
+    const card = event.item && findCard(event.item.id);
+    if (!card) return;
+    
+    requestAnimationFrame(() => {
+      if (event.kind === 'removed') {
+        (card.closest('.col') || card).remove();
+      } else {
+        patchCard(card, event.item);
+      }
+    });
+  });
+  
+  // The server could not replay every missed change; show the current page.
+  // Reload at most once a minute: a static export page may still be behind
+  source.addEventListener('reset', () => {
+    source.close();
+    const now = Date.now();
+    let reloadedAt = 0;
+    try {
+      reloadedAt = Number(sessionStorage.getItem('liveUpdatesReloadedAt')) || 0;
+      sessionStorage.setItem('liveUpdatesReloadedAt', String(now));
+    } catch (e) {
+      // Storage disabled: reload anyway
+    }
+    if (now - reloadedAt > 60000) {
+      window.location.reload();
+    }
+  });
+}
+
 // Search and Sort Enhancement
 document.addEventListener('DOMContentLoaded', function() {
   initSearchEnhancements();
@@ -687,26 +923,108 @@ function initSearchEnhancements() {
   
   if (!searchInput || !searchForm) return;
   
-  // Auto-submit search after typing stops
+  const suggestUrl = searchInput.getAttribute('data-suggest-url');
+  const suggestionList = document.getElementById('searchSuggestions');
+  const suggestionCache = new Map(); // query -> suggestions
+  const initialQuery = searchInput.value;
   let searchTimeout;
+  let activeIndex = -1;
+  
+  function hideSuggestions() {
+    activeIndex = -1;
+    if (!suggestionList) return;
+    suggestionList.classList.add('d-none');
+    searchInput.setAttribute('aria-expanded', 'false');
+  }
+  
+  function chooseSuggestion(name) {
+    searchInput.value = name;
+    hideSuggestions();
+    searchForm.submit();
+  }
+  
+  function showSuggestions(query, suggestions) {
+    // Ignore answers for text the user has already changed
+    if (!suggestionList || query !== searchInput.value.trim()) return;
+    suggestionList.innerHTML = '';
+    activeIndex = -1;
+    suggestions.forEach(name => {
+      const option = document.createElement('button');
+      option.type = 'button';
+      option.className = 'list-group-item list-group-item-action';
+      option.setAttribute('role', 'option');
+      option.textContent = name;
+      // mousedown fires before the input loses focus
+      option.addEventListener('mousedown', e => {
+        e.preventDefault();
+        chooseSuggestion(name);
+      });
+      suggestionList.appendChild(option);
+    });
+    const hasSuggestions = suggestions.length > 0;
+    suggestionList.classList.toggle('d-none', !hasSuggestions);
+    searchInput.setAttribute('aria-expanded', String(hasSuggestions));
+  }
+  
+  function fetchSuggestions(query) {
+    if (suggestionCache.has(query)) {
+      showSuggestions(query, suggestionCache.get(query));
+      return;
+    }
+    fetch(`${suggestUrl}?q=${encodeURIComponent(query)}`)
+      .then(response => response.ok ? response.json() : { suggestions: [] })
+      .then(data => {
+        suggestionCache.set(query, data.suggestions);
+        showSuggestions(query, data.suggestions);
+      })
+      .catch(() => hideSuggestions());
+  }
+  
+  function highlight(index) {
+    const options = suggestionList ? suggestionList.children : [];
+    if (!options.length) return;
+    activeIndex = (index + options.length) % options.length;
+    Array.from(options).forEach((option, i) => option.classList.toggle('active', i === activeIndex));
+  }
+  
+  // Suggest item names while typing; the page only reloads on submit
   searchInput.addEventListener('input', function() {
     clearTimeout(searchTimeout);
-    searchTimeout = setTimeout(() => {
-      if (searchInput.value.length >= 2 || searchInput.value.length === 0) {
-        searchForm.submit();
-      }
-    }, 500); // Wait 500ms after user stops typing
+    const query = searchInput.value.trim();
+    if (!query) {
+      hideSuggestions();
+      // Clearing an active search shows every item again
+      if (initialQuery) searchForm.submit();
+      return;
+    }
+    if (!suggestUrl) return;
+    searchTimeout = setTimeout(() => fetchSuggestions(query), 150);
   });
   
-  // Handle Enter key
-  searchInput.addEventListener('keypress', function(e) {
-    if (e.key === 'Enter') {
+  searchInput.addEventListener('keydown', function(e) {
+    const open = suggestionList && !suggestionList.classList.contains('d-none');
+    if (e.key === 'ArrowDown' && open) {
+      e.preventDefault();
+      highlight(activeIndex + 1);
+    } else if (e.key === 'ArrowUp' && open) {
+      e.preventDefault();
+      highlight(activeIndex - 1);
+    } else if (e.key === 'Escape') {
+      hideSuggestions();
+    } else if (e.key === 'Enter') {
       e.preventDefault();
       clearTimeout(searchTimeout);
-      searchForm.submit();
+      if (open && activeIndex >= 0) {
+        chooseSuggestion(suggestionList.children[activeIndex].textContent);
+      } else {
+        hideSuggestions();
+        searchForm.submit();
+      }
     }
   });
   
+  searchInput.addEventListener('blur', hideSuggestions);
+  
   // Focus search input with Ctrl+F or Cmd+F
   document.addEventListener('keydown', function(e) {
     if ((e.ctrlKey || e.metaKey) && e.key === 'f') {
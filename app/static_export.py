@@ -0,0 +1,243 @@
+"""
+Static export of the public catalog page.
+
+Renders index.html once per locale and sort option into plain files that a
+web server can serve without Python, e.g. during a sale-day rush:
+
+    <export dir>/<locale>/<sort>.html   e.g. sv/newest.html, en/price_low.html
+    <export dir>/_assets/               style.css, app.js and the favicon, with a
+                                        content hash in the name so they can be
+                                        cached forever
+    <export dir>/manifest.json          what was rendered, and as of which event
+
+Pages are rendered as an anonymous visitor whose browser asks for that
+locale, straight through the view function (no rate limits, no cookies).
+
+An export only renders the pages the item events of app/events.py say have
+changed since each page was written: any edit, sale, addition or removal
+affects every page, views only the 'views' and 'trending' sorts. Live
+updates patch the rest in the browser, from the event id each page was
+rendered at. A page is also redone when that id falls too far behind for
+the event feed to replay or is ahead of every event (the ids started over,
+e.g. after a restore), and every page when a template, translation,
+asset or the site settings change. Files whose content didn't change are
+not rewritten. With presigned image URLs (STORAGE_BACKEND=s3 without a
+public URL) a page is also redone halfway through the time its URLs are
+guaranteed to stay valid, so the periodic export renews them in time.
+
+With STATIC_EXPORT_DIR set, admin writes schedule an export on a daemon
+thread of the worker that handled them (see schedule_export).
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+
+from flask import current_app
+
+from app import db
+from app.models import ItemEvent, SiteSettings
+from app.storage import get_storage
+
+ASSETS_DIR = '_assets'
+MANIFEST = 'manifest.json'
+# Redo pages whose event id is this many events behind; well inside the
+# 500-event backlog each worker's event hub can replay
+STALE_EVENTS = 250
+# Coalesce the exports scheduled by a burst of admin writes
+SCHEDULE_DELAY_SECONDS = 2
+
+# Shipped assets referenced from the page (not uploads or item images)
+_ASSET_URL = re.compile(r'''(["'])/static/((?:css|js|vendor)/[^"'?#]+|favicon\.png)\1''')
+# Files a stylesheet loads relative to itself, like Font Awesome's webfonts/
+_CSS_RELATIVE_URL = re.compile(r'''url\(\s*["']?(?![a-z]+:|/|#)([^"')?#]+)''')
+
+def page_names():
+    """(locale, sort, relative path) of every exported page"""
+    from app.catalog import ORDERINGS
+    return [(locale, sort, f'{locale}/{sort}.html')
+            for locale in current_app.config['LANGUAGES'] for sort in ORDERINGS]
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def _file_digest(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def inputs_fingerprint():
+    """Hash of everything besides items a page depends on"""
+    digest = hashlib.sha256()
+    root = current_app.root_path
+    for folder in ('templates', 'translations', *(os.path.join('static', name) for name in ('css', 'js', 'vendor', 'build'))):
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, folder)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                digest.update(os.path.relpath(path, root).encode())
+                digest.update(_file_digest(path).encode())
+    settings = SiteSettings.get_settings()
+    digest.update(repr((settings.site_name, settings.welcome_message, settings.general_info,
+                        settings.contact_info, settings.language, settings.currency)).encode())
+    return digest.hexdigest()
+
+def _export_asset(out_dir, static_path, assets):
+    """Copy a static file to _assets under a content-hashed name, once per export"""
+    if static_path not in assets:
+        source = os.path.join(current_app.static_folder, static_path)
+        stem, ext = os.path.splitext(os.path.basename(static_path))
+        name = f'{stem}.{_file_digest(source)[:10]}{ext}'
+        target = os.path.join(out_dir, ASSETS_DIR, name)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.copyfile(source, target)
+        if ext == '.css':
+            # Kept at the same path next to the renamed stylesheet
+            with open(source, encoding='utf-8') as f:
+                for ref in set(_CSS_RELATIVE_URL.findall(f.read())):
+                    ref_target = os.path.join(out_dir, ASSETS_DIR, ref)
+                    if not os.path.exists(ref_target):
+                        os.makedirs(os.path.dirname(ref_target), exist_ok=True)
+                        shutil.copyfile(os.path.join(os.path.dirname(source), ref), ref_target)
+        assets[static_path] = f'/{ASSETS_DIR}/{name}'
+    return assets[static_path]
+
+def render_page(locale, sort, out_dir, assets):
+    """index.html for an anonymous visitor, with asset URLs fingerprinted"""
+    app = current_app._get_current_object()
+    with app.test_request_context('/', query_string={'sort': sort}, headers={'Accept-Language': locale}):
+        html = app.make_response(app.view_functions['main.index']()).get_data(as_text=True)
+    return _ASSET_URL.sub(
+        lambda m: f'{m.group(1)}{_export_asset(out_dir, m.group(2), assets)}{m.group(1)}', html)
+
+def _event_bounds():
+    """(oldest, latest, latest non-view) event id, each None without events"""
+    return db.session.execute(db.select(
+        db.func.min(ItemEvent.id),
+        db.func.max(ItemEvent.id),
+        db.func.max(db.case((ItemEvent.kind != 'views', ItemEvent.id))),
+    )).one()
+
+def _is_affected(sort, page, bounds):
+    from app.catalog import VIEW_ORDERINGS
+
+    oldest, latest, last_change = bounds
+    since = page['event_id']
+    if latest is not None and latest < since:
+        return True  # the event ids started over, e.g. after a restore
+    if latest is None or latest == since:
+        return False
+    if oldest > since + 1:
+        return True  # events after this page were pruned, their kinds are unknown
+    if last_change is not None and last_change > since:
+        return True
+    return sort in VIEW_ORDERINGS or latest - since >= STALE_EVENTS
+
+def load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def export_catalog(out_dir, full=False):
+    """
+    Render the pages of out_dir that changed since the last export (all of
+    them with full=True). Returns a report dict.
+    """
+    manifest = load_manifest(out_dir)
+    inputs = inputs_fingerprint()
+    if manifest.get('inputs') != inputs:
+        full = True
+    # Read the bounds before rendering: events that land meanwhile are
+    # picked up again by the next export, which is harmless
+    bounds = _event_bounds()
+    event_id = bounds[1] or 0
+    # Pages with presigned image URLs are redone at half the URLs' lifetime
+    now = time.time()
+    url_lifetime = get_storage().url_lifetime
+    pages = manifest.get('pages', {})
+    assets = {}
+    report = {'pages': 0, 'rendered': 0, 'written': 0}
+
+    for locale, sort, name in page_names():
+        report['pages'] += 1
+        page = pages.get(name)
+        path = os.path.join(out_dir, name)
+        fresh = page and page.get('refresh_at', now + 1) > now
+        if not full and fresh and os.path.exists(path) and not _is_affected(sort, page, bounds):
+            continue
+        html = render_page(locale, sort, out_dir, assets).encode('utf-8')
+        report['rendered'] += 1
+        digest = hashlib.sha256(html).hexdigest()
+        if not (page and page['sha256'] == digest and os.path.exists(path)):
+            _write_atomic(path, html)
+            report['written'] += 1
+        pages[name] = {'event_id': event_id, 'sha256': digest}
+        if url_lifetime:
+            pages[name]['refresh_at'] = now + url_lifetime / 2
+
+    manifest = {'inputs': inputs, 'event_id': event_id, 'exported_at': time.time(), 'pages': pages}
+    _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=1).encode('utf-8'))
+    return report
+
+def export_locked(out_dir, full=False):
+    """export_catalog() under a file lock, so workers and the CLI take turns"""
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, '.lock'), 'w') as lock_file:
+        try:
+            import fcntl
+        except ImportError:  # not on POSIX: no cross-process lock
+            fcntl = None
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            return export_catalog(out_dir, full=full)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+_pending = threading.Event()
+_worker = None
+_worker_pid = None
+_lock = threading.Lock()
+
+def schedule_export():
+    """Export STATIC_EXPORT_DIR in the background, if configured"""
+    if not current_app.config['STATIC_EXPORT_DIR']:
+        return
+    _ensure_worker(current_app._get_current_object())
+    _pending.set()
+
+def _ensure_worker(app):
+    # Threads don't survive fork, so each gunicorn worker starts its own
+    global _worker, _worker_pid
+    with _lock:
+        if _worker is not None and _worker_pid == os.getpid() and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run, args=(app,), name='static-export', daemon=True)
+        _worker_pid = os.getpid()
+        _worker.start()
+
+def _run(app):
+    while True:
+        _pending.wait()
+        time.sleep(SCHEDULE_DELAY_SECONDS)
+        _pending.clear()
+        with app.app_context():
+            try:
+                report = export_locked(app.config['STATIC_EXPORT_DIR'])
+                app.logger.info(f"Static export: rendered {report['rendered']} of {report['pages']} pages, "
+                                f"wrote {report['written']}")
+            except Exception as e:
+                app.logger.error(f'Static export failed: {e}')
+            finally:
+                db.session.remove()
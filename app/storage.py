@@ -0,0 +1,210 @@
+"""
+Where uploaded images are stored.
+
+Uploads used to be written to and deleted from UPLOAD_FOLDER directly, so
+every node needed the same disk. The admin views, the import, the file
+sweep and media_url() now go through the storage returned by
+get_storage(), picked by STORAGE_BACKEND:
+
+    local   files in UPLOAD_FOLDER, served by the /media route (see
+            app/media.py for the MEDIA_SERVING modes)
+    s3      objects under STORAGE_S3_PREFIX in STORAGE_S3_BUCKET on AWS or
+            any S3-compatible server (MinIO, Ceph, R2, ... via
+            STORAGE_S3_ENDPOINT_URL). Needs the optional boto3 package;
+            credentials come from the usual AWS_* environment variables
+
+Both take a file object and copy it in chunks (S3 as a multipart upload
+for large bodies), so an image is never held twice in memory. A local file
+only appears under its name once complete.
+
+With s3 the browser loads images from the bucket: from
+STORAGE_S3_PUBLIC_URL when the bucket (or a CDN in front of it) is
+public, otherwise from presigned URLs. A presigned URL is reused for half
+its lifetime, so the same image keeps the same URL across page views and
+browsers can cache it. The /media route redirects there, for old links.
+The bucket's origin is added to the Content-Security-Policy's img-src, and
+static export pages are re-rendered before their presigned URLs expire.
+
+The upload GC and backup.py work on UPLOAD_FOLDER only; with s3 use the
+bucket's versioning and lifecycle rules instead.
+"""
+
+import mimetypes
+import os
+import shutil
+import threading
+import time
+from urllib.parse import quote, urlsplit
+
+from flask import current_app, url_for
+
+STORAGE_BACKENDS = ('local', 's3')
+COPY_CHUNK_SIZE = 256 * 1024
+MAX_CACHED_URLS = 10000
+
+class LocalStorage:
+    """Uploads in a folder on this machine"""
+
+    local = True
+    origin = None  # images come from this site
+    url_lifetime = None  # URLs don't expire
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def path(self, filename):
+        return os.path.join(self.folder, filename)
+
+    def save(self, filename, fileobj, content_type=None):
+        """Copy fileobj to filename, replacing any file of that name"""
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(filename)
+        # Hidden while incomplete, so the upload GC and readers skip it
+        partial = os.path.join(self.folder, f'.{filename}.{os.getpid()}.{threading.get_ident()}.partial')
+        try:
+            with open(partial, 'wb') as target:
+                shutil.copyfileobj(fileobj, target, COPY_CHUNK_SIZE)
+            os.replace(partial, path)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+
+    def open(self, filename):
+        """Binary file object for reading; FileNotFoundError if missing"""
+        return open(self.path(filename), 'rb')
+
+    def exists(self, filename):
+        return os.path.isfile(self.path(filename))
+
+    def delete(self, filename):
+        """Remove a file; False if it was already gone"""
+        try:
+            os.remove(self.path(filename))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def url(self, filename):
+        return url_for('main.media', filename=filename)
+
+class S3Storage:
+    """Uploads as objects in an S3-compatible bucket"""
+
+    local = False
+
+    def __init__(self, bucket, prefix='', endpoint_url=None, region=None,
+                 public_url='', url_expires=24 * 3600, max_age=3600):
+        # Imported here rather than at app start: boto3 takes a while to load
+        try:
+            import boto3
+            from botocore.client import Config as BotoConfig
+            from botocore.exceptions import ClientError
+        except ImportError:  # optional: pip install boto3
+            raise RuntimeError('STORAGE_BACKEND=s3 needs boto3 (pip install boto3)')
+        if not bucket:
+            raise ValueError('STORAGE_BACKEND=s3 needs STORAGE_S3_BUCKET')
+        self.bucket = bucket
+        self.prefix = prefix
+        self.public_url = public_url.rstrip('/')
+        self.url_expires = url_expires
+        self.max_age = max_age
+        # Path-style addressing, since MinIO and friends rarely have
+        # bucket subdomains; boto3 clients are safe to share across threads
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=region,
+            config=BotoConfig(signature_version='s3v4',
+                              s3={'addressing_style': 'path' if endpoint_url else 'auto'}),
+        )
+        self._client_error = ClientError
+        self._urls = {}
+        self._urls_lock = threading.Lock()
+        # Where browsers load images from, for the Content-Security-Policy;
+        # signing a URL is a local computation, so this costs no request
+        sample = self.public_url or self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': bucket, 'Key': self.key('x')})
+        parts = urlsplit(sample)
+        self.origin = f'{parts.scheme}://{parts.netloc}'
+        # A URL from url() stays valid at least this long (a cached
+        # presigned URL is handed out for half its lifetime)
+        self.url_lifetime = None if self.public_url else url_expires / 2
+
+    def key(self, filename):
+        return f'{self.prefix}{filename}'
+
+    def save(self, filename, fileobj, content_type=None):
+        """Stream fileobj to the bucket, replacing any object of that name"""
+        self.client.upload_fileobj(fileobj, self.bucket, self.key(filename), ExtraArgs={
+            'ContentType': content_type or mimetypes.guess_type(filename)[0] or 'application/octet-stream',
+            'CacheControl': f'public, max-age={self.max_age}',
+        })
+        with self._urls_lock:
+            self._urls.pop(filename, None)
+
+    def open(self, filename):
+        """Streaming body for reading; FileNotFoundError if missing"""
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self.key(filename))['Body']
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404'):
+                raise FileNotFoundError(filename) from e
+            raise
+
+    def exists(self, filename):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(filename))
+            return True
+        except self._client_error as e:
+            if e.response.get('Error', {}).get('Code') in ('NoSuchKey', '404', 'NotFound'):
+                return False
+            raise
+
+    def delete(self, filename):
+        """Remove an object (S3 doesn't say whether it existed, so always True)"""
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(filename))
+        with self._urls_lock:
+            self._urls.pop(filename, None)
+        return True
+
+    def url(self, filename):
+        if self.public_url:
+            return f'{self.public_url}/{quote(self.key(filename))}'
+        now = time.monotonic()
+        cached = self._urls.get(filename)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        url = self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': self.key(filename)},
+            ExpiresIn=self.url_expires,
+        )
+        with self._urls_lock:
+            if len(self._urls) >= MAX_CACHED_URLS:
+                self._urls.clear()
+            self._urls[filename] = (url, now + self.url_expires / 2)
+        return url
+
+def create_storage(config):
+    """The storage configured by STORAGE_BACKEND"""
+    backend = config['STORAGE_BACKEND']
+    if backend == 's3':
+        return S3Storage(
+            config['STORAGE_S3_BUCKET'],
+            prefix=config['STORAGE_S3_PREFIX'],
+            endpoint_url=config['STORAGE_S3_ENDPOINT_URL'],
+            region=config['STORAGE_S3_REGION'],
+            public_url=config['STORAGE_S3_PUBLIC_URL'],
+            url_expires=config['STORAGE_S3_URL_EXPIRES'],
+            max_age=config['MEDIA_MAX_AGE'],
+        )
+    if backend != 'local':
+        raise ValueError(f"STORAGE_BACKEND must be one of {', '.join(STORAGE_BACKENDS)}")
+    return LocalStorage(config['UPLOAD_FOLDER'])
+
+def get_storage():
+    """This app's storage, created on first use"""
+    storage = current_app.extensions.get('media_storage')
+    if storage is None:
+        storage = current_app.extensions.setdefault('media_storage', create_storage(current_app.config))
+    return storage
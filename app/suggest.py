@@ -0,0 +1,118 @@
+"""
+Search-as-you-type suggestions from an in-memory prefix index.
+
+Each worker process keeps a sorted list of (key, item id) pairs, one key per
+word of every item name, from that word to the end of the name, folded like
+search (app/search.py). So "lamp" completes "Desk lamp" as well as "Lamp
+shade", and "stol" completes "Stöl". A prefix lookup is a
+bisect to the first key at or after the prefix, then a walk forward until
+limit distinct names are found, so it costs O(log n + limit) no matter how
+many items match.
+
+The index is built from the catalog on first use and then kept current with
+the item events of app/events.py: every worker reads the same event table,
+so an item created, renamed or deleted through any worker reaches every
+index without a rebuild. A rebuild only happens when the hub can no longer
+replay the events the index missed, or after a bulk import.
+"""
+
+import json
+import threading
+from bisect import bisect_left, insort
+
+from flask import current_app
+
+from app import db
+from app.events import get_hub
+from app.models import Item
+from app.search import normalize
+
+SUGGEST_LIMIT = 8
+
+def name_keys(name):
+    """One key per word of the name: the folded name from that word on"""
+    words = normalize(name).split()
+    return [' '.join(words[i:]) for i in range(len(words))]
+
+class SuggestIndex:
+    """Per-process prefix index of item names"""
+
+    def __init__(self):
+        self._keys = []  # sorted (key, item_id)
+        self._names = {}  # item_id -> name
+        self._event_id = None  # last item event applied
+        self._generation = None  # of the event hub, see EventHub.generation
+        self._lock = threading.Lock()
+
+    def _add(self, item_id, name):
+        self._names[item_id] = name
+        for key in name_keys(name):
+            insort(self._keys, (key, item_id))
+
+    def _remove(self, item_id):
+        name = self._names.pop(item_id, None)
+        if name is None:
+            return
+        for key in name_keys(name):
+            i = bisect_left(self._keys, (key, item_id))
+            if i < len(self._keys) and self._keys[i] == (key, item_id):
+                del self._keys[i]
+
+    def _rebuild(self, hub):
+        # Take the event id first: events that land during the load are
+        # applied again afterwards, which is harmless
+        event_id, generation = hub.latest_id(), hub.generation()
+        names = dict(db.session.execute(db.select(Item.id, Item.name)).all())
+        self._keys = sorted((key, item_id) for item_id, name in names.items() for key in name_keys(name))
+        self._names = names
+        self._event_id = event_id
+        self._generation = generation
+
+    def _apply(self, kind, payload):
+        if 'id' not in payload:
+            return False  # catalog-wide change (bulk import)
+        if kind == 'removed':
+            self._remove(payload['id'])
+        elif self._names.get(payload['id']) != payload['name']:
+            self._remove(payload['id'])
+            self._add(payload['id'], payload['name'])
+        return True
+
+    def sync(self):
+        """Apply item events recorded since the last sync (rebuild if they are gone)"""
+        hub = get_hub()
+        with self._lock:
+            events = hub.events_since(self._event_id) if self._event_id is not None else None
+            if events is None or hub.generation() != self._generation:
+                self._rebuild(hub)
+                return
+            for event_id, kind, payload in events:
+                if not self._apply(kind, json.loads(payload)):
+                    self._rebuild(hub)
+                    return
+                self._event_id = event_id
+
+    def suggest(self, query, limit=SUGGEST_LIMIT):
+        """Up to limit distinct item names with a word starting with query"""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        results = []
+        with self._lock:
+            keys = self._keys
+            i = bisect_left(keys, (prefix,))
+            while i < len(keys) and len(results) < limit:
+                key, item_id = keys[i]
+                if not key.startswith(prefix):
+                    break
+                name = self._names[item_id]
+                if name not in results:
+                    results.append(name)
+                i += 1
+        return results
+
+def get_suggest_index():
+    """The SuggestIndex of this process for the current app, synced with the catalog"""
+    index = current_app.extensions.setdefault('suggest_index', SuggestIndex())
+    index.sync()
+    return index
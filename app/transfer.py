@@ -0,0 +1,350 @@
+"""
+Bulk export and import of items and their images.
+
+Export streams CSV or JSON lines (optionally bundled with the image files in
+a zip) in keyset-paginated batches of plain rows, so memory stays constant
+whatever the catalog size. Import reads the same formats row by row, inserts
+in chunked transactions, processes images on a thread pool and reports
+progress and per-row errors.
+"""
+
+import csv
+import io
+import json
+import os
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from app import db
+from app.images import STATIC_IMAGES, allowed_file, open_image, save_upload_image
+from app.models import Item, ItemImage
+from app.storage import get_storage
+
+EXPORT_FORMATS = ('csv', 'jsonl', 'zip')
+CSV_FIELDS = ['id', 'name', 'description', 'price', 'is_sold', 'created_at', 'view_count', 'images']
+
+def iter_item_records(batch_size=500):
+    """Yield one dict per item, primary image first, in id order"""
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            db.select(Item.id, Item.name, Item.description, Item.price, Item.is_sold,
+                      Item.created_at, Item.view_count)
+            .where(Item.id > last_id)
+            .order_by(Item.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return
+
+        images = {}
+        for item_id, filename, is_primary in db.session.execute(
+            db.select(ItemImage.item_id, ItemImage.filename, ItemImage.is_primary)
+            .where(ItemImage.item_id.in_([row.id for row in rows]))
+            .order_by(ItemImage.is_primary.desc(), ItemImage.id)
+        ):
+            images.setdefault(item_id, []).append(filename)
+
+        for row in rows:
+            yield {
+                'id': row.id,
+                'name': row.name,
+                'description': row.description or '',
+                'price': row.price,
+                'is_sold': bool(row.is_sold),
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'view_count': row.view_count or 0,
+                'images': images.get(row.id, []),
+            }
+        last_id = rows[-1].id
+
+def export_csv():
+    """Stream the catalog as CSV; images are ';'-separated filenames"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record in iter_item_records():
+        writer.writerow(dict(record, images=';'.join(record['images'])))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def export_jsonl():
+    """Stream the catalog as JSON lines"""
+    for record in iter_item_records():
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+class _StreamSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back to a generator"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+def iter_image_filenames(batch_size=500):
+    """Yield every distinct image filename, in keyset-paginated batches"""
+    last = ''
+    while True:
+        names = db.session.execute(
+            db.select(ItemImage.filename)
+            .where(ItemImage.filename > last)
+            .distinct()
+            .order_by(ItemImage.filename)
+            .limit(batch_size)
+        ).scalars().all()
+        if not names:
+            return
+        yield from names
+        last = names[-1]
+
+def export_zip(chunk_size=64 * 1024):
+    """Stream a zip with items.jsonl and images/<filename> for every image"""
+    sink = _StreamSink()
+    now = datetime.now().timetuple()[:6]
+    with zipfile.ZipFile(sink, 'w') as archive:
+        info = zipfile.ZipInfo('items.jsonl', date_time=now)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        with archive.open(info, 'w') as entry:
+            for record in iter_item_records():
+                entry.write((json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8'))
+                yield sink.drain()
+
+        # Image files are already compressed, so they are stored as-is
+        for filename in iter_image_filenames():
+            try:
+                source = open_image(filename)
+            except FileNotFoundError:
+                continue
+            info = zipfile.ZipInfo(f'images/{filename}', date_time=now)
+            with closing(source), archive.open(info, 'w') as entry:
+                while True:
+                    chunk = source.read(chunk_size)
+                    if not chunk:
+                        break
+                    entry.write(chunk)
+                    yield sink.drain()
+    yield sink.drain()
+
+def export_items(fmt):
+    """Generator of export chunks for the given format"""
+    if fmt == 'csv':
+        return export_csv()
+    if fmt == 'jsonl':
+        return export_jsonl()
+    if fmt == 'zip':
+        return export_zip()
+    raise ValueError(f'Unknown export format: {fmt}')
+
+def read_records(stream, fmt):
+    """Yield (line number, record dict) from a binary CSV or JSON-lines stream"""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        for record in reader:
+            images = record.get('images') or ''
+            record['images'] = [f for f in images.split(';') if f.strip()]
+            yield reader.line_num, record
+    elif fmt == 'jsonl':
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, {'_error': f'Invalid JSON: {e}'}
+    else:
+        raise ValueError(f'Unknown import format: {fmt}')
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in ('1', 'true', 'yes', 'y', 'on')
+
+def _parse_record(record):
+    """Validate a record and return Item column values (raises ValueError)"""
+    if '_error' in record:
+        raise ValueError(record['_error'])
+    name = (record.get('name') or '').strip()
+    if not name:
+        raise ValueError('name is required')
+    try:
+        price = float(record.get('price'))
+    except (TypeError, ValueError):
+        raise ValueError(f"invalid price: {record.get('price')!r}")
+    values = {
+        'name': name[:100],
+        'description': record.get('description') or '',
+        'price': price,
+        'is_sold': _parse_bool(record.get('is_sold')),
+        'view_count': int(record.get('view_count') or 0),
+    }
+    if record.get('created_at'):
+        values['created_at'] = datetime.fromisoformat(str(record['created_at']))
+    return values
+
+def _unique_filename(filename, reserved):
+    """Avoid overwriting existing uploads (or names taken earlier in this import)"""
+    name, ext = os.path.splitext(filename)
+    candidate, n = filename, 1
+    storage = get_storage()
+    while candidate in reserved or storage.exists(candidate):
+        candidate = f'{name}-{n}{ext}'
+        n += 1
+    reserved.add(candidate)
+    return candidate
+
+class ImageSource:
+    """Reads image bytes for import from a zip archive or a directory"""
+
+    def __init__(self, archive=None, directory=None):
+        self.archive = archive
+        self.directory = directory
+
+    def read(self, filename):
+        if self.archive is not None:
+            try:
+                return self.archive.read(f'images/{filename}')
+            except KeyError:
+                return None
+        if self.directory:
+            path = os.path.join(self.directory, os.path.basename(filename))
+            if os.path.isfile(path):
+                with open(path, 'rb') as f:
+                    return f.read()
+        return None
+
+def _process_image(data, filename, storage, max_pixels):
+    return save_upload_image(io.BytesIO(data), filename, storage, max_pixels)
+
+def import_items(records, images=None, chunk_size=200, workers=4, progress=None):
+    """
+    Import (line number, record) pairs in chunked transactions.
+
+    Returns {'rows', 'imported', 'images', 'errors'} where errors is a list of
+    (line number, message). progress(summary) is called after every chunk.
+    """
+    images = images or ImageSource()
+    summary = {'rows': 0, 'imported': 0, 'images': 0, 'errors': []}
+    reserved = set()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        chunk = []
+        for line_number, record in records:
+            chunk.append((line_number, record))
+            if len(chunk) >= chunk_size:
+                _import_chunk(chunk, images, pool, reserved, summary)
+                chunk = []
+                if progress:
+                    progress(summary)
+        if chunk:
+            _import_chunk(chunk, images, pool, reserved, summary)
+            if progress:
+                progress(summary)
+
+    if summary['imported']:
+        # One notice for the live feed rather than an event per imported row
+        from app.events import record_catalog_event
+        record_catalog_event('new', count=summary['imported'])
+        db.session.commit()
+    return summary
+
+def _import_chunk(chunk, images, pool, reserved, summary):
+    """Validate, process images in parallel and insert one chunk in one transaction"""
+    prepared = []
+    futures = []
+    for line_number, record in chunk:
+        summary['rows'] += 1
+        try:
+            values = _parse_record(record)
+        except (ValueError, TypeError) as e:
+            summary['errors'].append((line_number, str(e)))
+            continue
+
+        filenames = []
+        for original in record.get('images') or []:
+            original = secure_filename(str(original).strip())
+            if original in STATIC_IMAGES:
+                filenames.append(original)
+                continue
+            if not allowed_file(original):
+                summary['errors'].append((line_number, f'skipped image {original!r}: file type not allowed'))
+                continue
+            data = images.read(original)
+            if data is None:
+                summary['errors'].append((line_number, f'image {original!r} not found'))
+                continue
+            filename = _unique_filename(original, reserved)
+            # The storage and limit are passed in: pool threads have no app context
+            futures.append((line_number, filename, pool.submit(
+                _process_image, data, filename, get_storage(), current_app.config['MAX_IMAGE_PIXELS'])))
+            filenames.append(filename)
+        prepared.append((line_number, values, filenames))
+
+    failed_images = set()
+    placeholders = {}
+    for line_number, filename, future in futures:
+        try:
+            placeholders[filename] = future.result()
+            summary['images'] += 1
+        except Exception as e:
+            failed_images.add(filename)
+            summary['errors'].append((line_number, f'image {filename!r} could not be processed: {e}'))
+
+    def build(values, filenames):
+        item = Item(**values)
+        for position, filename in enumerate(f for f in filenames if f not in failed_images):
+            item.images.append(ItemImage(filename=filename, is_primary=(position == 0),
+                                         **placeholders[filename]))
+        return item
+
+    try:
+        db.session.add_all(build(values, filenames) for _, values, filenames in prepared)
+        db.session.commit()
+        summary['imported'] += len(prepared)
+        return
+    except Exception:
+        db.session.rollback()
+
+    # Something in the chunk failed to insert: retry row by row to isolate it
+    for line_number, values, filenames in prepared:
+        try:
+            db.session.add(build(values, filenames))
+            db.session.commit()
+            summary['imported'] += 1
+        except Exception as e:
+            db.session.rollback()
+            summary['errors'].append((line_number, f'insert failed: {e}'))
+            for filename in filenames:
+                if filename in STATIC_IMAGES or filename in failed_images:
+                    continue
+                try:
+                    get_storage().delete(filename)
+                except Exception:
+                    pass
+
+def open_import(fileobj, filename, images_dir=None):
+    """Return (records, ImageSource) for an uploaded or local import file"""
+    ext = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if ext == 'zip':
+        archive = zipfile.ZipFile(fileobj)
+        return read_records(archive.open('items.jsonl'), 'jsonl'), ImageSource(archive=archive)
+    if ext in ('csv', 'jsonl'):
+        return read_records(fileobj, ext), ImageSource(directory=images_dir)
+    raise ValueError('Import file must be .csv, .jsonl or .zip')
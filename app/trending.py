@@ -0,0 +1,98 @@
+"""
+Time-decayed "trending" ranking.
+
+An item's trending score is the sum over its views of
+
+    2 ** -(age of the view / TRENDING_HALF_LIFE_HOURS)
+
+Decaying every stored score as time passes would mean rewriting every row.
+Instead each view adds the weight 2 ** ((view time - epoch) / half-life),
+which is the decayed value multiplied by a factor that is the same for all
+items at any moment. The stored score ranks items exactly like the decayed
+one, a batch of views is one UPDATE, and ORDER BY can use the index on
+Item.trending_score.
+
+Weights grow by 2x per half-life, so once they pass 2 ** REBASE_AFTER the
+epoch (SiteSettings.trending_epoch) moves forward by whole half-lives and all
+scores are multiplied by the matching power of two in the same transaction.
+That keeps floats well inside their range, with one UPDATE every few weeks.
+The rebase records a catalog-wide 'rescored' event, so every worker's
+catalog snapshot reloads all scores rather than mixing the two scales.
+"""
+
+import math
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app import db
+from app.models import Item, SiteSettings
+
+# Used until the first rebase stamps SiteSettings.trending_epoch
+DEFAULT_EPOCH = datetime(2025, 1, 1)
+REBASE_AFTER = 64  # half-lives
+
+def _half_life():
+    return timedelta(hours=current_app.config['TRENDING_HALF_LIFE_HOURS'])
+
+def _rebase(settings, epoch, now):
+    """Move the epoch to the last whole half-life before now and rescale scores"""
+    half_lives = math.floor((now - epoch) / _half_life())
+    new_epoch = epoch + half_lives * _half_life()
+    current = (SiteSettings.trending_epoch.is_(None) if settings.trending_epoch is None
+               else SiteSettings.trending_epoch == settings.trending_epoch)
+    moved = db.session.execute(
+        db.update(SiteSettings)
+        .where(SiteSettings.id == settings.id, current)
+        .values(trending_epoch=new_epoch)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if moved:
+        from app.events import record_catalog_event
+
+        db.session.execute(
+            db.update(Item)
+            .where(Item.trending_score > 0)
+            .values(trending_score=Item.trending_score * 2.0 ** -half_lives)
+            .execution_options(synchronize_session=False)
+        )
+        # Every score changed: the other workers' snapshots must reload
+        # them all, not just the items of the next view events
+        record_catalog_event('rescored', half_lives=half_lives)
+    # Another worker may have rebased first; either way use what is stored now
+    db.session.expire(settings, ['trending_epoch'])
+    return settings.trending_epoch
+
+def view_weight(now=None):
+    """Score one view at time now adds (rebasing first if weights got too large)"""
+    now = now or datetime.utcnow()
+    settings = SiteSettings.get_settings()
+    epoch = settings.trending_epoch or DEFAULT_EPOCH
+    if (now - epoch) / _half_life() > REBASE_AFTER:
+        epoch = _rebase(settings, epoch, now)
+    return 2.0 ** ((now - epoch) / _half_life())
+
+def record_views(counts, now=None):
+    """
+    Add views to items in the current transaction (the caller commits).
+
+    counts maps item id to the number of new views. Items with the same
+    count are updated together, so a batch costs one UPDATE per distinct
+    count. view_count and trending_score are incremented in SQL, so
+    concurrent workers don't lose updates.
+    """
+    if not counts:
+        return
+    weight = view_weight(now)
+    by_count = {}
+    for item_id, count in counts.items():
+        if count > 0:
+            by_count.setdefault(count, []).append(item_id)
+    for count, item_ids in by_count.items():
+        db.session.execute(
+            db.update(Item)
+            .where(Item.id.in_(item_ids))
+            .values(view_count=db.func.coalesce(Item.view_count, 0) + count,
+                    trending_score=db.func.coalesce(Item.trending_score, 0.0) + count * weight)
+            .execution_options(synchronize_session=False)
+        )
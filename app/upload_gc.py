@@ -0,0 +1,143 @@
+"""
+Garbage collection of orphaned files in the upload folder.
+
+Files end up orphaned when /admin/upload stores an image that is never
+attached to an item, when a request fails after saving its images, or when
+a deferred removal is lost. The collector walks the upload folder in chunks
+(os.scandir, never the whole listing in memory) and checks each chunk
+against ItemImage.filename and ArchivedItemImage.filename through their
+indexes with one query.
+
+Orphans are not deleted straight away. They are moved to the quarantine
+folder UPLOAD_GC_QUARANTINE_DIR (under instance/, not served like the
+uploads), and only deleted after a grace period. If a quarantined file is
+referenced again in the meantime it is restored. Files
+younger than the minimum age are skipped, because a fresh upload may not
+have its ItemImage row yet.
+"""
+
+import os
+import shutil
+import time
+from itertools import islice
+
+from flask import current_app
+
+from app.file_sweep import referenced_filenames
+from app.images import STATIC_IMAGES
+
+# Where older releases kept the quarantine, inside the (public) upload folder
+LEGACY_QUARANTINE_DIR = '.quarantine'
+
+def _iter_files(directory):
+    """Yield DirEntry objects for regular, non-hidden files in a directory"""
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.is_file(follow_symlinks=False):
+                    continue
+                yield entry
+    except FileNotFoundError:
+        return
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def collect_garbage(chunk_size=500, min_age=None, grace=None, dry_run=False, upload_folder=None):
+    """
+    Quarantine orphaned uploads and delete quarantined files past the grace period.
+
+    min_age and grace are in seconds (defaults from UPLOAD_GC_MIN_AGE_HOURS and
+    UPLOAD_GC_GRACE_DAYS). With dry_run nothing is moved or deleted. Returns a
+    report dict with counts and byte totals.
+    """
+    config = current_app.config
+    upload_folder = upload_folder or config['UPLOAD_FOLDER']
+    quarantine = config['UPLOAD_GC_QUARANTINE_DIR']
+    if min_age is None:
+        min_age = config.get('UPLOAD_GC_MIN_AGE_HOURS', 1) * 3600
+    if grace is None:
+        grace = config.get('UPLOAD_GC_GRACE_DAYS', 7) * 86400
+
+    report = {
+        'scanned': 0, 'referenced': 0, 'too_young': 0,
+        'quarantined': 0, 'quarantined_bytes': 0,
+        'restored': 0, 'deleted': 0, 'reclaimed_bytes': 0,
+        'errors': [],
+    }
+    now = time.time()
+    if not dry_run:
+        os.makedirs(quarantine, exist_ok=True)
+        legacy = os.path.join(upload_folder, LEGACY_QUARANTINE_DIR)
+        for entry in _iter_files(legacy):
+            try:
+                shutil.move(entry.path, os.path.join(quarantine, entry.name))
+            except OSError as e:
+                report['errors'].append(f'{LEGACY_QUARANTINE_DIR}/{entry.name}: {e}')
+
+    # Pass 1: move unreferenced uploads into quarantine
+    for chunk in _chunks(_iter_files(upload_folder), chunk_size):
+        report['scanned'] += len(chunk)
+        candidates = []
+        for entry in chunk:
+            if entry.name in STATIC_IMAGES:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if now - stat.st_mtime < min_age:
+                report['too_young'] += 1
+            else:
+                candidates.append((entry, stat.st_size))
+        if not candidates:
+            continue
+        used = referenced_filenames([entry.name for entry, _ in candidates])
+        for entry, size in candidates:
+            if entry.name in used:
+                report['referenced'] += 1
+                continue
+            report['quarantined'] += 1
+            report['quarantined_bytes'] += size
+            if dry_run:
+                continue
+            try:
+                target = os.path.join(quarantine, entry.name)
+                # Possibly another filesystem, e.g. a separate Docker volume
+                shutil.move(entry.path, target)
+                # The mtime now records when the file entered quarantine
+                os.utime(target)
+            except OSError as e:
+                report['errors'].append(f'{entry.name}: {e}')
+
+    # Pass 2: restore quarantined files that are referenced again, delete expired ones
+    for chunk in _chunks(_iter_files(quarantine), chunk_size):
+        used = referenced_filenames([entry.name for entry in chunk])
+        for entry in chunk:
+            try:
+                restore_to = os.path.join(upload_folder, entry.name)
+                # A newer upload under the same name wins; this copy just expires
+                if entry.name in used and not os.path.exists(restore_to):
+                    if not dry_run:
+                        shutil.move(entry.path, restore_to)
+                    report['restored'] += 1
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if now - stat.st_mtime < grace:
+                    continue
+                if not dry_run:
+                    os.remove(entry.path)
+                report['deleted'] += 1
+                report['reclaimed_bytes'] += stat.st_size
+            except OSError as e:
+                report['errors'].append(f'quarantine/{entry.name}: {e}')
+
+    current_app.logger.info(
+        f"Upload GC{' (dry run)' if dry_run else ''}: scanned {report['scanned']}, "
+        f"quarantined {report['quarantined']} ({report['quarantined_bytes']} bytes), "
+        f"restored {report['restored']}, deleted {report['deleted']} "
+        f"({report['reclaimed_bytes']} bytes reclaimed), {len(report['errors'])} errors"
+    )
+    return report
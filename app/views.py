@@ -0,0 +1,76 @@
+"""
+Item views sent in batches by the gallery.
+
+The browser queues the ids of the items whose gallery was opened and sends
+them together with navigator.sendBeacon, every few seconds and when the
+page is hidden, so a visitor browsing twenty items costs one request and
+one commit instead of twenty.
+
+A view of the same item by the same visitor (client address and user
+agent) within VIEW_DEDUP_SECONDS is counted once. The browser already skips
+repeats it remembers (sessionStorage); RecentViews catches the rest, per
+worker, in memory, with entries dropped once the window has passed.
+"""
+
+import hashlib
+import threading
+import time
+
+from flask import current_app, request
+from flask_limiter.util import get_remote_address
+
+MAX_BATCH = 100
+MAX_ENTRIES = 200_000
+
+def parse_item_ids(data):
+    """Distinct positive item ids from a beacon body ({"item_ids": [...]})"""
+    ids = []
+    values = data.get('item_ids') if isinstance(data, dict) else None
+    for value in (values or [])[:MAX_BATCH]:
+        try:
+            item_id = int(value)
+        except (TypeError, ValueError):
+            continue
+        if item_id > 0 and item_id not in ids:
+            ids.append(item_id)
+    return ids
+
+def visitor_key():
+    """Short digest identifying the visitor of the current request"""
+    visitor = f'{get_remote_address()}|{request.user_agent.string}'
+    return hashlib.blake2b(visitor.encode(), digest_size=8).digest()
+
+class RecentViews:
+    """(visitor, item) pairs seen within the dedup window, oldest first"""
+
+    def __init__(self, max_entries=MAX_ENTRIES):
+        self._seen = {}  # (visitor, item_id) -> time counted
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def _prune(self, now, window):
+        seen = self._seen
+        while seen:
+            key = next(iter(seen))
+            if now - seen[key] < window and len(seen) < self._max_entries:
+                break
+            del seen[key]
+
+    def new_views(self, visitor, item_ids, window):
+        """The ids this visitor has not viewed within window seconds (now recorded)"""
+        now = time.monotonic()
+        fresh = []
+        with self._lock:
+            self._prune(now, window)
+            for item_id in item_ids:
+                key = (visitor, item_id)
+                if key in self._seen:
+                    continue
+                self._seen[key] = now
+                fresh.append(item_id)
+        return fresh
+
+def new_views(item_ids):
+    """Filter item ids viewed by the current visitor down to the ones to count"""
+    recent = current_app.extensions.setdefault('recent_views', RecentViews())
+    return recent.new_views(visitor_key(), item_ids, current_app.config['VIEW_DEDUP_SECONDS'])
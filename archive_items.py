@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Move items sold long ago out of the catalog into the archive tables.
+
+Usage:
+    python archive_items.py                  # items sold ARCHIVE_AFTER_DAYS ago or earlier
+    python archive_items.py --days 90        # ... or a different age
+    python archive_items.py --prune-images   # archived items keep only their primary image
+    python archive_items.py --dry-run        # only count them
+
+Archived items leave the public catalog, its search and the admin
+dashboard; admins find and restore them under /admin/archive, and with
+ARCHIVE_PUBLIC=true visitors can page through them at /sold. The Docker
+entrypoint runs this every ARCHIVE_INTERVAL seconds (default one day) when
+ARCHIVE_AFTER_DAYS is set.
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+
+def main():
+    parser = argparse.ArgumentParser(description='Archive items sold long ago.')
+    parser.add_argument('--days', type=float, help='archive items sold more than this many days ago')
+    parser.add_argument('--prune-images', action='store_true', help='keep only the primary image of archived items')
+    parser.add_argument('--batch-size', type=int, default=500, help='items moved per transaction')
+    parser.add_argument('--dry-run', action='store_true', help='count the items, move nothing')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        days = app.config['ARCHIVE_AFTER_DAYS'] if args.days is None else args.days
+        if days <= 0:
+            print("⚠️  Nothing to do: set ARCHIVE_AFTER_DAYS or pass --days")
+            return args.days is None
+
+        from app.archive import archive_sold_items
+        from app.file_sweep import wait_for_sweep
+        report = archive_sold_items(days, prune_images=args.prune_images,
+                                    batch_size=args.batch_size, dry_run=args.dry_run)
+        # Pruned image files are removed by the sweep thread; let it finish
+        wait_for_sweep()
+
+    if args.dry_run:
+        print(f"🔍 Would archive {report['archived']} items sold more than {days:g} days ago")
+    else:
+        print(f"📦 Archived {report['archived']} items sold more than {days:g} days ago")
+        if args.prune_images:
+            print(f"🧹 Pruned {report['pruned_images']} non-primary images")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
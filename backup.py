@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Back up, verify and restore the database and uploaded images.
+
+Usage:
+    python backup.py                      # back up into BACKUP_DIR (instance/backup)
+    python backup.py /mnt/usb/flea        # ... or another directory
+    python backup.py --verify [DIR]       # check a backup's checksums and database
+    python backup.py --verify --quick     # ... comparing upload sizes only
+    python backup.py --restore [DIR]      # restore it
+
+Backups are safe while the app runs: the database is copied with SQLite's
+online backup API, in steps that don't block writers. Uploads are mirrored
+incrementally; unchanged files are not read again. The Docker entrypoint
+runs a backup every BACKUP_INTERVAL seconds when that is set.
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+def print_verification(report):
+    if report['ok']:
+        print(f"✅ Backup of {report['created_at']} verified: database and {report['files']} uploads")
+        if report.get('missing_images'):
+            print(f"⚠️  {len(report['missing_images'])} images the database references were not in the "
+                  f"upload folder when it was backed up: {', '.join(report['missing_images'][:5])}")
+    else:
+        print("❌ Backup failed verification:")
+        for problem in report['problems'][:20]:
+            print(f"  ⚠️  {problem}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Back up, verify or restore the database and uploads.')
+    parser.add_argument('directory', nargs='?', help='backup directory (default BACKUP_DIR)')
+    action = parser.add_mutually_exclusive_group()
+    action.add_argument('--verify', action='store_true', help='verify a backup instead of making one')
+    action.add_argument('--restore', action='store_true', help='restore a backup')
+    parser.add_argument('--quick', action='store_true', help='with --verify: compare upload sizes, not checksums')
+    parser.add_argument('--yes', action='store_true', help='with --restore: do not ask for confirmation')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        from app.backup import BackupError, create_backup, restore_backup, verify_backup
+        directory = args.directory or app.config['BACKUP_DIR']
+
+        if args.verify:
+            report = verify_backup(directory, quick=args.quick)
+            print_verification(report)
+            return report['ok']
+
+        try:
+            if args.restore:
+                if not args.yes and input(f"Replace the database and uploads with the backup in {directory}? [y/N] ").lower() != 'y':
+                    print("Restore cancelled.")
+                    return False
+                report = restore_backup(directory)
+                print(f"♻️  Restored the backup of {report['created_at']}: database in {report['database_seconds']:.2f} s")
+                print(f"🖼️  {report['restored']} uploads restored ({format_bytes(report['restored_bytes'])}), "
+                      f"{report['unchanged']} already in place")
+                print("🔄 Running workers reload the catalog on their next event poll.")
+                return True
+
+            report = create_backup(directory)
+        except BackupError as e:
+            print(f"❌ {e}")
+            return False
+
+    database = report['database']
+    print(f"💾 Database: {format_bytes(database['size'])} in {report['database_seconds']:.2f} s "
+          f"({report['steps']} steps, {report['restarts']} restarts after concurrent writes)")
+    print(f"🖼️  Uploads: {report['copied']} copied ({format_bytes(report['copied_bytes'])}), "
+          f"{report['unchanged']} unchanged, {report['dropped']} dropped in {report['uploads_seconds']:.2f} s")
+    print(f"📂 Backup in {report['backup_dir']}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measure the per-request overhead of being logged in.
+
+Logs in to a temporary database and requests a small admin page
+(/admin/change-password) over and over in three modes:
+
+    legacy     the previous code: User.query.get() in the user loader, then
+               a UserSession lookup and a last_activity UPDATE + commit on
+               every request
+    uncached   app/identity.py with USER_CACHE_SECONDS=0 and
+               SESSION_ACTIVITY_INTERVAL=0: one joined query and the write
+    cached     the defaults: the identity comes from the per-worker cache
+               and last_activity is written once a minute
+
+and reports the median time per request and the queries it ran. The page
+itself costs the same in each mode, so the differences are the overhead.
+
+Usage:
+    python benchmarks/auth_overhead.py
+    BENCH_REQUESTS=2000 python benchmarks/auth_overhead.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    requests = int(os.environ.get('BENCH_REQUESTS', 500))
+    workdir = tempfile.mkdtemp(prefix='flea-auth-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    import warnings
+    from flask import session
+    from flask_login import current_user
+    from sqlalchemy import event
+    from app import create_app, db, login_manager
+    from app.models import User, UserSession
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench')
+        user.set_password('bench-password')
+        db.session.add(user)
+        db.session.commit()
+        engine = db.engine
+
+    warnings.filterwarnings('ignore', message='The Query.get')
+
+    def legacy_load_user(user_id):
+        return User.query.get(int(user_id))
+
+    def legacy_update_session_activity():
+        if current_user.is_authenticated and 'session_id' in session:
+            user_session = UserSession.query.filter_by(
+                session_id=session['session_id'], user_id=current_user.id, is_active=True).first()
+            if user_session:
+                user_session.last_activity = db.func.now()
+                db.session.commit()
+
+    before_request = app.before_request_funcs[None]
+    hook_index = next(i for i, f in enumerate(before_request) if f.__name__ == 'update_session_activity')
+    current_hook = before_request[hook_index]
+    current_loader = login_manager._user_callback
+
+    def use(mode):
+        legacy = mode == 'legacy'
+        login_manager._user_callback = legacy_load_user if legacy else current_loader
+        before_request[hook_index] = legacy_update_session_activity if legacy else current_hook
+        app.config['USER_CACHE_SECONDS'] = 0 if mode == 'uncached' else 30
+        app.config['SESSION_ACTIVITY_INTERVAL'] = 0 if mode == 'uncached' else 60
+        app.extensions.pop('identity_cache', None)
+
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda conn, cursor, statement, *args: statements.append(statement))
+
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'bench', 'password': 'bench-password'})
+
+    print(f"⏱️  {requests} requests to /admin/change-password, logged in")
+    for mode in ('legacy', 'uncached', 'cached'):
+        use(mode)
+        for _ in range(20):
+            client.get('/admin/change-password')
+        timings = []
+        statements.clear()
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get('/admin/change-password')
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.status_code
+        auth = [s for s in statements if 'user_session' in s or 'FROM user' in s]
+        print(f"   {mode:9} {statistics.median(timings) * 1000:6.2f} ms/request, "
+              f"{len(statements) / requests:4.2f} queries/request "
+              f"({len(auth) / requests:4.2f} for the user and session)")
+
+
+if __name__ == '__main__':
+    main()
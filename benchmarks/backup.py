@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Time backups, verification and restore of a large catalog, and how much
+the backup delays writers.
+
+Seeds a temporary database with N items and the upload folder with F image
+files, then, while a writer thread commits a view count update every few
+milliseconds (as view beacons do), reports:
+
+    writes idle     commit latency of the writer with no backup running
+    full backup     the first backup: database copy and every upload
+    writes during   commit latency of the writer during that backup
+    incremental     a second backup after 10 uploads changed
+    verify          verify_backup(), hashing everything / sizes only
+    restore         restore_backup() over a database and 10 missing uploads
+
+Usage:
+    python benchmarks/backup.py
+    BENCH_ITEMS=200000 BENCH_FILES=2000 python benchmarks/backup.py
+"""
+
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Writer(threading.Thread):
+    """Commits small updates on its own connection, timing each commit"""
+
+    def __init__(self, path, count):
+        super().__init__(daemon=True)
+        self.path, self.count = path, count
+        self.latencies = []
+        self.running = threading.Event()
+        self.stopped = threading.Event()
+
+    def run(self):
+        connection = sqlite3.connect(self.path, timeout=30)
+        n = 0
+        while not self.stopped.is_set():
+            if not self.running.wait(0.05):
+                continue
+            start = time.perf_counter()
+            connection.execute('UPDATE item SET view_count = view_count + 1 WHERE id = ?', (n % self.count + 1,))
+            connection.commit()
+            self.latencies.append(time.perf_counter() - start)
+            n += 1
+            time.sleep(0.002)
+        connection.close()
+
+    def measure(self, fn=None, seconds=1.0):
+        """Writer latencies (ms) while fn runs (or for some seconds)"""
+        self.latencies = []
+        self.running.set()
+        result = fn() if fn else time.sleep(seconds)
+        self.running.clear()
+        time.sleep(0.01)
+        latencies = sorted(self.latencies)
+        return result, latencies
+
+
+def describe(latencies):
+    if not latencies:
+        return 'no writes'
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (f"{len(latencies)} commits, median {statistics.median(latencies) * 1000:.2f} ms, "
+            f"p99 {p99 * 1000:.2f} ms, max {latencies[-1] * 1000:.2f} ms")
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 50000))
+    files = int(os.environ.get('BENCH_FILES', 500))
+    workdir = tempfile.mkdtemp(prefix='flea-backup-')
+    database = os.path.join(workdir, 'bench.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{database}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.backup import create_backup, restore_backup, verify_backup
+    from app.models import Item
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    uploads = os.path.join(workdir, 'uploads')
+    backup_dir = os.path.join(workdir, 'backup')
+    app.config['UPLOAD_FOLDER'] = uploads
+    os.makedirs(uploads)
+    for i in range(files):
+        with open(os.path.join(uploads, f'image-{i}.jpg'), 'wb') as f:
+            f.write(os.urandom(64 * 1024))
+    with app.app_context():
+        db.create_all()
+        for start in range(0, count, 10000):
+            db.session.execute(db.insert(Item), [{'name': f'Item {i}', 'description': 'Fint skick. ' * 20,
+                                                  'price': i % 900} for i in range(start, min(count, start + 10000))])
+        db.session.commit()
+        db.session.execute(db.text('PRAGMA wal_checkpoint(TRUNCATE)'))
+    size = os.path.getsize(database) / 1024 / 1024
+
+    writer = Writer(database, count)
+    writer.start()
+    print(f"⏱️  {count} items ({size:.0f} MB database), {files} uploads of 64 KB")
+    _, idle = writer.measure(seconds=1.0)
+    print(f"   writes idle    {describe(idle)}")
+
+    with app.app_context():
+        start = time.perf_counter()
+        report, during = writer.measure(lambda: create_backup(backup_dir))
+        print(f"   full backup    {time.perf_counter() - start:6.2f} s (database {report['database_seconds']:.2f} s, "
+              f"{report['steps']} steps, {report['restarts']} restarts; uploads {report['uploads_seconds']:.2f} s)")
+        print(f"   writes during  {describe(during)}")
+
+        for i in range(10):
+            with open(os.path.join(uploads, f'image-{i}.jpg'), 'ab') as f:
+                f.write(b'changed')
+        start = time.perf_counter()
+        report, during = writer.measure(lambda: create_backup(backup_dir))
+        print(f"   incremental    {time.perf_counter() - start:6.2f} s ({report['copied']} uploads copied, "
+              f"{report['unchanged']} unchanged)")
+        writer.stopped.set()
+        writer.join()
+
+        for quick in (False, True):
+            start = time.perf_counter()
+            assert verify_backup(backup_dir, quick=quick)['ok']
+            print(f"   verify{' quick' if quick else '      '}   {time.perf_counter() - start:6.2f} s")
+
+        for i in range(10):
+            os.remove(os.path.join(uploads, f'image-{i}.jpg'))
+        start = time.perf_counter()
+        report = restore_backup(backup_dir)
+        print(f"   restore        {time.perf_counter() - start:6.2f} s (database {report['database_seconds']:.2f} s, "
+              f"{report['restored']} uploads restored)")
+
+
+if __name__ == '__main__':
+    main()
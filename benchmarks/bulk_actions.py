@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Compare per-item dashboard actions with the bulk action endpoint.
+
+Seeds a temporary database with N items (one image file each), then marks
+them all as sold and deletes them twice: once item by item through
+edit_item/delete_item, as the dashboard used to require, and once with a
+single POST to /admin/items/bulk.
+
+Usage:
+    python benchmarks/bulk_actions.py
+    BENCH_ITEMS=1000 python benchmarks/bulk_actions.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed(app, count, upload_folder):
+    from app import db
+    from app.models import Item, ItemImage
+
+    with app.app_context():
+        items = [Item(name=f'Bench item {i}', description='', price=100) for i in range(count)]
+        db.session.add_all(items)
+        db.session.flush()
+        for item in items:
+            filename = f'bench-{item.id}.jpg'
+            with open(os.path.join(upload_folder, filename), 'wb') as f:
+                f.write(b'\xff\xd8' + os.urandom(2048))
+            db.session.add(ItemImage(item_id=item.id, filename=filename, is_primary=True))
+        db.session.commit()
+        return [item.id for item in items]
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    requests = func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:28} {requests:5} request(s) {elapsed * 1000:9.1f} ms")
+    return elapsed
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 200))
+    workdir = tempfile.mkdtemp(prefix='flea-bulk-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.file_sweep import wait_for_sweep
+    from app.models import User
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = workdir
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench')
+        user.set_password('bench')
+        db.session.add(user)
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'bench', 'password': 'bench'})
+
+    print(f"⏱️  Marking {count} items sold, then deleting them")
+
+    ids = seed(app, count, workdir)
+
+    def mark_one_by_one():
+        for item_id in ids:
+            client.post(f'/admin/item/{item_id}/edit',
+                        data={'name': f'Bench item {item_id}', 'description': '', 'price': '100', 'is_sold': 'on'})
+        return len(ids)
+
+    def delete_one_by_one():
+        for item_id in ids:
+            client.post(f'/admin/item/{item_id}/delete')
+        wait_for_sweep()
+        return len(ids)
+
+    per_item = timed('edit_item (mark sold)', mark_one_by_one)
+    per_item += timed('delete_item', delete_one_by_one)
+
+    ids = seed(app, count, workdir)
+    form_ids = [str(item_id) for item_id in ids]
+
+    def bulk(action):
+        def run():
+            client.post('/admin/items/bulk', data={'action': action, 'item_ids': form_ids})
+            return 1
+        return run
+
+    bulk_total = timed('bulk mark_sold', bulk('mark_sold'))
+    bulk_total += timed('bulk delete', bulk('delete'))
+    start = time.perf_counter()
+    wait_for_sweep()
+    print(f"   {'background file sweep':28} {'':17} {(time.perf_counter() - start) * 1000:9.1f} ms (after the response)")
+
+    leftover = [f for f in os.listdir(workdir) if f.startswith('bench-')]
+    print(f"   Per-item total {per_item * 1000:.0f} ms, bulk total {bulk_total * 1000:.0f} ms "
+          f"({per_item / bulk_total:.0f}x); image files left behind: {len(leftover)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Measure the catalog filters and facet counts.
+
+Seeds a temporary database with N items (a third of them sold, prices
+spread over 0-2000), then times:
+
+    filter query    available_only + a price range, through the indexes
+    facets (cold)   the single aggregate query behind the facet counts
+    facets (cached) the same counts from the per-worker cache
+    facets (views)  after a view was recorded, which keeps the cache valid
+
+Usage:
+    python benchmarks/catalog_filters.py
+    BENCH_ITEMS=200000 python benchmarks/catalog_filters.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def median_ms(func, repeat=20):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 100000))
+    workdir = tempfile.mkdtemp(prefix='flea-facets-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.facets import FacetCache, facet_counts, filter_conditions, parse_filters
+    from app.models import Item
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    rnd = random.Random(3)
+    with app.app_context():
+        db.create_all()
+        for start in range(0, count, 10000):
+            db.session.execute(db.insert(Item), [
+                {'name': f'Item {i}', 'price': round(rnd.uniform(0, 2000)), 'is_sold': rnd.random() < 0.33}
+                for i in range(start, min(count, start + 10000))
+            ])
+        db.session.commit()
+
+    filters = parse_filters({'available_only': '1', 'price_min': '100', 'price_max': '250'})
+    print(f"⏱️  {count} items, available_only with a 100-250 price range")
+    with app.test_request_context('/'):
+        from app.events import get_hub
+        from app.trending import record_views
+
+        query = Item.query.filter(*filter_conditions(filters)).order_by(Item.price)
+        hits = query.count()
+        print(f"   filter query:     {median_ms(query.all):7.2f} ms ({hits} items)")
+
+        def cold():
+            app.extensions['facet_cache'] = FacetCache()
+            facet_counts('', filters)
+
+        print(f"   facets (cold):    {median_ms(cold):7.2f} ms (one aggregate query)")
+        facet_counts('', filters)
+        print(f"   facets (cached):  {median_ms(lambda: facet_counts('', filters)) * 1000:7.1f} µs")
+
+        from app.events import record_item_events
+        record_views({1: 1})
+        record_item_events('views', [1])
+        db.session.commit()
+        get_hub().refresh(force=True)
+        print(f"   after a view:     {median_ms(lambda: facet_counts('', filters)) * 1000:7.1f} µs (cache still valid)")
+
+
+if __name__ == '__main__':
+    main()
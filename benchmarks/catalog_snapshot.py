@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Measure the per-worker catalog snapshot against loading ORM objects.
+
+Seeds a temporary database with N items (one image each), then reports:
+
+    memory    tracemalloc of the snapshot (records plus all seven
+              orderings) and of the same items loaded as ORM Item and
+              ItemImage objects, per 10,000 items
+    latency   getting the sorted, filtered card list for a page: the ORM
+              query the catalog used to run vs the snapshot, and the
+              incremental sync after one item changed
+
+Usage:
+    python benchmarks/catalog_snapshot.py
+    BENCH_ITEMS=50000 python benchmarks/catalog_snapshot.py
+"""
+
+import gc
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def median_ms(func, repeat=10):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def traced_kb(func):
+    """Memory still allocated by what func returns, in KB"""
+    gc.collect()
+    tracemalloc.start()
+    result = func()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size / 1024
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 10000))
+    workdir = tempfile.mkdtemp(prefix='flea-catalog-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from sqlalchemy.orm import selectinload
+    from app import create_app, db
+    from app.catalog import ORDERINGS, CatalogSnapshot
+    from app.models import Item, ItemImage
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    rnd = random.Random(5)
+    with app.app_context():
+        db.create_all()
+        items = [Item(name=f'Bench item {i}', description='Fint skick, hämtas i Göteborg. ' * 2,
+                      price=rnd.randint(10, 2000), is_sold=rnd.random() < 0.3) for i in range(count)]
+        db.session.add_all(items)
+        db.session.flush()
+        db.session.add_all(ItemImage(item_id=item.id, filename=f'bench-{item.id}.jpg', is_primary=True)
+                           for item in items)
+        db.session.commit()
+
+    per_10k = 10000 / count
+    print(f"⏱️  {count} items")
+    with app.test_request_context('/'):
+        def build_snapshot():
+            snapshot = CatalogSnapshot()
+            snapshot.sync()
+            for sort in ORDERINGS:
+                snapshot.ordered(sort)
+            return snapshot
+
+        snapshot, snapshot_kb = traced_kb(build_snapshot)
+        db.session.remove()
+
+        def load_orm():
+            return Item.query.options(selectinload(Item.images)).all()
+
+        loaded, orm_kb = traced_kb(load_orm)
+        del loaded
+        db.session.remove()
+        print(f"   memory per 10k items: snapshot {snapshot_kb * per_10k / 1024:.1f} MB "
+              f"(records + {len(ORDERINGS)} orderings), ORM objects {orm_kb * per_10k / 1024:.1f} MB")
+
+        def orm_page():
+            result = (Item.query.options(selectinload(Item.images))
+                      .filter(Item.is_sold.is_(False), Item.price <= 1000)
+                      .order_by(Item.price.asc()).all())
+            db.session.remove()
+            return result
+
+        filters = {'price_min': None, 'price_max': 1000.0, 'available_only': True}
+        orm = median_ms(orm_page)
+        memory = median_ms(lambda: snapshot.items('price_low', (), filters))
+        print(f"   available, up to 1000, price_low: ORM {orm:.1f} ms, snapshot {memory:.1f} ms")
+
+        from app.events import get_hub, record_item_event
+        item = db.session.get(Item, count // 2)
+        item.price = 1
+        record_item_event('price', item)
+        db.session.commit()
+        get_hub().refresh(force=True)
+        start = time.perf_counter()
+        snapshot.sync()
+        synced = time.perf_counter() - start
+        start = time.perf_counter()
+        snapshot.ordered('price_low')
+        resorted = time.perf_counter() - start
+        print(f"   one item changed: sync {synced * 1000:.2f} ms, re-sort of an ordering {resorted * 1000:.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
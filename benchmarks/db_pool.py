@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Exercise the database connection pool under concurrency.
+
+Runs the same read/write mix from many threads against whatever DATABASE_URL
+points to, then forks a child process to confirm that connections created in
+the parent are not reused after the fork (the gunicorn --preload case).
+
+Usage:
+    python benchmarks/db_pool.py                      # temporary SQLite file
+    DATABASE_URL=postgresql://user:pw@localhost/flea \\
+        DB_POOL_SIZE=5 DB_MAX_OVERFLOW=5 python benchmarks/db_pool.py
+
+Options (environment):
+    BENCH_THREADS   concurrent threads (default 16)
+    BENCH_QUERIES   queries per thread (default 200)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get('DATABASE_URL'):
+    _tmpdir = tempfile.mkdtemp(prefix='flea-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from app import create_app, db
+
+
+def run_threads(app, threads, queries):
+    """Run a mixed read/write workload from several threads"""
+    from app.models import Item
+    errors = []
+
+    def worker(n):
+        try:
+            with app.app_context():
+                for i in range(queries):
+                    if i % 10 == 0:
+                        item = db.session.get(Item, 1)
+                        item.view_count += 1
+                        db.session.commit()
+                    else:
+                        Item.query.filter(Item.price >= n).count()
+                db.session.remove()
+        except Exception as e:
+            errors.append(e)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    start = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return time.perf_counter() - start, errors
+
+
+def tag_connections(app):
+    """Give every new DB connection a token naming the process that opened it.
+
+    The token lives in the pool's per-connection info, for as long as the
+    DB-API connection; id() of a connection could be reused by another.
+    """
+    from sqlalchemy import event
+
+    def tag(dbapi_connection, connection_record):
+        connection_record.info['bench_token'] = (os.getpid(), uuid.uuid4().hex)
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', tag)
+
+
+def check_fork(app):
+    """Verify a forked child does not inherit the parent's pooled connections"""
+    if not hasattr(os, 'fork'):
+        print("⚠️  os.fork not available, skipping fork check")
+        return True
+
+    with app.app_context():
+        parent_conn = db.engine.raw_connection()
+        parent_conn.close()  # back into the pool
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = b'1'
+        try:
+            with app.app_context():
+                child_conn = db.engine.raw_connection()
+                if child_conn.info.get('bench_token', (None,))[0] != os.getpid():
+                    status = b'0'
+                child_conn.close()
+        finally:
+            os.write(write_fd, status)
+            os._exit(0)
+
+    os.close(write_fd)
+    result = os.read(read_fd, 1)
+    os.waitpid(pid, 0)
+    return result == b'1'
+
+
+def main():
+    threads = int(os.environ.get('BENCH_THREADS', 16))
+    queries = int(os.environ.get('BENCH_QUERIES', 200))
+
+    app = create_app()
+    app.testing = True
+    tag_connections(app)
+    with app.app_context():
+        from app.models import Item
+        db.create_all()
+        if db.session.get(Item, 1) is None:
+            db.session.add(Item(id=1, name='Bench item', price=10.0))
+            db.session.commit()
+        print(f"🗄️  Database: {db.engine.url.render_as_string(hide_password=True)}")
+        print(f"⚙️  Engine options: {app.config['SQLALCHEMY_ENGINE_OPTIONS']}")
+
+    elapsed, errors = run_threads(app, threads, queries)
+    total = threads * queries
+    print(f"🧵 {threads} threads x {queries} queries: {elapsed:.2f}s "
+          f"({total / elapsed:.0f} queries/s)")
+    with app.app_context():
+        print(f"📊 Pool: {db.engine.pool.status()}")
+
+    if errors:
+        print(f"❌ {len(errors)} thread(s) failed, first error: {errors[0]}")
+    else:
+        print("✅ No pool errors under concurrency")
+
+    if check_fork(app):
+        print("✅ Forked child opened its own connection")
+    else:
+        print("❌ Forked child reused the parent's connection")
+        return False
+    return not errors
+
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
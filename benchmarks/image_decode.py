@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Measure peak memory and time of the upload image pipeline.
+
+For 12, 24 and 48 MP JPEGs (EXIF-rotated, like phone photos) it runs, each
+in a fresh interpreter so peak RSS is not shared between runs. 'before' is
+the RSS with the app imported and the file read, before decoding starts:
+
+    full decode   Image.open + exif_transpose + thumbnail (previous pipeline)
+    draft decode  app.images.save_upload_image (JPEG draft + pixel budget)
+
+Usage:
+    python benchmarks/image_decode.py
+    BENCH_RUNS=5 python benchmarks/image_decode.py
+"""
+
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIZES = {12: (4000, 3000), 24: (5656, 4242), 48: (8000, 6000)}
+
+
+def make_photo(path, size):
+    """A gradient with a noisy patch, rotated via EXIF orientation 6"""
+    from PIL import Image
+    width, height = size
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    image.paste(Image.effect_noise((width // 4, height // 4), 60).convert('RGB'), (width // 8, height // 8))
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    image.save(path, 'JPEG', quality=90, exif=exif)
+
+
+def peak_rss_mb():
+    """Peak RSS of this process (VmHWM; ru_maxrss can carry the parent's peak over exec)"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(pipeline, source):
+    """Run in a fresh interpreter: process one image, print time and peak RSS"""
+    import time
+    sys.path.insert(0, REPO_ROOT)
+    from PIL import Image, ImageOps
+    from app.images import MAX_IMAGE_SIZE, save_upload_image
+    from app.storage import LocalStorage
+
+    with open(source, 'rb') as f:
+        data = f.read()
+    target = os.path.join(tempfile.mkdtemp(), 'out.jpg')
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    if pipeline == 'full':
+        image = ImageOps.exif_transpose(Image.open(io.BytesIO(data)))
+        image.thumbnail(MAX_IMAGE_SIZE, Image.Resampling.LANCZOS)
+        image.save(target, optimize=True, quality=85)
+    else:
+        save_upload_image(io.BytesIO(data), os.path.basename(target),
+                          LocalStorage(os.path.dirname(target)), max_pixels=10 ** 9)
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({'seconds': elapsed, 'rss_mb': peak_rss_mb(), 'baseline_mb': baseline}))
+
+
+def main():
+    runs = int(os.environ.get('BENCH_RUNS', 3))
+    workdir = tempfile.mkdtemp(prefix='flea-images-')
+
+    print(f"⏱️  Upload image pipeline (median of {runs} runs, one process per run)")
+    print(f"   {'image':8} {'pipeline':14} {'peak RSS':>10} {'before':>10} {'time':>10} {'per MP':>10}")
+    for megapixels, size in SIZES.items():
+        source = os.path.join(workdir, f'{megapixels}mp.jpg')
+        make_photo(source, size)
+        for pipeline, label in (('full', 'full decode'), ('draft', 'draft decode')):
+            results = []
+            for _ in range(runs):
+                output = subprocess.run([sys.executable, __file__, '--child', pipeline, source],
+                                        check=True, capture_output=True, text=True).stdout
+                results.append(json.loads(output.strip().splitlines()[-1]))
+            seconds = statistics.median(r['seconds'] for r in results)
+            rss = statistics.median(r['rss_mb'] for r in results)
+            baseline = statistics.median(r['baseline_mb'] for r in results)
+            print(f"   {megapixels:>2} MP    {label:14} {rss:7.0f} MB {baseline:7.0f} MB {seconds * 1000:7.0f} ms "
+                  f"{seconds * 1000 / megapixels:7.1f} ms")
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Measure how long gunicorn workers are held while slow clients load the gallery.
+
+For each mode a real gunicorn server (sync workers) is started. Slow clients
+download every image of a gallery at a throttled rate, like phones on a weak
+connection, while a fast client requests a small page in a loop. Reported:
+
+    worker time     per image request, from the gunicorn access log (%(D)s):
+                    how long a worker was busy with that request
+    page latency    of the fast client, which waits whenever every worker
+                    is stuck sending images
+
+Modes:
+    static    the previous /static/uploads/<file> URLs (Flask static route)
+    app       /media/<file> with MEDIA_SERVING=app (sendfile via file_wrapper)
+    x-accel   /media/<file> with MEDIA_SERVING=x-accel; the body would come
+              from nginx, so clients get headers only
+
+Usage:
+    python benchmarks/media_serving.py
+    BENCH_CLIENTS=8 BENCH_RATE_KB=64 python benchmarks/media_serving.py
+
+Options (environment):
+    BENCH_MODES     comma separated modes (default static,app,x-accel)
+    BENCH_WORKERS   gunicorn workers (default 2)
+    BENCH_CLIENTS   concurrent slow gallery clients (default 4)
+    BENCH_IMAGES    images in the gallery (default 6)
+    BENCH_RATE_KB   download rate of a slow client in KB/s (default 128)
+    BENCH_SNDBUF_KB server socket send buffer in KB (default 16)
+"""
+
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+UPLOADS_DIR = os.path.join(REPO_ROOT, 'app', 'static', 'uploads')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def make_gallery(count):
+    """Write gallery images (800x600, like processed uploads) into the upload folder"""
+    from PIL import Image
+    filenames = []
+    for i in range(count):
+        filename = f'bench-media-{i}.jpg'
+        Image.effect_noise((800, 600), 80 + i).convert('RGB').save(
+            os.path.join(UPLOADS_DIR, filename), 'JPEG', quality=95)
+        filenames.append(filename)
+    return filenames
+
+
+BENCH_GUNICORN_CONF = """
+exec(open({conf!r}).read())
+
+def post_worker_init(worker):
+    # Loopback sockets buffer megabytes, hiding slow clients. Cap the send
+    # buffer of accepted connections, like the small window of a slow link.
+    import socket
+    handle = worker.handle
+
+    def handle_with_small_sndbuf(listener, client, addr):
+        client.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, {sndbuf})
+        return handle(listener, client, addr)
+
+    worker.handle = handle_with_small_sndbuf
+"""
+
+
+def start_server(mode, port, workdir, workers, access_log, sndbuf):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'MEDIA_SERVING': 'app' if mode == 'static' else mode,
+        'SERVING_PROFILE': 'sync',
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'RATELIMIT_ENABLED': 'false',
+        'FLASK_ENV': 'production',
+        'PYTHONPATH': REPO_ROOT,
+    })
+    conf = os.path.join(workdir, 'gunicorn.bench.conf.py')
+    with open(conf, 'w') as f:
+        f.write(BENCH_GUNICORN_CONF.format(conf=os.path.join(REPO_ROOT, 'gunicorn.conf.py'), sndbuf=sndbuf))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', conf,
+         '--access-logfile', access_log, '--access-logformat', '%(U)s %(D)s', 'run:app'],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/language-status')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f'gunicorn ({mode}) did not start')
+
+
+def slow_download(port, path, rate):
+    """GET a path with a small receive buffer, reading at most rate bytes/s"""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.settimeout(120)
+    sock.connect(('127.0.0.1', port))
+    sock.sendall(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n'.encode())
+    received = 0
+    chunk = max(1024, rate // 20)
+    while True:
+        data = sock.recv(chunk)
+        if not data:
+            break
+        received += len(data)
+        time.sleep(len(data) / rate)
+    sock.close()
+    return received
+
+
+def slow_client(port, paths, rate, totals):
+    for path in paths:
+        totals.append(slow_download(port, path, rate))
+
+
+def fast_client(port, stop, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        conn.request('GET', '/language-status')
+        conn.getresponse().read()
+        conn.close()
+        latencies.append(time.perf_counter() - start)
+        time.sleep(0.05)
+
+
+def run_mode(mode, settings, filenames, workdir):
+    port = free_port()
+    access_log = os.path.join(workdir, f'access-{mode}.log')
+    proc = start_server(mode, port, workdir, settings['workers'], access_log, settings['sndbuf'])
+    prefix = '/static/uploads/' if mode == 'static' else '/media/'
+    paths = [prefix + name for name in filenames]
+    try:
+        totals, latencies = [], []
+        stop = threading.Event()
+        fast = threading.Thread(target=fast_client, args=(port, stop, latencies))
+        clients = [threading.Thread(target=slow_client, args=(port, paths, settings['rate'], totals))
+                   for _ in range(settings['clients'])]
+        start = time.perf_counter()
+        fast.start()
+        for t in clients:
+            t.start()
+        for t in clients:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        fast.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    busy = []
+    with open(access_log) as f:
+        for line in f:
+            path, micros = line.split()
+            if path.startswith(prefix):
+                busy.append(int(micros) / 1e6)
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"\n🖼️  {mode}")
+    print(f"   gallery: {len(totals)} images, {sum(totals) // 1024} KB to clients in {elapsed:.1f}s")
+    print(f"   worker time per image: median {statistics.median(busy) * 1000:.0f} ms, "
+          f"max {max(busy) * 1000:.0f} ms, total {sum(busy):.1f} worker-seconds")
+    print(f"   page latency: p50 {statistics.median(latencies) * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms")
+
+
+def main():
+    settings = {
+        'workers': int(os.environ.get('BENCH_WORKERS', 2)),
+        'clients': int(os.environ.get('BENCH_CLIENTS', 4)),
+        'images': int(os.environ.get('BENCH_IMAGES', 6)),
+        'rate': int(os.environ.get('BENCH_RATE_KB', 128)) * 1024,
+        'sndbuf': int(os.environ.get('BENCH_SNDBUF_KB', 16)) * 1024,
+    }
+    modes = os.environ.get('BENCH_MODES', 'static,app,x-accel').split(',')
+
+    workdir = tempfile.mkdtemp(prefix='flea-media-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, REPO_ROOT)
+    from app import create_app, db
+    with create_app().app_context():
+        db.create_all()
+
+    filenames = make_gallery(settings['images'])
+    size = sum(os.path.getsize(os.path.join(UPLOADS_DIR, name)) for name in filenames)
+    print(f"⚙️  {settings['workers']} sync workers ({settings['sndbuf'] // 1024} KB send buffer), "
+          f"{settings['clients']} slow clients at {settings['rate'] // 1024} KB/s, gallery of {len(filenames)} images ({size // 1024} KB)")
+    try:
+        for mode in modes:
+            run_mode(mode.strip(), settings, filenames, workdir)
+    finally:
+        for name in filenames:
+            os.remove(os.path.join(UPLOADS_DIR, name))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure streamed rendering and compression of the catalog page.
+
+Seeds a temporary database with N items, then for each catalog size
+reports for GET /:
+
+    rendered      the whole page rendered before sending (render_template,
+                  as the view used to)
+    first byte    time to the first chunk of the streamed page
+    total         time to the last chunk
+    size          bytes sent without and with gzip (brotli if installed)
+
+Usage:
+    python benchmarks/page_streaming.py
+    BENCH_SIZES=500,5000 python benchmarks/page_streaming.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    sizes = [int(n) for n in os.environ.get('BENCH_SIZES', '100,1000,5000').split(',')]
+    workdir = tempfile.mkdtemp(prefix='flea-stream-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from flask import render_template
+    from app import create_app, db
+    from app.events import record_catalog_event
+    from app.models import Item
+    from app.responses import brotli
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+    client = app.test_client()
+    encoding = 'br' if brotli else 'gzip'
+
+    print(f"⏱️  GET / (median of 5), compressed with {encoding}")
+    print(f"   {'items':>6} {'rendered':>10} {'first byte':>11} {'total':>9} {'size':>10} {encoding:>9}")
+    seeded = 0
+    for count in sizes:
+        with app.app_context():
+            db.session.execute(db.insert(Item), [{'name': f'Item {i}', 'description': 'Fint skick. ' * 5,
+                                                  'price': i % 900} for i in range(seeded, count)])
+            record_catalog_event('new')  # so the catalog snapshot reloads
+            db.session.commit()
+        seeded = count
+        client.get('/')  # warm the catalog snapshot
+
+        rendered, first, total = [], [], []
+        for _ in range(5):
+            with app.test_request_context('/'):
+                view = app.view_functions['main.index']
+                start = time.perf_counter()
+                # What the view used to return: the whole page as one string
+                response = app.make_response(view())
+                ''.join(chunk for chunk in response.response)
+                rendered.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            response = client.get('/', buffered=False)
+            chunks = iter(response.response)
+            body = next(chunks)
+            first.append(time.perf_counter() - start)
+            body += b''.join(chunks)
+            total.append(time.perf_counter() - start)
+            response.close()
+        compressed = client.get('/', headers={'Accept-Encoding': encoding}).get_data()
+        print(f"   {count:>6} {statistics.median(rendered) * 1000:>8.1f}ms "
+              f"{statistics.median(first) * 1000:>9.1f}ms {statistics.median(total) * 1000:>7.1f}ms "
+              f"{len(body) / 1024:>8.0f}KB {len(compressed) / 1024:>7.0f}KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Compare the old ilike search with the folded, trigram-indexed search.
+
+Seeds a temporary SQLite database with N items whose names and descriptions
+are drawn from a 20,000 word vocabulary with Swedish, Czech and Slovak
+letters, builds the search index (search_text + item_trigram) the way the
+schema migration does, then runs the same queries three ways:
+
+    ilike     the previous filter: name/description ILIKE '%query%'
+    folded    app.search.search_condition (trigram candidates + LIKE)
+    fuzzy     app.search.fuzzy_matches, used when nothing matches exactly
+
+For each query the number of hits and the median time are printed. Queries
+are typed the way buyers type them: without accents, in lower case or with
+a typo.
+
+Usage:
+    python benchmarks/search_folding.py
+    BENCH_ITEMS=20000 python benchmarks/search_folding.py
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SYLLABLES = ['st', 'öl', 'ko', 'ší', 'k', 'ža', 'lu', 'př', 'ín', 'ka', 'bo', 'rd', 'är', 'ny',
+             'če', 'ro', 'vá', 'za', 'må', 'la', 'ře', 'mo', 'dý', 'pe', 'ťo', 'hy', 'll', 'ä']
+
+
+def vocabulary(rnd, size):
+    """Random words with Swedish/Czech/Slovak letters; the first few are the searched ones"""
+    words = ['stöl', 'košík', 'židle', 'dřevěný', 'čajník', 'červená', 'lampa', 'koberec']
+    while len(words) < size:
+        words.append(''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return words
+
+
+# Typed without accents, in upper case, with a missing letter, or not present
+QUERIES = ['stol', 'kosik', 'KOSIK', 'zidle', 'drevene', 'cajnik', 'cervena lampa', 'koberc', 'xyzzy']
+
+
+def median_ms(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000, result
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 100000))
+    repeat = int(os.environ.get('BENCH_REPEAT', 5))
+    workdir = tempfile.mkdtemp(prefix='flea-search-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.models import Item, ItemTrigram
+    from app.search import fuzzy_matches, rebuild_search_index, search_condition
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    rnd = random.Random(7)
+    words = vocabulary(rnd, 20000)
+
+    with app.app_context():
+        db.create_all()
+        for start in range(0, count, 10000):
+            db.session.execute(db.insert(Item), [
+                {'name': ' '.join(rnd.choices(words, k=rnd.randint(1, 3))).capitalize(),
+                 'description': ' '.join(rnd.choices(words, k=rnd.randint(3, 12))),
+                 'price': rnd.randint(10, 1000)}
+                for _ in range(start, min(count, start + 10000))
+            ])
+        db.session.commit()
+
+        started = time.perf_counter()
+        with db.engine.begin() as connection:
+            rebuild_search_index(connection)
+        trigrams = db.session.execute(db.select(db.func.count()).select_from(ItemTrigram)).scalar()
+        size = os.path.getsize(os.path.join(workdir, 'bench.db')) // (1024 * 1024)
+        print(f"⏱️  {count} items, index built in {time.perf_counter() - started:.1f}s "
+              f"({trigrams} trigram rows, database {size} MB)")
+
+        def ilike(query):
+            return Item.query.filter(db.or_(
+                Item.name.ilike(f'%{query}%'), Item.description.ilike(f'%{query}%')
+            )).all()
+
+        def folded(query):
+            return Item.query.filter(search_condition(query)).all()
+
+        def fuzzy(query):
+            matches = fuzzy_matches(query)
+            return Item.query.join(matches, matches.c.item_id == Item.id).order_by(matches.c.shared.desc()).all()
+
+        print(f"\n   {'query':15} {'ilike':>18} {'folded':>18} {'fuzzy':>18}")
+        for query in QUERIES:
+            cells = []
+            for search in (ilike, folded, fuzzy):
+                elapsed, items = median_ms(lambda: search(query), repeat)
+                cells.append(f"{len(items):6} in {elapsed:6.0f} ms")
+            print(f"   {query:15} {cells[0]:>18} {cells[1]:>18} {cells[2]:>18}")
+
+
+if __name__ == '__main__':
+    main()
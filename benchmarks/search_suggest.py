@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Measure search-as-you-type suggestions against a full catalog search.
+
+Seeds a temporary database with N items named from a random vocabulary,
+then compares, for a list of typed prefixes:
+
+    index lookup    SuggestIndex.suggest() on the built per-worker index
+    /search/suggest the whole request through the test client
+    / ?search=      the full-page search the search box used to submit
+
+Index build and incremental update (rename of one item) are timed too.
+
+Usage:
+    python benchmarks/search_suggest.py
+    BENCH_ITEMS=100000 python benchmarks/search_suggest.py
+"""
+
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def per_call(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 10000))
+    workdir = tempfile.mkdtemp(prefix='flea-suggest-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.models import Item
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    rnd = random.Random(42)
+    vocabulary = [''.join(rnd.choices(string.ascii_lowercase, k=rnd.randint(3, 9))) for _ in range(5000)]
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Item), [
+            {'name': ' '.join(rnd.choices(vocabulary, k=rnd.randint(1, 4))).capitalize(), 'price': 100}
+            for _ in range(count)
+        ])
+        db.session.commit()
+
+    prefixes = ['a', 'st', vocabulary[0][:3], vocabulary[1][:5], 'qqq']
+    client = app.test_client()
+    print(f"⏱️  {count} items, prefixes {prefixes}")
+
+    with app.test_request_context():
+        from app.suggest import get_suggest_index
+        start = time.perf_counter()
+        index = get_suggest_index()
+        print(f"   index build: {(time.perf_counter() - start) * 1000:.0f} ms, {len(index._keys)} keys")
+
+        item = db.session.get(Item, count // 2)
+        item.name = 'Renamed bench item'
+        from app.events import record_item_event, get_hub
+        record_item_event('updated', item)
+        db.session.commit()
+        get_hub().refresh(force=True)
+        start = time.perf_counter()
+        index.sync()
+        print(f"   incremental rename: {(time.perf_counter() - start) * 1e6:.0f} µs")
+
+        print(f"\n   {'prefix':10} {'index lookup':>14} {'/search/suggest':>16} {'/?search=':>12}")
+        for prefix in prefixes:
+            lookup = per_call(lambda: index.suggest(prefix), 2000)
+            endpoint = per_call(lambda: client.get(f'/search/suggest?q={prefix}'), 200)
+            page = per_call(lambda: client.get(f'/?search={prefix}'), 5)
+            print(f"   {prefix:10} {lookup * 1e6:11.1f} µs {endpoint * 1000:13.2f} ms {page * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Compare gunicorn serving profiles under a mixed upload/browse load.
+
+For each profile a real gunicorn server is started from gunicorn.conf.py.
+A few clients upload an image slowly (like a phone on a weak connection)
+while browse clients request the catalog page in a loop. The interesting
+number is browse latency while uploads are in flight: with sync workers a
+slow upload holds a whole worker, with gthread it holds only one thread.
+
+Usage:
+    python benchmarks/serving_profiles.py
+    BENCH_PROFILES=sync,gthread BENCH_WORKERS=2 python benchmarks/serving_profiles.py
+
+Options (environment):
+    BENCH_PROFILES      comma separated profiles (default sync,gthread)
+    BENCH_WORKERS       fixed worker count for a fair comparison (default 2)
+    BENCH_UPLOADS       concurrent slow uploads (default 2)
+    BENCH_BROWSERS      concurrent browse clients (default 4)
+    BENCH_SECONDS       duration of each run (default 6)
+"""
+
+import http.client
+import io
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_ROOT)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def seed_database(db_url, items=200):
+    """Create a catalog and an admin user in a fresh database"""
+    os.environ['DATABASE_URL'] = db_url
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        from app.models import User, Item
+        db.create_all()
+        user = User(username='bench')
+        user.set_password('bench-password')
+        db.session.add(user)
+        for i in range(items):
+            db.session.add(Item(name=f'Item {i}', description='Benchmark item', price=float(i)))
+        db.session.commit()
+
+
+def start_server(profile, port, db_url, workdir, workers):
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': db_url,
+        'SERVING_PROFILE': profile,
+        'WEB_CONCURRENCY': str(workers),
+        'GUNICORN_BIND': f'127.0.0.1:{port}',
+        'RATELIMIT_ENABLED': 'false',
+        'FLASK_ENV': 'production',
+        'PYTHONPATH': REPO_ROOT,
+    })
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '--config', os.path.join(REPO_ROOT, 'gunicorn.conf.py'), 'run:app'],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/language-status')
+            conn.getresponse().read()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f'gunicorn ({profile}) did not start')
+
+
+def login(port):
+    """Log in and return the session cookie"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    body = 'username=bench&password=bench-password'
+    conn.request('POST', '/auth/login', body=body,
+                 headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    return response.getheader('Set-Cookie', '').split(';')[0]
+
+
+def make_image_bytes():
+    from PIL import Image
+    buf = io.BytesIO()
+    Image.effect_noise((1600, 1200), 64).convert('RGB').save(buf, 'JPEG', quality=90)
+    return buf.getvalue()
+
+
+def slow_upload(port, cookie, image, seconds, results, filenames):
+    """POST a multipart upload, trickling the body over the given duration"""
+    boundary = uuid.uuid4().hex
+    filename = f'bench-{uuid.uuid4().hex[:8]}.jpg'
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + image + f'\r\n--{boundary}--\r\n'.encode()
+
+    start = time.perf_counter()
+    sock = socket.create_connection(('127.0.0.1', port), timeout=60)
+    sock.sendall((
+        'POST /admin/upload HTTP/1.1\r\n'
+        f'Host: 127.0.0.1:{port}\r\n'
+        f'Cookie: {cookie}\r\n'
+        f'Content-Type: multipart/form-data; boundary={boundary}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        'Connection: close\r\n\r\n'
+    ).encode())
+    chunks = 20
+    step = len(body) // chunks + 1
+    for i in range(0, len(body), step):
+        sock.sendall(body[i:i + step])
+        time.sleep(seconds / chunks)
+    response = b''
+    while True:
+        data = sock.recv(65536)
+        if not data:
+            break
+        response += data
+    sock.close()
+    results.append((time.perf_counter() - start, response.split(b' ', 2)[1:2] == [b'200']))
+    filenames.append(filename)
+
+
+def browse(port, stop_at, latencies, errors):
+    while time.time() < stop_at:
+        start = time.perf_counter()
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            conn.request('GET', '/?sort=newest')
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 200:
+                errors.append(response.status)
+                continue
+        except OSError as e:
+            errors.append(e)
+            continue
+        latencies.append(time.perf_counter() - start)
+
+
+def run_profile(profile, settings, image, workdir, db_url):
+    port = free_port()
+    proc = start_server(profile, port, db_url, workdir, settings['workers'])
+    filenames = []
+    try:
+        cookie = login(port)
+        stop_at = time.time() + settings['seconds']
+        upload_results, latencies, errors = [], [], []
+        threads = []
+        for _ in range(settings['uploads']):
+            threads.append(threading.Thread(
+                target=slow_upload,
+                args=(port, cookie, image, settings['seconds'] * 0.6, upload_results, filenames)))
+        for _ in range(settings['browsers']):
+            threads.append(threading.Thread(target=browse, args=(port, stop_at, latencies, errors)))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        proc.terminate()
+        proc.wait()
+        uploads_dir = os.path.join(REPO_ROOT, 'app', 'static', 'uploads')
+        for name in filenames:
+            try:
+                os.remove(os.path.join(uploads_dir, name))
+            except OSError:
+                pass
+
+    latencies.sort()
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else float('nan')
+    print(f"\n🚦 Profile {profile}")
+    print(f"   browse: {len(latencies)} requests, {len(latencies) / settings['seconds']:.1f} req/s, "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else float('nan'):.0f} ms, "
+          f"p95 {p95 * 1000:.0f} ms, max {max(latencies, default=float('nan')) * 1000:.0f} ms, "
+          f"errors {len(errors)}")
+    ok = sum(1 for _, success in upload_results if success)
+    print(f"   uploads: {ok}/{len(upload_results)} succeeded, "
+          f"mean {statistics.mean(t for t, _ in upload_results) if upload_results else 0:.2f}s")
+
+
+def main():
+    settings = {
+        'workers': int(os.environ.get('BENCH_WORKERS', 2)),
+        'uploads': int(os.environ.get('BENCH_UPLOADS', 2)),
+        'browsers': int(os.environ.get('BENCH_BROWSERS', 4)),
+        'seconds': float(os.environ.get('BENCH_SECONDS', 6)),
+    }
+    profiles = os.environ.get('BENCH_PROFILES', 'sync,gthread').split(',')
+
+    workdir = tempfile.mkdtemp(prefix='flea-serving-')
+    db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    seed_database(db_url)
+    image = make_image_bytes()
+
+    print(f"⚙️  {settings['workers']} workers, {settings['uploads']} slow uploads "
+          f"({len(image) // 1024} KB), {settings['browsers']} browse clients, {settings['seconds']}s")
+    for profile in profiles:
+        run_profile(profile.strip(), settings, image, workdir, db_url)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Measure the catalog's hot paths before and after archiving sold items.
+
+Seeds a temporary database with N items, most of them sold long ago (the
+state of a market that has run for a while), and reports:
+
+    snapshot   loading the catalog snapshot (each worker at start, and
+               after every bulk import)
+    catalog    GET / with the snapshot loaded
+    dashboard  GET /admin/dashboard
+
+then archives the old sales with archive_sold_items() and measures again.
+
+Usage:
+    python benchmarks/sold_archive.py
+    BENCH_ITEMS=50000 BENCH_SOLD=0.95 python benchmarks/sold_archive.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 10000))
+    sold_share = float(os.environ.get('BENCH_SOLD', 0.9))
+    workdir = tempfile.mkdtemp(prefix='flea-archive-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.archive import archive_sold_items
+    from app.catalog import load_records
+    from app.events import record_catalog_event
+    from app.models import Item, User
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    sold_at = datetime.utcnow() - timedelta(days=365)
+    sold = int(count * sold_share)
+    with app.app_context():
+        db.create_all()
+        user = User(username='bench')
+        user.set_password('bench-password')
+        db.session.add(user)
+        db.session.execute(db.insert(Item), [
+            {'name': f'Item {i}', 'description': 'Fint skick. ' * 5, 'price': i % 900,
+             'is_sold': i < sold, 'sold_at': sold_at if i < sold else None}
+            for i in range(count)
+        ])
+        record_catalog_event('new')  # so the catalog snapshot reloads
+        db.session.commit()
+
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'bench', 'password': 'bench-password'})
+
+    def median(fn, rounds=5):
+        timings = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings) * 1000
+
+    def measure(label):
+        with app.app_context():
+            rows = db.session.execute(db.select(db.func.count()).select_from(Item)).scalar()
+            snapshot = median(load_records)
+        client.get('/')  # load this worker's snapshot
+        catalog = median(lambda: client.get('/').get_data())
+        dashboard = median(lambda: client.get('/admin/dashboard').get_data())
+        print(f"   {label:8} {rows:>7} {snapshot:10.1f} {catalog:10.1f} {dashboard:11.1f}")
+
+    print(f"⏱️  {count} items, {sold} sold a year ago (median of 5, ms)")
+    print(f"   {'':8} {'rows':>7} {'snapshot':>10} {'catalog':>10} {'dashboard':>11}")
+    measure('before')
+    with app.app_context():
+        start = time.perf_counter()
+        report = archive_sold_items(days=30)
+        elapsed = time.perf_counter() - start
+    measure('after')
+    print(f"📦 Archived {report['archived']} items in {elapsed:.2f} s")
+
+
+if __name__ == '__main__':
+    main()
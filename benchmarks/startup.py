@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Measure container/worker startup cost, phase by phase.
+
+Every phase runs in a fresh interpreter so module caches don't hide the
+cold-start cost:
+
+    init_db (fast)    up-to-date database, single schema_version query
+    init_db (--force) full path: build app, create_all, seed checks, stamp
+    import app        importing the app package (Flask extensions, config)
+    create_app        building the app, registering blueprints
+    first request     rendering the catalog page once
+    first upload      first image processed (Pillow loaded on demand)
+
+Usage:
+    python benchmarks/startup.py
+    BENCH_RUNS=10 python benchmarks/startup.py
+"""
+
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child_phases():
+    """Run in a fresh interpreter: time in-process phases and print them as JSON"""
+    sys.path.insert(0, REPO_ROOT)
+    timings = {}
+
+    start = time.perf_counter()
+    import app as app_package
+    timings['import app'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    app = app_package.create_app()
+    timings['create_app'] = time.perf_counter() - start
+
+    client = app.test_client()
+    start = time.perf_counter()
+    client.get('/')
+    timings['first request'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    timings['Pillow loaded before upload'] = float('PIL.Image' in sys.modules)
+    from app.images import save_upload_image
+    from app.storage import LocalStorage
+    source = io.BytesIO()
+    from PIL import Image
+    Image.new('RGB', (1600, 1200), 'gray').save(source, 'JPEG')
+    source.seek(0)
+    save_upload_image(source, 'bench.jpg', LocalStorage(tempfile.mkdtemp()))
+    timings['first upload'] = time.perf_counter() - start
+
+    print(json.dumps(timings))
+
+
+def timed_run(args, env, cwd):
+    start = time.perf_counter()
+    subprocess.run(args, env=env, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    runs = int(os.environ.get('BENCH_RUNS', 5))
+    workdir = tempfile.mkdtemp(prefix='flea-startup-')
+    env = dict(os.environ)
+    env.update({
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        'FLASK_ENV': 'production',
+        'PYTHONPATH': REPO_ROOT,
+    })
+    init_db = os.path.join(REPO_ROOT, 'init_db.py')
+
+    # First run creates and stamps the database
+    subprocess.run([sys.executable, init_db], env=env, cwd=workdir, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    results = {
+        'python (empty)': [timed_run([sys.executable, '-c', 'pass'], env, workdir) for _ in range(runs)],
+        'init_db (fast)': [timed_run([sys.executable, init_db], env, workdir) for _ in range(runs)],
+        'init_db (--force)': [timed_run([sys.executable, init_db, '--force'], env, workdir) for _ in range(runs)],
+    }
+
+    pillow_preloaded = False
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, __file__, '--child'], env=env, cwd=workdir,
+                                check=True, capture_output=True, text=True).stdout
+        phases = json.loads(output.strip().splitlines()[-1])
+        pillow_preloaded = pillow_preloaded or bool(phases.pop('Pillow loaded before upload'))
+        for name, value in phases.items():
+            results.setdefault(name, []).append(value)
+
+    print(f"⏱️  Startup phases (median of {runs} cold runs)")
+    for name, values in results.items():
+        print(f"   {name:20} {statistics.median(values) * 1000:8.1f} ms")
+    print(f"   Pillow imported at startup: {'yes' if pillow_preloaded else 'no'}")
+
+
+if __name__ == '__main__':
+    if '--child' in sys.argv[1:]:
+        child_phases()
+    else:
+        main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Compare the cost of translating a string and resolving the locale.
+
+    flask_babel.gettext     previous template `_` (wrapped in try/except)
+    catalog lookup          current template `_`, one dict hit
+    get_locale (resolve)    session + Accept-Language + settings each call
+    get_locale (memoized)   resolved once per request
+
+Usage:
+    python benchmarks/translations.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+if not os.environ.get('DATABASE_URL'):
+    _tmpdir = tempfile.mkdtemp(prefix='flea-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_tmpdir, 'bench.db')}"
+
+from app import create_app, db
+
+
+def per_call(stmt, number):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    app = create_app()
+    app.testing = True
+    with app.app_context():
+        db.create_all()
+
+    words = ['Dashboard', 'Price', 'Sold', 'Newest first', 'Not translated at all']
+    headers = {'Accept-Language': 'cs-CZ,cs;q=0.9,en;q=0.8'}
+
+    with app.test_request_context('/', headers=headers):
+        from flask import g
+        from flask_babel import gettext
+        from app.catalogs import get_catalog
+        # The templates' get_locale comes from the inject_app_info context processor
+        get_locale = app.template_context_processors[None][-1]()['get_locale']
+
+        def babel_lookup():
+            for word in words:
+                try:
+                    gettext(word)
+                except Exception:
+                    pass
+
+        catalog = get_catalog(get_locale())
+
+        def catalog_lookup():
+            for word in words:
+                catalog.get(word, word)
+
+        def resolve_every_time():
+            g.pop('_locale', None)
+            get_locale()
+
+        print(f"🌍 Locale: {get_locale()}")
+        print(f"   flask_babel.gettext   {per_call(babel_lookup, 2000) / len(words):7.2f} µs/string")
+        print(f"   catalog lookup        {per_call(catalog_lookup, 20000) / len(words):7.2f} µs/string")
+        print(f"   get_locale (resolve)  {per_call(resolve_every_time, 2000):7.2f} µs/call")
+        print(f"   get_locale (memoized) {per_call(get_locale, 20000):7.2f} µs/call")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Measure batched view beacons against one request per gallery view.
+
+Seeds a temporary database with N items, then sends the views of a
+visitor who opens the gallery of B items:
+
+    per view   B POSTs to /item/<id>/view, one UPDATE and commit each
+    batched    one POST to /item/views with all B ids (what the gallery's
+               sendBeacon queue sends), one UPDATE and commit in total
+    repeat     the same batch again, which de-duplication drops
+
+Usage:
+    python benchmarks/view_beacons.py
+    BENCH_BATCH=50 python benchmarks/view_beacons.py
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    count = int(os.environ.get('BENCH_ITEMS', 5000))
+    batch = int(os.environ.get('BENCH_BATCH', 20))
+    rounds = 10
+    workdir = tempfile.mkdtemp(prefix='flea-views-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ.setdefault('FLASK_ENV', 'production')
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_ROOT)
+
+    import logging
+    from app import create_app, db
+    from app.models import Item
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(Item), [{'name': f'Item {i}', 'price': i % 500} for i in range(count)])
+        db.session.commit()
+
+    client = app.test_client()
+    per_view, batched, repeat = [], [], []
+    for n in range(rounds):
+        # A fresh visitor per round so de-duplication doesn't hide the work
+        headers = {'User-Agent': f'bench-{n}'}
+        ids = list(range(n * batch * 2 + 1, n * batch * 2 + batch + 1))
+        start = time.perf_counter()
+        for item_id in ids:
+            client.post(f'/item/{item_id}/view', headers=headers)
+        per_view.append(time.perf_counter() - start)
+
+        ids = [item_id + batch for item_id in ids]
+        start = time.perf_counter()
+        client.post('/item/views', json={'item_ids': ids}, headers=headers)
+        batched.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        client.post('/item/views', json={'item_ids': ids}, headers=headers)
+        repeat.append(time.perf_counter() - start)
+
+    print(f"⏱️  {batch} gallery views per visitor, {count} items")
+    print(f"   per view:  {statistics.median(per_view) * 1000:7.1f} ms ({batch} requests, {batch} commits)")
+    print(f"   batched:   {statistics.median(batched) * 1000:7.1f} ms (1 request, 1 commit)")
+    print(f"   repeat:    {statistics.median(repeat) * 1000:7.1f} ms (de-duplicated, no write)")
+
+
+if __name__ == '__main__':
+    main()
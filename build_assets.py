@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Build the critical CSS of the catalog page and the vendored front-end assets.
+
+Usage:
+    python build_assets.py            # rebuild app/static/build from what is on disk
+    python build_assets.py --vendor   # first download Bootstrap and Font Awesome
+                                      # into app/static/vendor (needs network)
+
+--vendor fetches the release files from the CDNs, or when those can't be
+reached, the same releases as redistributed in wheels on the Python package
+index (PIP_INDEX_URL): Bootstrap-Flask 2.3.0 carries Bootstrap 5.3.0 (its
+bundle is built from Popper and bootstrap.min.js, as upstream's is) and
+fontawesomefree 6.4.0 carries Font Awesome 6.4.0.
+
+The catalog page used to block rendering on Bootstrap and Font Awesome
+from CDNs plus all of style.css. This step writes:
+
+    app/static/build/critical.css   the rules of (vendored) Bootstrap and
+                                    style.css the first screen of the
+                                    catalog needs; base.html inlines them and
+                                    loads the full stylesheets asynchronously
+    app/static/vendor/fontawesome/  Font Awesome CSS and fonts cut down to the
+                                    icons the templates and app.js use
+                                    (needs fonttools and brotli)
+    app/static/build/manifest.json  what was built, from which inputs, and the
+                                    page weight before and after
+
+The first screen is the markup of base.html and index.html above their
+FIRST_SCREEN_END comments: the navbar, search, filters and the card grid.
+A selector goes into the critical CSS when every class, id and element in
+it occurs there, and it doesn't need interaction (:hover, :focus, ...).
+Rules for what comes later (footer, pagination) wait for the full
+stylesheets, except rules that hide an element (display:none,
+visibility:hidden), so the gallery modal never flashes up. The icon subset
+keeps every selector whose classes and ids occur in any template or
+app.js.
+
+The sources of the vendored files are kept in app/static/vendor/src, so
+the subset can be rebuilt offline when a template starts using another
+icon. Only the fonts of the Font Awesome styles in use are kept there;
+using another style (e.g. fa-regular) needs another --vendor run. Without
+vendored Bootstrap the CDN stylesheet stays render-blocking (the critical
+CSS doesn't cover it) and only style.css is deferred.
+
+This runs at image build time (see Dockerfile), after the vendored files
+have been committed.
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import io
+import re
+import shutil
+import sys
+import urllib.parse
+import urllib.request
+import zipfile
+
+STATIC_DIR = 'app/static'
+TEMPLATES_DIR = 'app/templates'
+BUILD_DIR = os.path.join(STATIC_DIR, 'build')
+VENDOR_DIR = os.path.join(STATIC_DIR, 'vendor')
+SOURCE_DIR = os.path.join(VENDOR_DIR, 'src')
+MANIFEST_PATH = os.path.join(BUILD_DIR, 'manifest.json')
+STYLE_PATH = os.path.join(STATIC_DIR, 'css', 'style.css')
+APP_JS_PATH = os.path.join(STATIC_DIR, 'js', 'app.js')
+CRITICAL_TEMPLATES = ['base.html', 'index.html']
+FIRST_SCREEN_END = '{# first screen ends #}'
+# Above this the critical CSS no longer fits the first round trip
+CRITICAL_BUDGET = 14 * 1024  # gzipped bytes
+
+BOOTSTRAP_CDN = 'https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist'
+FONTAWESOME_CDN = 'https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0'
+FONTAWESOME_FONTS = ['fa-solid-900', 'fa-regular-400', 'fa-brands-400']
+# A font ships only when one of its style classes occurs (plain fa is solid)
+FONTAWESOME_FONT_CLASSES = {
+    'fa-solid-900': {'.fa', '.fas', '.fa-solid'},
+    'fa-regular-400': {'.far', '.fa-regular'},
+    'fa-brands-400': {'.fab', '.fa-brands'},
+}
+DOWNLOADS = {
+    'bootstrap.min.css': f'{BOOTSTRAP_CDN}/css/bootstrap.min.css',
+    'bootstrap.bundle.min.js': f'{BOOTSTRAP_CDN}/js/bootstrap.bundle.min.js',
+    'fontawesome/all.min.css': f'{FONTAWESOME_CDN}/css/all.min.css',
+    # The woff2 files are what browsers fetched before; the subsets are cut
+    # from the TrueType files, since fontTools can't rebuild every woff2 glyf
+    # table (6.4.0's regular face fails)
+    **{f'fontawesome/webfonts/{font}.{ext}': f'{FONTAWESOME_CDN}/webfonts/{font}.{ext}'
+       for font in FONTAWESOME_FONTS for ext in ('woff2', 'ttf')},
+}
+PACKAGE_INDEX = os.environ.get('PIP_INDEX_URL', 'https://pypi.org/simple').rstrip('/')
+BOOTSTRAP_WHEEL = ('bootstrap-flask', 'Bootstrap_Flask-2.3.0-py2.py3-none-any.whl',
+                   'flask_bootstrap/static/bootstrap5/')
+FONTAWESOME_WHEEL = ('fontawesomefree', 'fontawesomefree-6.4.0-py3-none-any.whl',
+                     'fontawesomefree/static/fontawesomefree/')
+# DOWNLOADS name -> (wheel, files in it that make up the download)
+WHEEL_FILES = {
+    'bootstrap.min.css': (BOOTSTRAP_WHEEL, ['css/bootstrap.min.css']),
+    'bootstrap.bundle.min.js': (BOOTSTRAP_WHEEL, ['umd/popper.min.js', 'js/bootstrap.min.js']),
+    'fontawesome/all.min.css': (FONTAWESOME_WHEEL, ['css/all.min.css']),
+    **{f'fontawesome/webfonts/{font}.{ext}': (FONTAWESOME_WHEEL, [f'webfonts/{font}.{ext}'])
+       for font in FONTAWESOME_FONTS for ext in ('woff2', 'ttf')},
+}
+
+def read(path):
+    with open(path, encoding='utf-8') as f:
+        return f.read()
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode, kwargs = ('wb', {}) if isinstance(content, bytes) else ('w', {'encoding': 'utf-8'})
+    with open(path, mode, **kwargs) as f:
+        f.write(content)
+
+def sha256(data):
+    return hashlib.sha256(data if isinstance(data, bytes) else data.encode('utf-8')).hexdigest()
+
+def weight(data):
+    """(bytes, gzipped bytes) of a file's content"""
+    data = data if isinstance(data, bytes) else data.encode('utf-8')
+    return len(data), len(gzip.compress(data, 9))
+
+# --- CSS parsing -----------------------------------------------------------
+
+def parse_css(text):
+    """
+    Top-level nodes of a stylesheet: ('rule', selectors, declarations) or
+    ('at', prelude, children) for block at-rules, children being nodes for
+    @media/@supports and raw declarations for the others (@font-face,
+    @keyframes). Statement at-rules (@charset, @import) are dropped.
+    """
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.S)
+    nodes, _ = _parse_block(text, 0)
+    return nodes
+
+def _find_block_end(text, start):
+    """Index of the brace closing the block that starts after text[start - 1]"""
+    depth, i, quote = 1, start, None
+    while i < len(text):
+        char = text[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '"\'':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return len(text)
+
+def _parse_block(text, pos):
+    nodes = []
+    while True:
+        brace = text.find('{', pos)
+        semicolon = text.find(';', pos)
+        if brace == -1:
+            return nodes, len(text)
+        prelude = text[pos:brace].strip()
+        if prelude.startswith('@') and 0 <= semicolon < brace:
+            pos = semicolon + 1  # @charset/@import
+            continue
+        end = _find_block_end(text, brace + 1)
+        body = text[brace + 1:end]
+        if prelude.startswith(('@media', '@supports', '@container', '@layer')):
+            children, _ = _parse_block(body, 0)
+            nodes.append(('at', prelude, children))
+        elif prelude.startswith('@'):
+            nodes.append(('at', prelude, body.strip()))
+        else:
+            nodes.append(('rule', split_selectors(prelude), body.strip()))
+        pos = end + 1
+
+def split_selectors(prelude):
+    """Selector list split on top-level commas (not those inside :is(...) etc.)"""
+    selectors, depth, current = [], 0, ''
+    for char in prelude:
+        if char in '([':
+            depth += 1
+        elif char in ')]':
+            depth -= 1
+        if char == ',' and depth == 0:
+            selectors.append(current.strip())
+            current = ''
+        else:
+            current += char
+    selectors.append(current.strip())
+    return [s for s in selectors if s]
+
+_STRING = re.compile(r'''("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')''')
+
+def minify(declarations):
+    """Whitespace collapsed outside of strings"""
+    parts = _STRING.split(declarations.strip())
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'\s+', ' ', parts[i])
+        parts[i] = re.sub(r'\s*([;:{},])\s*', r'\1', code)
+    return ''.join(parts).rstrip(';')
+
+def serialize(nodes):
+    out = []
+    for kind, head, body in nodes:
+        if kind == 'rule':
+            out.append(f"{','.join(head)}{{{minify(body)}}}")
+        elif isinstance(body, list):
+            out.append(f'{head}{{{serialize(body)}}}')
+        else:
+            out.append(f'{head}{{{minify(body)}}}')
+    return ''.join(out)
+
+# --- Purging ---------------------------------------------------------------
+
+_SELECTOR_TOKEN = re.compile(r'([.#])(-?[_a-zA-Z][\w-]*)')
+_SELECTOR_TAG = re.compile(r'(?:^|[\s>+~])([a-zA-Z][\w-]*)')
+_INTERACTION = re.compile(r':(hover|focus|focus-visible|focus-within|active|visited|checked|invalid|valid)\b')
+_HIDES = re.compile(r'(^|;)\s*(display\s*:\s*none|visibility\s*:\s*hidden)')
+
+def selector_tokens(selector, tags=False):
+    """
+    Classes and ids a selector requires (ignoring :not() and attribute
+    values), plus its element names with tags=True
+    """
+    selector = re.sub(r'\[[^\]]*\]', '', selector)
+    selector = re.sub(r':not\([^)]*\)', '', selector)
+    tokens = {('.' if mark == '.' else '#') + name for mark, name in _SELECTOR_TOKEN.findall(selector)}
+    if tags:
+        bare = re.sub(r'::?[\w-]+(\([^)]*\))?', '', selector)
+        tokens.update(f'<{name.lower()}' for name in _SELECTOR_TAG.findall(bare))
+    return tokens
+
+def purge(nodes, used, keep_font_faces=False):
+    """Nodes reduced to the selectors whose classes and ids are all in used"""
+    kept = []
+    for kind, head, body in nodes:
+        if kind == 'rule':
+            selectors = [s for s in head if selector_tokens(s) <= used]
+            if selectors:
+                kept.append(('rule', selectors, body))
+        elif isinstance(body, list):
+            children = purge(body, used, keep_font_faces)
+            if children:
+                kept.append(('at', head, children))
+        elif head.startswith('@font-face'):
+            if keep_font_faces:
+                kept.append((kind, head, body))
+        else:
+            kept.append((kind, head, body))
+    return _drop_unused_keyframes(kept)
+
+def first_screen(nodes, first, page):
+    """
+    Nodes reduced to what the first paint needs: selectors whose classes,
+    ids and elements are all in first and that need no interaction, and
+    hiding rules for the rest of the page (tokens in page). @font-face and
+    print styles wait for the full stylesheets.
+    """
+    kept = []
+    for kind, head, body in nodes:
+        if kind == 'rule':
+            hides = bool(_HIDES.search(minify(body)))
+            selectors = [s for s in head if not _INTERACTION.search(s)
+                         and selector_tokens(s, tags=True) <= (page if hides else first)]
+            if selectors:
+                kept.append(('rule', selectors, body))
+        elif isinstance(body, list):
+            if head.startswith('@media') and re.search(r'\bprint\b', head) and 'screen' not in head:
+                continue
+            children = first_screen(body, first, page)
+            if children:
+                kept.append(('at', head, children))
+        elif not head.startswith('@font-face'):
+            kept.append((kind, head, body))
+    return _drop_unused_keyframes(kept)
+
+def _drop_unused_keyframes(nodes):
+    text = serialize([node for node in nodes if not _is_keyframes(node)])
+    return [node for node in nodes
+            if not _is_keyframes(node) or re.search(rf'\b{re.escape(node[1].split()[-1])}\b', text)]
+
+def _is_keyframes(node):
+    return node[0] == 'at' and re.match(r'@(-\w+-)?keyframes\b', node[1])
+
+_ATTRIBUTE = re.compile(r'''\b(class|id)\s*=\s*("[^"]*"|'[^']*')''')
+_WORD = re.compile(r'-?[_a-zA-Z][\w-]*')
+
+_TAG = re.compile(r'<([a-zA-Z][\w-]*)')
+# Always on the page, whatever the templates say
+DOCUMENT_TAGS = {'<html', '<body'}
+
+def markup_tokens(markup):
+    """Classes and ids in class="..."/id="..." attributes (Jinja expressions included)"""
+    used = set()
+    for attribute, value in _ATTRIBUTE.findall(markup):
+        mark = '.' if attribute == 'class' else '#'
+        used.update(mark + word for word in _WORD.findall(value))
+    return used
+
+def tag_tokens(markup):
+    """Element names in the markup, as '<name'"""
+    return DOCUMENT_TAGS | {f'<{name.lower()}' for name in _TAG.findall(markup)}
+
+def template_tokens(paths):
+    """Classes and ids used in templates"""
+    return set().union(*(markup_tokens(read(path)) for path in paths))
+
+def page_tokens(paths):
+    """(first screen, whole page) classes, ids and elements of the catalog templates"""
+    first, page = set(), set()
+    for path in paths:
+        markup = read(path)
+        head, marker, _ = markup.partition(FIRST_SCREEN_END)
+        if not marker:
+            print(f"⚠️  {path} has no {FIRST_SCREEN_END} comment; all of it counts as first screen")
+        first |= markup_tokens(head) | tag_tokens(head)
+        page |= markup_tokens(markup) | tag_tokens(markup)
+    return first, page
+
+def script_tokens(path):
+    """Classes app.js sets: every quoted word in it, as a class"""
+    used = set()
+    for literal in re.findall(r'''(["'`])((?:(?!\1).)*)\1''', read(path)):
+        used.update('.' + word for word in _WORD.findall(literal[1]))
+    return used
+
+# --- Vendoring -------------------------------------------------------------
+
+def fetch(url):
+    with urllib.request.urlopen(url, timeout=30) as response:
+        return response.read()
+
+def wheel_sources(names):
+    """The named DOWNLOADS files, from the release wheels on the package index"""
+    wheels = {}
+    for (project, filename, _), _ in (WHEEL_FILES[name] for name in names):
+        if filename in wheels:
+            continue
+        index_url = f'{PACKAGE_INDEX}/{project}/'
+        links = re.findall(r'href="([^"]+)"', fetch(index_url).decode('utf-8'))
+        link = next((l for l in links if l.split('#')[0].endswith('/' + filename)), None)
+        if link is None:
+            raise OSError(f'{filename} is not on {index_url}')
+        url, _, digest = urllib.parse.urljoin(index_url, link).partition('#sha256=')
+        print(f"⬇️  {url}")
+        data = fetch(url)
+        if digest and sha256(data) != digest:
+            raise OSError(f'{filename}: checksum mismatch')
+        wheels[filename] = zipfile.ZipFile(io.BytesIO(data))
+    sources = {}
+    for name in names:
+        (_, filename, prefix), members = WHEEL_FILES[name]
+        sources[name] = b'\n'.join(wheels[filename].read(prefix + member) for member in members)
+    return sources
+
+def font_source(name):
+    """The Font Awesome font a DOWNLOADS name is a file of, or None"""
+    match = re.fullmatch(r'fontawesome/webfonts/(.+)\.\w+', name)
+    return match.group(1) if match else None
+
+def download_sources(fonts):
+    """Fetch the DOWNLOADS files into SOURCE_DIR, of the Font Awesome fonts only those in fonts"""
+    wanted = [name for name in DOWNLOADS if font_source(name) in (None, *fonts)]
+    try:
+        sources = {}
+        for name in wanted:
+            print(f"⬇️  {DOWNLOADS[name]}")
+            sources[name] = fetch(DOWNLOADS[name])
+    except OSError as e:
+        print(f"⚠️  CDN not reachable ({e}); using the release wheels from {PACKAGE_INDEX}")
+        sources = wheel_sources(wanted)
+    for name, data in sources.items():
+        write(os.path.join(SOURCE_DIR, name), data)
+    # Sources of fonts no longer in use would only weigh down the repository
+    for name in DOWNLOADS:
+        if name not in wanted and vendored(name):
+            os.remove(vendored(name))
+
+def vendored(name):
+    path = os.path.join(SOURCE_DIR, name)
+    return path if os.path.exists(path) else None
+
+def used_fonts(used):
+    """The Font Awesome fonts whose style classes occur in used"""
+    return [font for font in FONTAWESOME_FONTS if FONTAWESOME_FONT_CLASSES[font] & used]
+
+def shipped_fonts(used):
+    """The used Font Awesome fonts whose sources are vendored"""
+    return [font for font in used_fonts(used) if vendored(f'fontawesome/webfonts/{font}.ttf')]
+
+def build_fontawesome(used):
+    """
+    Font Awesome CSS and fonts for the icons in used. Returns the subset
+    stylesheet's path, or None when the sources or fonttools are missing.
+    """
+    css_source = vendored('fontawesome/all.min.css')
+    if not css_source:
+        return None
+    path = os.path.join(VENDOR_DIR, 'fontawesome', 'fontawesome.min.css')
+    try:
+        from fontTools import subset
+    except ImportError:
+        # e.g. the Docker build: keep the committed subset if there is one
+        if os.path.exists(path):
+            print("⚠️  fonttools is not installed (pip install fonttools brotli); keeping the existing Font Awesome subset")
+            return path
+        print("⚠️  fonttools is not installed (pip install fonttools brotli); Font Awesome not subset")
+        return None
+
+    fonts = shipped_fonts(used)
+    for font in set(used_fonts(used)) - set(fonts):
+        print(f"⚠️  {font} is used but not in {SOURCE_DIR}; run with --vendor to fetch it")
+    # @font-face rules of fonts that don't ship (unused styles, the v4 shims) go
+    nodes = [node for node in purge(parse_css(read(css_source)), used, keep_font_faces=True)
+             if node[0] != 'at' or not node[1].startswith('@font-face')
+             or any(f'webfonts/{font}.' in node[2] for font in fonts)]
+    css = serialize(nodes)
+    codepoints = {int(code, 16) for code in re.findall(r'content:"\\([0-9a-fA-F]+)"', css)}
+    out_dir = os.path.join(VENDOR_DIR, 'fontawesome')
+    shutil.rmtree(os.path.join(out_dir, 'webfonts'), ignore_errors=True)
+    for font in fonts:
+        source = vendored(f'fontawesome/webfonts/{font}.ttf')
+        options = subset.Options()
+        options.flavor = 'woff2'
+        options.layout_features = ['*']
+        face = subset.load_font(source, options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(unicodes=codepoints)
+        subsetter.subset(face)
+        os.makedirs(os.path.join(out_dir, 'webfonts'), exist_ok=True)
+        subset.save_font(face, os.path.join(out_dir, 'webfonts', f'{font}.woff2'), options)
+        # Only the woff2 ships: every browser that runs app.js reads it
+        css = re.sub(rf'src:url\(\.\./webfonts/{font}\.woff2\)[^;}}]*',
+                     f'src:url(webfonts/{font}.woff2) format("woff2")', css)
+    print(f"🔤 Font Awesome: {len(codepoints)} icons from {', '.join(fonts) or 'no font'}")
+    write(path, css)
+    return path
+
+# --- Build -----------------------------------------------------------------
+
+def static_url(path):
+    return '/' + os.path.relpath(path, 'app').replace(os.sep, '/')
+
+def main():
+    parser = argparse.ArgumentParser(description='Build critical CSS and vendored front-end assets.')
+    parser.add_argument('--vendor', action='store_true',
+                        help='download Bootstrap and Font Awesome into app/static/vendor/src first')
+    args = parser.parse_args()
+
+    templates = [os.path.join(dirpath, name)
+                 for dirpath, _, names in os.walk(TEMPLATES_DIR) for name in names if name.endswith('.html')]
+    first_used, page_used = page_tokens([os.path.join(TEMPLATES_DIR, name) for name in CRITICAL_TEMPLATES])
+    site_used = template_tokens(templates) | script_tokens(APP_JS_PATH)
+
+    if args.vendor:
+        download_sources(used_fonts(site_used))
+
+    style = read(STYLE_PATH)
+    bootstrap_css = vendored('bootstrap.min.css')
+    bootstrap_js = vendored('bootstrap.bundle.min.js')
+    if bootstrap_css:
+        bootstrap_target = os.path.join(VENDOR_DIR, 'bootstrap.min.css')
+        write(bootstrap_target, read(bootstrap_css))
+    if bootstrap_js:
+        write(os.path.join(VENDOR_DIR, 'bootstrap.bundle.min.js'), read(bootstrap_js))
+
+    critical = ''
+    if bootstrap_css:
+        critical += serialize(first_screen(parse_css(read(bootstrap_css)), first_used, page_used))
+    critical += serialize(first_screen(parse_css(style), first_used, page_used))
+    write(os.path.join(BUILD_DIR, 'critical.css'), critical)
+    if weight(critical)[1] > CRITICAL_BUDGET:
+        print(f"⚠️  Critical CSS is {weight(critical)[1]:,} bytes gzipped, over the "
+              f"{CRITICAL_BUDGET:,} byte budget; move {FIRST_SCREEN_END} up or trim the first screen")
+
+    fontawesome = build_fontawesome(site_used)
+
+    # Page weight: what blocks the first render, and what is fetched in all
+    blocking_before = {'style.css': weight(style)}
+    fontawesome_source = vendored('fontawesome/all.min.css')
+    if bootstrap_css:
+        blocking_before['bootstrap.min.css'] = weight(read(bootstrap_css))
+    if fontawesome_source:
+        blocking_before['font-awesome all.min.css'] = weight(read(fontawesome_source))
+    blocking_after = {'inline critical CSS': weight(critical)}
+    if not bootstrap_css:
+        blocking_after['bootstrap.min.css (CDN)'] = None
+    fonts_before = fonts_after = None
+    if fontawesome:
+        # Browsers only fetch the faces a page uses, so only those count
+        fonts = shipped_fonts(site_used)
+        fonts_before = sum(os.path.getsize(vendored(f'fontawesome/webfonts/{font}.woff2'))
+                           for font in fonts if vendored(f'fontawesome/webfonts/{font}.woff2'))
+        fonts_after = sum(os.path.getsize(os.path.join(VENDOR_DIR, 'fontawesome', 'webfonts', f'{font}.woff2'))
+                          for font in fonts)
+
+    manifest = {
+        'style_sha256': sha256(style),
+        'critical_css': static_url(os.path.join(BUILD_DIR, 'critical.css')),
+        'critical_includes_bootstrap': bool(bootstrap_css),
+        'bootstrap_css': static_url(os.path.join(VENDOR_DIR, 'bootstrap.min.css')) if bootstrap_css else None,
+        'bootstrap_js': static_url(os.path.join(VENDOR_DIR, 'bootstrap.bundle.min.js')) if bootstrap_js else None,
+        'fontawesome_css': static_url(fontawesome) if fontawesome else None,
+        'weight': {
+            'blocking_before': blocking_before,
+            'blocking_after': blocking_after,
+            'icon_fonts_before': fonts_before,
+            'icon_fonts_after': fonts_after,
+        },
+    }
+    write(MANIFEST_PATH, json.dumps(manifest, indent=2, sort_keys=True) + '\n')
+
+    def total(sizes):
+        known = [size for size in sizes.values() if size]
+        return sum(s[0] for s in known), sum(s[1] for s in known)
+
+    print("📦 Render-blocking CSS (bytes, gzipped):")
+    for label, sizes in (('before', blocking_before), ('after', blocking_after)):
+        parts = ', '.join(f'{name} {size[0]:,}/{size[1]:,}' if size else f'{name} (not measured)'
+                          for name, size in sizes.items())
+        raw, gz = total(sizes)
+        print(f"   {label:6} {raw:>9,} / {gz:>7,}   {parts}")
+    if fontawesome:
+        print(f"🔤 Icon fonts: {fonts_before:,} -> {fonts_after:,} bytes")
+    else:
+        print("🔤 Icon fonts: Font Awesome from the CDN (run with --vendor to subset)")
+    print(f"✅ Wrote {os.path.join(BUILD_DIR, 'critical.css')} and {MANIFEST_PATH}")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
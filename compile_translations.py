@@ -4,58 +4,266 @@ Compile translation files from .po to .mo format.
 This script converts human-readable .po files to binary .mo files that Flask uses.
 
 Usage:
-    python compile_translations.py
+    python compile_translations.py            # compile changed catalogs only
+    python compile_translations.py --force    # recompile every catalog
+    python compile_translations.py --check    # validate only, write nothing
+    python compile_translations.py --strict   # treat missing/fuzzy entries as errors
 
-This will compile all translation files in app/translations/*/LC_MESSAGES/
+The build is incremental: the SHA-256 of each .po file (and of the .mo it
+produced) is kept in app/translations/build-manifest.json, and a catalog is
+only recompiled when its .po changed or its .mo is missing or was modified.
+The .mo files include the GNU hash table, so gettext lookups in them don't
+fall back to binary search. Every catalog is also validated: entries missing
+a translation, fuzzy entries (left out of the .mo) and format-string
+mismatches are reported.
+
+This runs at image build time (see Dockerfile), not at container start.
 Supports Swedish (sv), English (en), Slovak (sk), and Czech (cs) languages.
 """
 
+import hashlib
+import json
 import os
+import struct
 import sys
 
-def compile_translations():
-    """Compile all translation files including Slovak and Czech"""
-    
-    print("🔨 Compiling translation files...")
-    
-    # Define supported languages
-    supported_languages = ['sv', 'en', 'sk', 'cs']
-    
-    # Try using pybabel first (preferred method)
-    result = os.system('pybabel compile -d app/translations')
-    
-    if result != 0:
-        print("⚠️  pybabel compile failed, trying fallback method...")
-        # Fallback to our safe compilation method
-        try:
-            from create_safe_translations import create_safe_translations
-            create_safe_translations()
-            print("✅ Translation files compiled using fallback method!")
-        except Exception as e:
-            print(f"❌ Compilation failed: {e}")
+TRANSLATIONS_DIR = 'app/translations'
+MANIFEST_PATH = os.path.join(TRANSLATIONS_DIR, 'build-manifest.json')
+SUPPORTED_LANGUAGES = ['sv', 'en', 'sk', 'cs']
+
+MO_MAGIC = 0x950412de
+
+def file_sha256(path):
+    """SHA-256 of a file, or None if it doesn't exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def hashpjw(data):
+    """The string hash used by GNU gettext for the .mo hash table"""
+    hval = 0
+    for byte in data:
+        hval = ((hval << 4) + byte) & 0xFFFFFFFF
+        g = hval & 0xF0000000
+        if g:
+            hval ^= g >> 24
+            hval ^= g
+    return hval
+
+def _is_prime(n):
+    if n < 2:
+        return False
+    i = 2
+    while i * i <= n:
+        if n % i == 0:
             return False
-    else:
-        print("✅ Translation files compiled successfully!")
-    
-    # Verify that all supported languages have been processed
-    print("🔍 Verifying compilation for all supported languages...")
-    missing_languages = []
-    
-    for lang in supported_languages:
-        mo_file_path = f"app/translations/{lang}/LC_MESSAGES/messages.mo"
-        if os.path.exists(mo_file_path):
-            print(f"  ✅ {lang}: messages.mo found")
-        else:
-            print(f"  ⚠️  {lang}: messages.mo missing")
-            missing_languages.append(lang)
-    
-    if missing_languages:
-        print(f"⚠️  Missing .mo files for languages: {', '.join(missing_languages)}")
-        print("   These languages will fall back to the translation fallback system.")
-    
-    print("🚀 Restart your Flask app to see the changes")
+        i += 1
     return True
 
+def hash_table_size(count):
+    """Same sizing as GNU msgfmt: the next prime >= 4/3 of the entry count"""
+    size = max(3, (count * 4) // 3)
+    while not _is_prime(size):
+        size += 1
+    return size
+
+def build_hash_table(keys):
+    """Open-addressing table of 1-based string indexes (0 means empty)"""
+    size = hash_table_size(len(keys))
+    table = [0] * size
+    for index, key in enumerate(keys):
+        hval = hashpjw(key)
+        slot = hval % size
+        step = 1 + (hval % (size - 2))
+        while table[slot]:
+            slot += step
+            if slot >= size:
+                slot -= size
+        table[slot] = index + 1
+    return table
+
+def write_mo(messages, output_path):
+    """
+    Write a .mo file with a GNU hash table.
+
+    messages maps msgid -> msgstr as str (plural forms and contexts already
+    joined with NUL and EOT as the .mo format expects).
+    """
+    keys = sorted(k.encode('utf-8') for k in messages)
+    values = [messages[k.decode('utf-8')].encode('utf-8') for k in keys]
+    count = len(keys)
+    hash_table = build_hash_table(keys)
+
+    header_size = 7 * 4
+    originals_offset = header_size
+    translations_offset = originals_offset + 8 * count
+    hash_offset = translations_offset + 8 * count
+    strings_offset = hash_offset + 4 * len(hash_table)
+
+    key_entries = []
+    value_entries = []
+    strings = bytearray()
+    for k in keys:
+        key_entries.append((len(k), strings_offset + len(strings)))
+        strings += k + b'\x00'
+    for v in values:
+        value_entries.append((len(v), strings_offset + len(strings)))
+        strings += v + b'\x00'
+
+    output = bytearray(struct.pack(
+        '<7I', MO_MAGIC, 0, count,
+        originals_offset, translations_offset, len(hash_table), hash_offset
+    ))
+    for length, offset in key_entries + value_entries:
+        output += struct.pack('<2I', length, offset)
+    output += struct.pack(f'<{len(hash_table)}I', *hash_table)
+    output += strings
+
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(output)
+    os.replace(tmp_path, output_path)
+
+def lookup_mo(data, msgid):
+    """Look a msgid up through the hash table, as glibc does (used for verification)"""
+    _, _, count, originals, translations, size, hash_offset = struct.unpack_from('<7I', data)
+    key = msgid.encode('utf-8')
+    hval = hashpjw(key)
+    slot = hval % size
+    step = 1 + (hval % (size - 2))
+    while True:
+        index = struct.unpack_from('<I', data, hash_offset + 4 * slot)[0]
+        if index == 0:
+            return None
+        length, offset = struct.unpack_from('<2I', data, originals + 8 * (index - 1))
+        if data[offset:offset + length] == key:
+            length, offset = struct.unpack_from('<2I', data, translations + 8 * (index - 1))
+            return data[offset:offset + length].decode('utf-8')
+        slot += step
+        if slot >= size:
+            slot -= size
+
+def catalog_messages(catalog):
+    """msgid -> msgstr for every translated, non-fuzzy message (plus the header)"""
+    messages = {}
+    for message in catalog:
+        if message.id and (message.fuzzy or not any(_as_tuple(message.string))):
+            continue
+        if isinstance(message.id, (list, tuple)):
+            msgid = '\x00'.join(message.id)
+            msgstr = '\x00'.join(_as_tuple(message.string))
+        else:
+            msgid = message.id
+            msgstr = message.string
+        if message.context:
+            msgid = f'{message.context}\x04{msgid}'
+        messages[msgid] = msgstr
+    return messages
+
+def _as_tuple(value):
+    return value if isinstance(value, (list, tuple)) else (value,)
+
+def validate_catalog(catalog):
+    """Return (errors, missing, fuzzy) lists for a parsed catalog"""
+    errors = []
+    for message, message_errors in catalog.check():
+        for error in message_errors:
+            errors.append(f'{message.id!r}: {error}')
+    missing = [m.id for m in catalog if m.id and not m.fuzzy and not all(_as_tuple(m.string))]
+    fuzzy = [m.id for m in catalog if m.id and m.fuzzy]
+    return errors, missing, fuzzy
+
+def load_manifest():
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def compile_translations(force=False, check_only=False, strict=False):
+    """Validate all catalogs and recompile the ones whose .po changed"""
+    from babel.messages.pofile import read_po
+
+    print("🔨 Compiling translation files...")
+
+    manifest = load_manifest()
+    success = True
+    compiled = 0
+
+    for lang in SUPPORTED_LANGUAGES:
+        po_path = os.path.join(TRANSLATIONS_DIR, lang, 'LC_MESSAGES', 'messages.po')
+        mo_path = os.path.join(TRANSLATIONS_DIR, lang, 'LC_MESSAGES', 'messages.mo')
+
+        if not os.path.exists(po_path):
+            print(f"  ⚠️  {lang}: messages.po missing")
+            print("     This language will fall back to the translation fallback system.")
+            continue
+
+        with open(po_path, 'rb') as f:
+            catalog = read_po(f, locale=lang)
+
+        errors, missing, fuzzy = validate_catalog(catalog)
+        for error in errors:
+            print(f"  ❌ {lang}: {error}")
+        if missing:
+            print(f"  ⚠️  {lang}: {len(missing)} untranslated entries (e.g. {missing[0]!r})")
+        if fuzzy:
+            print(f"  ⚠️  {lang}: {len(fuzzy)} fuzzy entries left out of the .mo (e.g. {fuzzy[0]!r})")
+        if errors or (strict and (missing or fuzzy)):
+            success = False
+
+        po_hash = file_sha256(po_path)
+        previous = manifest.get(lang, {})
+        up_to_date = (
+            previous.get('po_sha256') == po_hash
+            and previous.get('mo_sha256') is not None
+            and previous.get('mo_sha256') == file_sha256(mo_path)
+        )
+        if check_only:
+            state = 'up to date' if up_to_date else 'needs compiling'
+            print(f"  🔍 {lang}: {state}")
+            continue
+        if up_to_date and not force:
+            print(f"  ⏭️  {lang}: unchanged, skipped")
+            continue
+        if errors:
+            print(f"  ❌ {lang}: not compiled because of errors")
+            continue
+
+        messages = catalog_messages(catalog)
+        write_mo(messages, mo_path)
+
+        # Verify every entry is reachable through the hash table
+        with open(mo_path, 'rb') as f:
+            data = f.read()
+        unreachable = [k for k, v in messages.items() if k and lookup_mo(data, k) != v]
+        if unreachable:
+            print(f"  ❌ {lang}: hash table lookup failed for {unreachable[0]!r}")
+            success = False
+            continue
+
+        manifest[lang] = {'po_sha256': po_hash, 'mo_sha256': file_sha256(mo_path)}
+        compiled += 1
+        print(f"  ✅ {lang}: compiled {len(messages) - 1} messages")
+
+    if not check_only:
+        save_manifest(manifest)
+        print(f"✅ {compiled} catalog(s) compiled, {len(SUPPORTED_LANGUAGES) - compiled} unchanged or skipped")
+        if compiled:
+            print("🚀 Restart your Flask app to see the changes")
+    return success
+
 if __name__ == '__main__':
-    success = compile_translations()
-    sys.exit(0 if success else 1)
\ No newline at end of file
+    args = sys.argv[1:]
+    success = compile_translations(
+        force='--force' in args,
+        check_only='--check' in args,
+        strict='--strict' in args,
+    )
+    sys.exit(0 if success else 1)
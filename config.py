@@ -1,15 +1,120 @@
 import os
 
+def _env_int(name, default):
+    """Read an integer setting from the environment"""
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+def _env_bool(name, default):
+    """Read a boolean setting from the environment (1/true/yes/on)"""
+    value = os.environ.get(name)
+    if value is None or value == '':
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def engine_options(database_uri):
+    """
+    Build SQLAlchemy engine options from DB_POOL_* environment variables.
+
+    SQLite gets no sizing options: its pools are per-file and connections are
+    cheap, so only recycle/pre-ping apply. Server databases (PostgreSQL, MySQL)
+    get a bounded QueuePool sized for one gunicorn worker.
+    """
+    is_sqlite = database_uri.startswith('sqlite')
+    options = {
+        'pool_pre_ping': _env_bool('DB_POOL_PRE_PING', not is_sqlite),
+        'pool_recycle': _env_int('DB_POOL_RECYCLE', 1800),  # seconds
+    }
+    if not is_sqlite:
+        options.update({
+            'pool_size': _env_int('DB_POOL_SIZE', 5),
+            'max_overflow': _env_int('DB_MAX_OVERFLOW', 5),
+            'pool_timeout': _env_int('DB_POOL_TIMEOUT', 30),  # seconds
+        })
+    return options
+
 class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key'
     basedir = os.path.abspath(os.path.dirname(__file__))
     instance_dir = os.path.join(basedir, 'instance')
-    os.makedirs(instance_dir, exist_ok=True)
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f"sqlite:///{os.path.join(instance_dir, 'flea_market.db')}"
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
+    MAX_FORM_MEMORY_SIZE = 1024 * 1024  # non-file form fields
+    # Uploaded files larger than this are spooled to a temp file (in
+    # UPLOAD_SPOOL_DIR, default the system temp dir) instead of memory
+    UPLOAD_SPOOL_THRESHOLD = _env_int('UPLOAD_SPOOL_THRESHOLD', 256 * 1024)
+    UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or None
+    # Who sends uploaded image bodies: app, x-accel (nginx) or x-sendfile
+    MEDIA_SERVING = os.environ.get('MEDIA_SERVING', 'app').strip().lower()
+    MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/_media/')
+    MEDIA_MAX_AGE = _env_int('MEDIA_MAX_AGE', 3600)  # seconds
+    # Where uploaded images are stored (app/storage.py): local (UPLOAD_FOLDER)
+    # or s3 (any S3-compatible bucket; credentials from the usual AWS_* env)
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').strip().lower()
+    STORAGE_S3_BUCKET = os.environ.get('STORAGE_S3_BUCKET', '')
+    STORAGE_S3_PREFIX = os.environ.get('STORAGE_S3_PREFIX', 'uploads/')
+    STORAGE_S3_ENDPOINT_URL = os.environ.get('STORAGE_S3_ENDPOINT_URL') or None  # e.g. MinIO
+    STORAGE_S3_REGION = os.environ.get('STORAGE_S3_REGION') or None
+    # Public base URL of the bucket (or a CDN in front of it); without it
+    # templates get presigned URLs valid for STORAGE_S3_URL_EXPIRES seconds
+    STORAGE_S3_PUBLIC_URL = os.environ.get('STORAGE_S3_PUBLIC_URL', '')
+    STORAGE_S3_URL_EXPIRES = _env_int('STORAGE_S3_URL_EXPIRES', 24 * 3600)
+    # Live updates (app/events.py): 0 stream seconds answers and lets the
+    # browser reconnect after SSE_RETRY_MS, so no worker is held per visitor
+    SSE_STREAM_SECONDS = _env_int('SSE_STREAM_SECONDS', 0)
+    SSE_RETRY_MS = _env_int('SSE_RETRY_MS', 5000)
+    SSE_POLL_SECONDS = float(os.environ.get('SSE_POLL_SECONDS') or 1.0)
+    SSE_EVENT_RETENTION_MINUTES = _env_int('SSE_EVENT_RETENTION_MINUTES', 60)
+    # Upper bounds of the price facet buckets on the catalog page
+    PRICE_FACET_LIMITS = [float(limit) for limit in
+                          (os.environ.get('PRICE_FACET_LIMITS') or '100,250,500,1000').split(',')]
+    # Views count half as much toward sort=trending after this many hours
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS') or 24)
+    # Compress HTML/JSON/CSS responses of at least COMPRESS_MIN_SIZE bytes
+    # (brotli if installed, else gzip; see app/responses.py)
+    COMPRESS_ENABLED = _env_bool('COMPRESS_ENABLED', True)
+    COMPRESS_MIN_SIZE = _env_int('COMPRESS_MIN_SIZE', 500)
+    COMPRESS_LEVEL = _env_int('COMPRESS_LEVEL', 6)
+    COMPRESS_BR_QUALITY = _env_int('COMPRESS_BR_QUALITY', 5)
+    # Where the static catalog pages go (see app/static_export.py); when set,
+    # admin writes refresh them in the background
+    STATIC_EXPORT_DIR = os.environ.get('STATIC_EXPORT_DIR', '')
+    # Repeat views of an item by the same visitor within this window count once
+    VIEW_DEDUP_SECONDS = _env_int('VIEW_DEDUP_SECONDS', 600)
+    # Logged-in users are cached per worker for this long (0 disables; see
+    # app/identity.py), and their session's last_activity is written at most
+    # once per SESSION_ACTIVITY_INTERVAL seconds
+    USER_CACHE_SECONDS = _env_int('USER_CACHE_SECONDS', 30)
+    SESSION_ACTIVITY_INTERVAL = _env_int('SESSION_ACTIVITY_INTERVAL', 60)
+    # Sold items move to the archive tables this many days after the sale
+    # (0 keeps them in the catalog; see app/archive.py). ARCHIVE_PUBLIC lists
+    # them at /sold, ARCHIVE_PAGE_SIZE per page
+    ARCHIVE_AFTER_DAYS = float(os.environ.get('ARCHIVE_AFTER_DAYS') or 0)
+    ARCHIVE_PUBLIC = _env_bool('ARCHIVE_PUBLIC', False)
+    ARCHIVE_PAGE_SIZE = _env_int('ARCHIVE_PAGE_SIZE', 48)
+    # backup.py (app/backup.py): where backups go, and how the database is
+    # copied: pages per online-backup step and the pause between steps
+    BACKUP_DIR = os.environ.get('BACKUP_DIR') or os.path.join(instance_dir, 'backup')
+    BACKUP_PAGES_PER_STEP = _env_int('BACKUP_PAGES_PER_STEP', 1024)
+    BACKUP_STEP_PAUSE_MS = _env_int('BACKUP_STEP_PAUSE_MS', 10)
+    # Most pixels an upload may decode to (JPEGs count at their reduced draft size)
+    MAX_IMAGE_PIXELS = _env_int('MAX_IMAGE_PIXELS', 24_000_000)
+    SQLITE_BUSY_TIMEOUT_MS = _env_int('SQLITE_BUSY_TIMEOUT_MS', 5000)
+    # Only disable for load testing; this also turns off login throttling
+    RATELIMIT_ENABLED = _env_bool('RATELIMIT_ENABLED', True)
+    # Upload GC: files younger than this are never touched (an upload may not
+    # have its ItemImage row yet); quarantined files are deleted after the grace.
+    # The quarantine is kept outside app/static, where it would be public
+    UPLOAD_GC_MIN_AGE_HOURS = _env_int('UPLOAD_GC_MIN_AGE_HOURS', 1)
+    UPLOAD_GC_GRACE_DAYS = _env_int('UPLOAD_GC_GRACE_DAYS', 7)
+    UPLOAD_GC_QUARANTINE_DIR = os.environ.get('UPLOAD_GC_QUARANTINE_DIR') or \
+        os.path.join(instance_dir, 'upload_quarantine')
 
-config = Config()
-
+def ensure_instance_dir():
+    """Create the instance folder holding the default SQLite database"""
+    os.makedirs(Config.instance_dir, exist_ok=True)
 
+config = Config()
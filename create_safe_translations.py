@@ -4,74 +4,14 @@ Create safe translation files without encoding issues
 """
 
 import os
-import struct
 
 def create_simple_mo_file(translations, output_path):
-    """Create a simple .mo file from translations dictionary"""
+    """Create a .mo file (with hash table) from translations dictionary"""
+    from compile_translations import write_mo
     
-    # Prepare data
-    keys = sorted(translations.keys())
-    values = [translations[key] for key in keys]
-    
-    # Encode strings
-    kencoded = [key.encode('utf-8') for key in keys]
-    vencoded = [value.encode('utf-8') for value in values]
-    
-    # Calculate offsets
-    keystart = 7 * 4 + 16 * len(keys)
-    valuestart = keystart + sum(len(k) + 1 for k in kencoded)
-    
-    koffsets = []
-    voffsets = []
-    
-    # Key offsets
-    offset = keystart
-    for k in kencoded:
-        koffsets.append(offset)
-        offset += len(k) + 1
-    
-    # Value offsets  
-    offset = valuestart
-    for v in vencoded:
-        voffsets.append(offset)
-        offset += len(v) + 1
-    
-    # Write .mo file
-    with open(output_path, 'wb') as f:
-        # Magic number
-        f.write(struct.pack('<I', 0x950412de))
-        # Version
-        f.write(struct.pack('<I', 0))
-        # Number of entries
-        f.write(struct.pack('<I', len(keys)))
-        # Offset of key table
-        f.write(struct.pack('<I', 7 * 4))
-        # Offset of value table
-        f.write(struct.pack('<I', 7 * 4 + 8 * len(keys)))
-        # Hash table size (unused)
-        f.write(struct.pack('<I', 0))
-        # Hash table offset (unused)
-        f.write(struct.pack('<I', 0))
-        
-        # Key table
-        for i, key in enumerate(keys):
-            f.write(struct.pack('<I', len(kencoded[i])))
-            f.write(struct.pack('<I', koffsets[i]))
-        
-        # Value table
-        for i, key in enumerate(keys):
-            f.write(struct.pack('<I', len(vencoded[i])))
-            f.write(struct.pack('<I', voffsets[i]))
-        
-        # Keys
-        for k in kencoded:
-            f.write(k)
-            f.write(b'\x00')
-        
-        # Values
-        for v in vencoded:
-            f.write(v)
-            f.write(b'\x00')
+    messages = {'': 'Content-Type: text/plain; charset=UTF-8\n'}
+    messages.update(translations)
+    write_mo(messages, output_path)
 
 def create_safe_translations():
     """Create safe translation files for all supported languages"""
@@ -4,15 +4,33 @@ set -e
 # Run database initialization script
 python init_db.py
 
-# Run Gunicorn with optimized settings
-exec gunicorn \
-    --bind 0.0.0.0:5000 \
-    --workers 2 \
-    --worker-class sync \
-    --worker-connections 1000 \
-    --max-requests 1000 \
-    --max-requests-jitter 100 \
-    --timeout 30 \
-    --keep-alive 2 \
-    --preload \
-    run:app
\ No newline at end of file
+# Garbage-collect orphaned uploads in the background (UPLOAD_GC_INTERVAL=0 disables)
+UPLOAD_GC_INTERVAL="${UPLOAD_GC_INTERVAL:-86400}"
+if [ "$UPLOAD_GC_INTERVAL" -gt 0 ]; then
+    (while sleep "$UPLOAD_GC_INTERVAL"; do python gc_uploads.py || true; done) &
+fi
+
+# Back up the database and uploads into BACKUP_DIR every BACKUP_INTERVAL seconds, if set
+if [ "${BACKUP_INTERVAL:-0}" -gt 0 ]; then
+    (while sleep "$BACKUP_INTERVAL"; do python backup.py >/dev/null || true; done) &
+fi
+
+# Move items sold more than ARCHIVE_AFTER_DAYS ago into the archive, if set
+ARCHIVE_INTERVAL="${ARCHIVE_INTERVAL:-86400}"
+if [ -n "$ARCHIVE_AFTER_DAYS" ] && [ "$ARCHIVE_INTERVAL" -gt 0 ]; then
+    (while true; do python archive_items.py >/dev/null || true; sleep "$ARCHIVE_INTERVAL"; done) &
+fi
+
+# Refresh the static catalog export, if enabled, to pick up views
+# (admin writes refresh it right away)
+if [ -n "$STATIC_EXPORT_DIR" ]; then
+    python export_static.py --full || true
+    STATIC_EXPORT_INTERVAL="${STATIC_EXPORT_INTERVAL:-60}"
+    if [ "$STATIC_EXPORT_INTERVAL" -gt 0 ]; then
+        (while sleep "$STATIC_EXPORT_INTERVAL"; do python export_static.py >/dev/null || true; done) &
+    fi
+fi
+
+# Run Gunicorn; worker class and counts are picked by serving_profiles.py
+# (override with SERVING_PROFILE, WEB_CONCURRENCY, GUNICORN_THREADS)
+exec gunicorn --config gunicorn.conf.py run:app
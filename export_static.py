@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Export the public catalog page as static files, one per locale and sort.
+
+Usage:
+    python export_static.py                     # into STATIC_EXPORT_DIR
+    python export_static.py /srv/flea-static    # into the given directory
+    python export_static.py --full              # render every page
+
+Only the pages that changed since the last export are rendered again (see
+app/static_export.py), so this is cheap to run every minute. With
+STATIC_EXPORT_DIR set, the Docker entrypoint runs it every
+STATIC_EXPORT_INTERVAL seconds (default 60) to pick up views, and admin
+writes trigger it right away. See the README for the nginx configuration.
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the catalog page as static files.')
+    parser.add_argument('out_dir', nargs='?', help='export directory (default: STATIC_EXPORT_DIR)')
+    parser.add_argument('--full', action='store_true', help='render every page, not just the changed ones')
+    args = parser.parse_args()
+
+    app = create_app()
+    out_dir = args.out_dir or app.config['STATIC_EXPORT_DIR']
+    if not out_dir:
+        print("❌ Give an export directory or set STATIC_EXPORT_DIR")
+        return False
+    with app.app_context():
+        from app.static_export import export_locked
+        report = export_locked(out_dir, full=args.full)
+
+    print(f"📄 Rendered {report['rendered']} of {report['pages']} pages into {out_dir}, "
+          f"{report['written']} changed")
+    return True
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
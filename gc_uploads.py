@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Find image files in the upload folder that no item uses and clean them up.
+
+Usage:
+    python gc_uploads.py                 # quarantine orphans, purge expired quarantine
+    python gc_uploads.py --dry-run       # only report what would happen
+    python gc_uploads.py --grace-days 0  # delete quarantined files right away
+
+Orphans are moved to UPLOAD_GC_QUARANTINE_DIR (default
+instance/upload_quarantine) first and deleted only after
+UPLOAD_GC_GRACE_DAYS (default 7); a quarantined file that an item
+references again is put back. Files younger than UPLOAD_GC_MIN_AGE_HOURS
+(default 1) are left alone. The Docker entrypoint runs this every
+UPLOAD_GC_INTERVAL seconds (default one day, 0 disables).
+"""
+
+import argparse
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+
+def format_bytes(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+def main():
+    parser = argparse.ArgumentParser(description='Garbage-collect orphaned upload files.')
+    parser.add_argument('--dry-run', action='store_true', help='report only, move and delete nothing')
+    parser.add_argument('--chunk-size', type=int, default=500, help='files checked per database query')
+    parser.add_argument('--min-age-hours', type=float, help='skip files modified more recently than this')
+    parser.add_argument('--grace-days', type=float, help='days a file stays in quarantine before deletion')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        from app.upload_gc import collect_garbage
+        report = collect_garbage(
+            chunk_size=args.chunk_size,
+            min_age=None if args.min_age_hours is None else args.min_age_hours * 3600,
+            grace=None if args.grace_days is None else args.grace_days * 86400,
+            dry_run=args.dry_run,
+        )
+
+    moved, deleted = ('🔍 Would quarantine', '🔍 Would delete') if args.dry_run else ('🧹 Quarantined', '🧹 Deleted')
+    print(f"📂 Scanned {report['scanned']} upload files "
+          f"({report['referenced']} in use, {report['too_young']} too new to check)")
+    print(f"{moved} {report['quarantined']} orphaned files ({format_bytes(report['quarantined_bytes'])})")
+    if report['restored']:
+        print(f"♻️  Restored {report['restored']} quarantined files that are in use again")
+    print(f"{deleted} {report['deleted']} expired quarantined files, "
+          f"reclaiming {format_bytes(report['reclaimed_bytes'])}")
+    for error in report['errors']:
+        print(f"  ⚠️  {error}")
+    return not report['errors']
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration. Worker class and counts come from serving_profiles.
+"""
+
+import os
+from serving_profiles import select_profile
+
+_profile = select_profile()
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+worker_class = _profile['worker_class']
+workers = _profile['workers']
+threads = _profile['threads']
+
+max_requests = 1000
+max_requests_jitter = 100
+timeout = 30
+keepalive = 2
+preload_app = True
+
+def on_starting(server):
+    server.log.info(
+        f"Serving profile {_profile['profile']}: {workers} worker(s) x "
+        f"{threads} thread(s), class {worker_class}"
+    )
@@ -1,38 +1,73 @@
+"""
+Database initialization, run at every container start.
+
+The common case (an existing, up-to-date database) is answered by a single
+query against the schema_version stamp, without building the Flask app.
+Only a missing or outdated schema takes the full path: create tables, apply
+migrations, seed the admin user, demo item and site settings, then stamp.
+
+Usage:
+    python init_db.py            # fast check, initialize only if needed
+    python init_db.py --force    # always run the full initialization
+"""
+
 import os
-from app import create_app, db
+import sqlite3
+import sys
 
 from dotenv import load_dotenv
 load_dotenv()
 
-app = create_app()
-app.app_context().push()
+from config import Config
+from schema import SCHEMA_VERSION, read_schema_version, stamp_schema_version, upgrade_schema
+
+def stamped_version():
+    """Read the schema version with a single query.
+
+    SQLite files are read with the sqlite3 module directly; other databases
+    go through a throwaway SQLAlchemy engine.
+    """
+    uri = Config.SQLALCHEMY_DATABASE_URI
+    if uri.startswith('sqlite:///'):
+        db_path = uri.replace('sqlite:///', '', 1)
+        if not os.path.exists(db_path):
+            return None
+        connection = sqlite3.connect(db_path)
+        try:
+            return connection.execute('SELECT version FROM schema_version').fetchone()[0]
+        except (sqlite3.OperationalError, TypeError):
+            return None
+        finally:
+            connection.close()
 
-# Import models AFTER app context is pushed, but BEFORE db.create_all()
-from app.models import User, Item, ItemImage, SiteSettings, UserSession, FailedLoginAttempt
-from sqlalchemy import inspect
+    from sqlalchemy import create_engine
+    engine = create_engine(uri)
+    try:
+        with engine.connect() as connection:
+            return read_schema_version(connection)
+    finally:
+        engine.dispose()
 
-db_path = app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
-print("DB Path: " + db_path)
+def initialize_database(version):
+    """Create or upgrade the schema and seed default data"""
+    from app import create_app, db
 
-db_exists = os.path.exists(db_path)
-inspector = inspect(db.engine)
-tables = inspector.get_table_names()
-print(f"Tables found before create_all: {tables}")
+    app = create_app()
+    app.app_context().push()
 
-if not db_exists or not tables:
+    # Import models AFTER app context is pushed, but BEFORE db.create_all()
+    from app.models import User, Item, ItemImage, SiteSettings, UserSession, FailedLoginAttempt
+
+    print(f"Database: {db.engine.url.render_as_string(hide_password=True)}")
+    print(f"Schema version found: {version}, expected: {SCHEMA_VERSION}")
+
+    # create_all only adds missing tables, so it is safe on existing databases
     db.create_all()
-    print("Database created.")
-    # Refresh inspector and tables after creation
-    inspector = inspect(db.engine)
-    tables = inspector.get_table_names()
-    print(f"Tables found after create_all: {tables}")
-else:
-    print("Database file and tables found, skipping create_all.")
-
-if 'user' in tables:
-    first_user = User.query.first()
-    print(f"First user in DB: {first_user}")
-    if first_user is None:
+    with db.engine.begin() as connection:
+        upgrade_schema(connection, version or 0)
+    print("Tables created/upgraded.")
+
+    if User.query.first() is None:
         admin_username = os.getenv('ADMIN_USERNAME', 'admin')
         admin_password = os.getenv('ADMIN_PASSWORD', 'demo')
 
@@ -43,64 +78,76 @@ if 'user' in tables:
         print(f"Admin user '{admin_username}' created.")
     else:
         print("Admin user exists, skipping creation.")
-else:
-    print("User table does not exist!")
-
-if 'item' in tables and Item.query.first() is None:
-    demo_item = Item(
-        name="Vacker vas",
-        description="En vacker vas i keramik, perfekt för blommor eller som dekoration.",
-        price=120.00,
-        is_sold=False
-    )
-    db.session.add(demo_item)
-    db.session.commit()
-    print("Demo item created.")
-
-    # Add image if ItemImage model is used
-    demo_image_path = "demo.jpg"  # relative to static folder if you use url_for('static', ...)
-    if os.path.exists(os.path.join(app.root_path, 'static', demo_image_path)):
-        demo_image = ItemImage(
-            filename="demo.jpg",
-            item_id=demo_item.id
+
+    if Item.query.first() is None:
+        demo_item = Item(
+            name="Vacker vas",
+            description="En vacker vas i keramik, perfekt för blommor eller som dekoration.",
+            price=120.00,
+            is_sold=False
+        )
+        db.session.add(demo_item)
+        db.session.commit()
+        print("Demo item created.")
+
+        # Add image if ItemImage model is used
+        demo_image_path = "demo.jpg"  # relative to static folder if you use url_for('static', ...)
+        if os.path.exists(os.path.join(app.root_path, 'static', demo_image_path)):
+            from app.images import file_placeholder
+            demo_image = ItemImage(
+                filename="demo.jpg",
+                item_id=demo_item.id,
+                **file_placeholder(os.path.join(app.root_path, 'static', demo_image_path))
+            )
+            db.session.add(demo_image)
+            db.session.commit()
+            print("Demo image linked to demo item.")
+        else:
+            print("Demo image not found, skipping image link.")
+    else:
+        print("Demo item already exists.")
+
+    # Initialize site settings
+    if SiteSettings.query.first() is None:
+        # Get values from environment variables if they exist for migration
+        site_name = os.getenv('SITE_NAME', '')
+        whatsapp = os.getenv('WHATSAPP_NUMBER', '')
+        address = os.getenv('APARTMENT_ADDRESS', '')
+
+        # Create contact info from env variables
+        contact_parts = []
+        if whatsapp:
+            contact_parts.append(f"Telefon/WhatsApp: {whatsapp}")
+        if address:
+            contact_parts.append(f"Adress: {address}")
+        if site_name and 'BRF' not in site_name:  # Skip if it's the example value
+            contact_parts.append(f"Kontakt: {site_name}")
+
+        contact_info = '\n'.join(contact_parts) if contact_parts else 'Kontakta oss för mer information.'
+
+        default_settings = SiteSettings(
+            site_name='Vår egen Loppis',
+            welcome_message='Hej och Välkommen',
+            general_info='Vi rensar ut några saker vi inte längre behöver – och det kan vara precis vad du letar efter. Från användbara vardagssaker till saker som kan ge lite extra glädje, hoppas vi att du hittar något här som passar dig. Ta en titt och hör gärna av dig om något fångar ditt öga!',
+            contact_info=contact_info
         )
-        db.session.add(demo_image)
+        db.session.add(default_settings)
         db.session.commit()
-        print("Demo image linked to demo item.")
+        print("Default site settings created.")
     else:
-        print("Demo image not found, skipping image link.")
-
-else:
-    print("Demo item already exists or item table missing.")
-
-# Initialize site settings
-if 'site_settings' in tables and SiteSettings.query.first() is None:
-    # Get values from environment variables if they exist for migration
-    site_name = os.getenv('SITE_NAME', '')
-    whatsapp = os.getenv('WHATSAPP_NUMBER', '')
-    address = os.getenv('APARTMENT_ADDRESS', '')
-    
-    # Create contact info from env variables
-    contact_parts = []
-    if whatsapp:
-        contact_parts.append(f"Telefon/WhatsApp: {whatsapp}")
-    if address:
-        contact_parts.append(f"Adress: {address}")
-    if site_name and 'BRF' not in site_name:  # Skip if it's the example value
-        contact_parts.append(f"Kontakt: {site_name}")
-    
-    contact_info = '\n'.join(contact_parts) if contact_parts else 'Kontakta oss för mer information.'
-    
-    default_settings = SiteSettings(
-        site_name='Vår egen Loppis',
-        welcome_message='Hej och Välkommen',
-        general_info='Vi rensar ut några saker vi inte längre behöver – och det kan vara precis vad du letar efter. Från användbara vardagssaker till saker som kan ge lite extra glädje, hoppas vi att du hittar något här som passar dig. Ta en titt och hör gärna av dig om något fångar ditt öga!',
-        contact_info=contact_info
-    )
-    db.session.add(default_settings)
-    db.session.commit()
-    print("Default site settings created.")
-else:
-    print("Site settings already exist or table missing.")
-
-print("Initialization complete.")
+        print("Site settings already exist.")
+
+    with db.engine.begin() as connection:
+        stamp_schema_version(connection)
+    print(f"Schema stamped at version {SCHEMA_VERSION}.")
+
+def main(force=False):
+    version = stamped_version()
+    if not force and version is not None and version >= SCHEMA_VERSION:
+        print(f"Schema version {version} is current, skipping initialization.")
+        return
+    initialize_database(version)
+    print("Initialization complete.")
+
+if __name__ == '__main__':
+    main(force='--force' in sys.argv[1:])
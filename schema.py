@@ -0,0 +1,123 @@
+"""
+Schema version stamp used for the fast startup check.
+
+init_db.py reads the stamp with a single query and only builds the app,
+runs create_all() and applies migrations when the stamp is missing or older
+than SCHEMA_VERSION. Bump SCHEMA_VERSION whenever models change and add a
+migration for databases created by older releases.
+
+SQLAlchemy is imported inside the functions: importing it costs more than the
+check itself, and init_db.py reads SQLite stamps with the sqlite3 module.
+"""
+
+SCHEMA_VERSION = 10
+
+# version -> callable(connection) upgrading a database from version - 1.
+# Fresh databases are built at the latest version by create_all(), so these
+# only run for existing databases and must be idempotent.
+def _index_item_image_filename(connection):
+    # Lets the upload GC and file sweep check references without a table scan
+    create_index_if_missing(connection, 'item_image', 'ix_item_image_filename', ['filename'])
+
+def _add_trending_score(connection):
+    # Existing items start at 0 and rank by the views they get from now on
+    add_column_if_missing(connection, 'item', 'trending_score', 'FLOAT DEFAULT 0')
+    create_index_if_missing(connection, 'item', 'ix_item_trending_score', ['trending_score'])
+    add_column_if_missing(connection, 'site_settings', 'trending_epoch', 'DATETIME')
+
+def _add_search_text(connection):
+    # create_all() has made the item_trigram table; fill it and search_text
+    from app.search import rebuild_search_index
+    add_column_if_missing(connection, 'item', 'search_text', 'TEXT')
+    rebuild_search_index(connection)
+
+def _index_item_filters(connection):
+    create_index_if_missing(connection, 'item', 'ix_item_price', ['price'])
+    create_index_if_missing(connection, 'item', 'ix_item_is_sold_price', ['is_sold', 'price'])
+
+def _add_image_placeholders(connection):
+    add_column_if_missing(connection, 'item_image', 'blurhash', 'VARCHAR(64)')
+    add_column_if_missing(connection, 'item_image', 'dominant_color', 'VARCHAR(7)')
+    from app.images import backfill_placeholders
+    backfill_placeholders(connection)
+
+def _add_sold_at(connection):
+    # create_all() has made the archive tables. Items already sold count as
+    # sold now, so the first archival run leaves them for ARCHIVE_AFTER_DAYS
+    from datetime import datetime
+    from sqlalchemy import text
+    add_column_if_missing(connection, 'item', 'sold_at', 'DATETIME')
+    create_index_if_missing(connection, 'item', 'ix_item_sold_at', ['sold_at'])
+    connection.execute(text('UPDATE item SET sold_at = :now WHERE is_sold AND sold_at IS NULL'),
+                       {'now': datetime.utcnow()})
+
+def _add_user_version(connection):
+    add_column_if_missing(connection, 'user', 'user_version', 'INTEGER NOT NULL DEFAULT 0')
+
+def _autoincrement_item_event(connection):
+    # A plain INTEGER PRIMARY KEY reuses ids once every event is pruned, and
+    # running event hubs would take the new events for ones they have seen
+    from sqlalchemy import text
+    if connection.dialect.name != 'sqlite':
+        return
+    ddl = connection.execute(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'item_event'")).scalar()
+    if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+        return
+    from app.models import ItemEvent
+    connection.execute(text('ALTER TABLE item_event RENAME TO item_event_old'))
+    connection.execute(text('DROP INDEX IF EXISTS ix_item_event_created_at'))
+    ItemEvent.__table__.create(connection)
+    connection.execute(text('INSERT INTO item_event (id, item_id, kind, payload, created_at) '
+                            'SELECT id, item_id, kind, payload, created_at FROM item_event_old'))
+    connection.execute(text('DROP TABLE item_event_old'))
+
+# Version 3 only adds the item_event table, which create_all() creates
+MIGRATIONS = {
+    2: _index_item_image_filename,
+    4: _add_trending_score,
+    5: _add_search_text,
+    6: _index_item_filters,
+    7: _add_image_placeholders,
+    8: _add_sold_at,
+    9: _add_user_version,
+    10: _autoincrement_item_event,
+}
+
+def read_schema_version(connection):
+    """Return the stamped schema version, or None if the database has no stamp"""
+    from sqlalchemy import text
+    from sqlalchemy.exc import DBAPIError
+    try:
+        return connection.execute(text('SELECT version FROM schema_version')).scalar()
+    except DBAPIError:
+        connection.rollback()
+        return None
+
+def stamp_schema_version(connection, version=SCHEMA_VERSION):
+    """Record the schema version the database now matches"""
+    from sqlalchemy import text
+    connection.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)'))
+    connection.execute(text('DELETE FROM schema_version'))
+    connection.execute(text('INSERT INTO schema_version (version) VALUES (:version)'), {'version': version})
+
+def upgrade_schema(connection, from_version):
+    """Apply migrations after from_version up to SCHEMA_VERSION"""
+    for version in range(from_version + 1, SCHEMA_VERSION + 1):
+        migration = MIGRATIONS.get(version)
+        if migration:
+            migration(connection)
+
+def add_column_if_missing(connection, table, column, ddl):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    from sqlalchemy import inspect, text
+    columns = {c['name'] for c in inspect(connection).get_columns(table)}
+    if column not in columns:
+        connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {column} {ddl}'))
+
+def create_index_if_missing(connection, table, name, columns):
+    """CREATE INDEX unless an index with that name already exists"""
+    from sqlalchemy import inspect, text
+    indexes = {i['name'] for i in inspect(connection).get_indexes(table)}
+    if name not in indexes:
+        connection.execute(text(f"CREATE INDEX {name} ON {table} ({', '.join(columns)})"))
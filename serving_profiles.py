@@ -0,0 +1,98 @@
+"""
+Gunicorn serving profiles sized from the container's CPU and memory.
+
+Profiles:
+    sync     one request per worker process; many workers (2 x CPU + 1)
+    gthread  fewer processes, each with a thread pool, so a slow upload
+             only occupies one thread instead of a whole worker
+    auto     sync when memory allows the full 2 x CPU + 1 workers,
+             otherwise gthread to get concurrency from threads
+
+Environment:
+    SERVING_PROFILE     auto | sync | gthread (default auto)
+    WEB_CONCURRENCY     explicit worker count, overrides the calculation
+    GUNICORN_THREADS    threads per gthread worker (default 4)
+    WORKER_MEMORY_MB    expected RSS of one worker (default 150)
+"""
+
+import os
+
+PROFILES = ('auto', 'sync', 'gthread')
+
+def cpu_count():
+    """CPUs available to this process, honouring cgroup quotas in containers"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+
+    # cgroup v2 CPU quota, e.g. "200000 100000" for 2 CPUs
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+def memory_mb():
+    """Memory available to this process in MB (cgroup limit or physical RAM)"""
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            return int(limit) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return 1024
+
+def select_profile(profile=None, cpus=None, mem_mb=None):
+    """
+    Pick worker class, worker count and threads for the given resources.
+
+    Returns a dict with 'profile', 'worker_class', 'workers' and 'threads'.
+    """
+    profile = (profile or os.environ.get('SERVING_PROFILE', 'auto')).lower()
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown serving profile: {profile} (expected one of {', '.join(PROFILES)})")
+
+    cpus = cpus or cpu_count()
+    mem_mb = mem_mb or memory_mb()
+    worker_mb = int(os.environ.get('WORKER_MEMORY_MB', 150))
+
+    # Leave a quarter of memory for the master, page cache and image decoding spikes
+    max_by_memory = max(1, int(mem_mb * 0.75) // worker_mb)
+    sync_workers = min(2 * cpus + 1, max_by_memory)
+
+    if profile == 'auto':
+        profile = 'sync' if sync_workers >= 2 * cpus + 1 else 'gthread'
+
+    if profile == 'sync':
+        workers, threads = sync_workers, 1
+    else:
+        workers = min(cpus + 1, max_by_memory)
+        threads = max(1, int(os.environ.get('GUNICORN_THREADS', 4)))
+
+    if os.environ.get('WEB_CONCURRENCY'):
+        workers = max(1, int(os.environ['WEB_CONCURRENCY']))
+
+    return {
+        'profile': profile,
+        'worker_class': profile,
+        'workers': workers,
+        'threads': threads,
+    }
+
+if __name__ == '__main__':
+    print(f"CPUs: {cpu_count()}, memory: {memory_mb()} MB")
+    for name in PROFILES:
+        print(f"{name:8} -> {select_profile(name)}")
@@ -61,6 +61,34 @@ def test_fallback_system():
         print(f"❌ Fallback system error: {e}")
         return False
 
+def test_catalog_lookup():
+    """Test the merged in-memory catalogs used by templates"""
+    print("\n🧪 Testing in-memory catalogs...")
+    
+    try:
+        from app.catalogs import load_catalogs, translate
+        
+        load_catalogs('app/translations', ['sv', 'en', 'sk', 'cs'])
+        test_cases = [
+            ('Contact', 'sv', 'Kontakt'),
+            ('Clear search', 'cs', 'Vymazat vyhledávání'),
+            ('Untranslated text', 'sk', 'Untranslated text'),
+        ]
+        
+        for text, lang, expected in test_cases:
+            result = translate(text, lang)
+            if result == expected:
+                print(f"✅ {lang}: '{text}' → '{result}'")
+            else:
+                print(f"❌ {lang}: '{text}' → '{result}' (expected '{expected}')")
+                return False
+        
+        return True
+        
+    except Exception as e:
+        print(f"❌ Catalog error: {e}")
+        return False
+
 def test_flask_integration():
     """Test Flask app with translations"""
     print("\n🧪 Testing Flask integration...")
@@ -103,6 +131,7 @@ def main():
     tests = [
         ("Translation Files", test_translation_files),
         ("Fallback System", test_fallback_system),
+        ("Catalog Lookup", test_catalog_lookup),
         ("Flask Integration", test_flask_integration)
     ]
     
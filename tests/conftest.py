@@ -0,0 +1,90 @@
+"""
+Shared fixtures: a fresh app per test on its own SQLite file and upload
+folder, with the tables created and one admin user.
+
+Run from the repository root with `python -m pytest`.
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    # Config reads the environment at import, so override its attributes
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setattr(Config, 'TESTING', True, raising=False)
+    monkeypatch.setattr(Config, 'RATELIMIT_ENABLED', False)
+    monkeypatch.setattr(Config, 'BACKUP_DIR', str(tmp_path / 'backup'))
+    monkeypatch.setattr(Config, 'UPLOAD_GC_QUARANTINE_DIR', str(tmp_path / 'quarantine'))
+    monkeypatch.chdir(tmp_path)
+
+    from app import create_app, db
+    from app.models import User
+
+    app = create_app()
+    app.config['UPLOAD_FOLDER'] = str(tmp_path / 'uploads')
+    os.makedirs(app.config['UPLOAD_FOLDER'])
+    with app.app_context():
+        db.create_all()
+        user = User(username='admin')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def admin_client(client):
+    """Test client logged in as the admin user"""
+    response = client.post('/auth/login', data={'username': 'admin', 'password': 'secret'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def add_item(app):
+    """Create an item directly in the database, as the admin views would"""
+    from app import db
+    from app.events import record_catalog_event
+    from app.models import Item
+
+    def add_item(name='Chair', price=10, **fields):
+        with app.app_context():
+            item = Item(name=name, price=price, **fields)
+            db.session.add(item)
+            db.session.flush()
+            record_catalog_event('new')
+            db.session.commit()
+            return item.id
+
+    return add_item
+
+
+@pytest.fixture
+def jpeg():
+    """JPEG bytes of a small solid image"""
+    from PIL import Image
+
+    def jpeg(color='red', size=(40, 30)):
+        buffer = io.BytesIO()
+        Image.new('RGB', size, color).save(buffer, 'JPEG')
+        return buffer.getvalue()
+
+    return jpeg
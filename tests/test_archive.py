@@ -0,0 +1,81 @@
+"""Archive of items sold long ago (app/archive.py)"""
+
+import os
+from datetime import datetime, timedelta
+
+from app import db
+from app.archive import archive_sold_items, archived_items_query, restore_item
+from app.file_sweep import wait_for_sweep
+from app.models import ArchivedItem, Item, ItemEvent, ItemImage, ItemTrigram
+
+
+def sold_days_ago(app, item_id, days):
+    with app.app_context():
+        item = db.session.get(Item, item_id)
+        item.is_sold = True
+        item.sold_at = datetime.utcnow() - timedelta(days=days)
+        db.session.commit()
+
+
+def test_sold_at_follows_is_sold(app, add_item):
+    item_id = add_item()
+    with app.app_context():
+        item = db.session.get(Item, item_id)
+        assert item.sold_at is None
+        item.is_sold = True
+        db.session.commit()
+        assert item.sold_at is not None
+        item.is_sold = False
+        db.session.commit()
+        assert item.sold_at is None
+
+
+def test_archives_only_items_sold_long_ago(app, add_item):
+    old, recent, unsold = add_item('Old'), add_item('Recent'), add_item('Unsold')
+    sold_days_ago(app, old, 40)
+    sold_days_ago(app, recent, 5)
+    with app.app_context():
+        assert archive_sold_items(30, dry_run=True)['archived'] == 1
+        assert archive_sold_items(0)['archived'] == 0
+        assert archive_sold_items(30)['archived'] == 1
+        assert sorted(item.id for item in Item.query.all()) == [recent, unsold]
+        assert [item.name for item in db.session.scalars(archived_items_query('old'))] == ['Old']
+        assert db.session.scalar(db.select(db.func.count()).select_from(ItemTrigram)
+                                 .where(ItemTrigram.item_id == old)) == 0
+        kinds = db.session.scalars(db.select(ItemEvent.kind).where(ItemEvent.item_id == old)).all()
+        assert kinds[-1] == 'removed'
+
+
+def test_prune_keeps_only_the_primary_image(app, add_item):
+    folder = app.config['UPLOAD_FOLDER']
+    item_id = add_item()
+    with app.app_context():
+        for n, primary in ((1, True), (2, False)):
+            db.session.add(ItemImage(item_id=item_id, filename=f'{n}.jpg', is_primary=primary))
+            with open(os.path.join(folder, f'{n}.jpg'), 'wb') as f:
+                f.write(b'x')
+        db.session.commit()
+    sold_days_ago(app, item_id, 40)
+    with app.app_context():
+        assert archive_sold_items(30, prune_images=True)['pruned_images'] == 1
+        archived = db.session.scalars(db.select(ArchivedItem)).one()
+        assert [image.filename for image in archived.images] == ['1.jpg']
+    wait_for_sweep()
+    assert os.path.exists(os.path.join(folder, '1.jpg'))
+    assert not os.path.exists(os.path.join(folder, '2.jpg'))
+
+
+def test_restore_returns_item_to_catalog(app, admin_client, add_item):
+    item_id = add_item('Lamp', view_count=7)
+    sold_days_ago(app, item_id, 40)
+    with app.app_context():
+        archive_sold_items(30)
+        archived_id = db.session.scalars(db.select(ArchivedItem.id)).one()
+    assert admin_client.post(f'/admin/archive/{archived_id}/restore').status_code == 302
+    with app.app_context():
+        item = Item.query.filter_by(name='Lamp').one()
+        assert item.is_sold and item.view_count == 7
+        # The archive clock starts over
+        assert datetime.utcnow() - item.sold_at < timedelta(minutes=1)
+        assert db.session.get(ArchivedItem, archived_id) is None
+        assert restore_item(archived_id) is None
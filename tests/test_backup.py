@@ -0,0 +1,126 @@
+"""Online backup, verification and restore (app/backup.py)"""
+
+import os
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app, db
+from app.backup import BackupError, create_backup, restore_backup, verify_backup
+from app.catalog import get_catalog
+from app.events import get_hub
+from app.models import Item, ItemEvent, ItemImage
+
+
+@pytest.fixture
+def backup_dir(tmp_path):
+    return str(tmp_path / 'bk')
+
+
+@pytest.fixture
+def cli(app):
+    """A second app on the same database, like a backup.py process next to the workers"""
+    cli = create_app()
+    cli.config['UPLOAD_FOLDER'] = app.config['UPLOAD_FOLDER']
+    yield cli
+    with cli.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def write_upload(app, name, data=b'image bytes'):
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], name), 'wb') as f:
+        f.write(data)
+
+
+def catalog_names(app):
+    with app.app_context():
+        return sorted(record.name for record in get_catalog().ordered('newest'))
+
+
+def test_backup_copies_database_and_uploads(app, add_item, backup_dir):
+    item_id = add_item('Lamp')
+    write_upload(app, 'lamp.jpg')
+    with app.app_context():
+        db.session.add(ItemImage(item_id=item_id, filename='lamp.jpg'))
+        db.session.commit()
+        report = create_backup(backup_dir)
+        assert report['copied'] == 1
+        assert report['database']['items'] == 1
+        assert verify_backup(backup_dir)['ok']
+        # Nothing changed, nothing copied again
+        assert create_backup(backup_dir)['copied'] == 0
+
+
+def test_verify_detects_damaged_upload(app, backup_dir):
+    write_upload(app, 'a.jpg')
+    with app.app_context():
+        create_backup(backup_dir)
+        with open(os.path.join(backup_dir, 'uploads', 'a.jpg'), 'ab') as f:
+            f.write(b'x')
+        report = verify_backup(backup_dir)
+        assert not report['ok']
+        assert 'a.jpg' in report['problems'][0]
+        with pytest.raises(BackupError):
+            restore_backup(backup_dir)
+
+
+def test_restore_brings_back_database_and_uploads(app, add_item, backup_dir):
+    add_item('Kept')
+    write_upload(app, 'kept.jpg')
+    with app.app_context():
+        create_backup(backup_dir)
+    add_item('Added after the backup')
+    os.remove(os.path.join(app.config['UPLOAD_FOLDER'], 'kept.jpg'))
+    with app.app_context():
+        report = restore_backup(backup_dir)
+        assert report['restored'] == 1
+        assert [item.name for item in Item.query.all()] == ['Kept']
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], 'kept.jpg'))
+
+
+def test_restore_resyncs_running_workers(app, cli, add_item, backup_dir):
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Kept')
+    with cli.app_context():
+        create_backup(backup_dir)
+    # The worker sees events past the backup's newest event id
+    for n in range(3):
+        add_item(f'Lost {n}')
+    assert catalog_names(app) == ['Kept', 'Lost 0', 'Lost 1', 'Lost 2']
+    with app.app_context():
+        seen = get_hub().latest_id()
+
+    with cli.app_context():
+        restore_backup(backup_dir)
+
+    assert catalog_names(app) == ['Kept']
+    with app.app_context():
+        # Live clients that saw the replaced catalog are told to reload
+        assert get_hub().events_since(seen) is None
+    add_item('New')
+    assert catalog_names(app) == ['Kept', 'New']
+
+
+def test_restore_resyncs_workers_after_event_ids_restarted(app, cli, add_item, backup_dir):
+    """The replaced database lost its events and ids, as old databases did when pruned"""
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Kept')
+    with cli.app_context():
+        create_backup(backup_dir)
+    for n in range(3):
+        add_item(f'Lost {n}')
+    assert catalog_names(app) == ['Kept', 'Lost 0', 'Lost 1', 'Lost 2']
+    with app.app_context():
+        seen = get_hub().latest_id()
+        db.session.execute(db.delete(ItemEvent))
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        db.session.commit()
+
+    with cli.app_context():
+        restore_backup(backup_dir)
+        assert db.session.execute(db.select(db.func.max(ItemEvent.id))).scalar() < seen
+
+    assert catalog_names(app) == ['Kept']
+    with app.app_context():
+        assert get_hub().events_since(seen) is None
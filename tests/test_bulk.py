@@ -0,0 +1,63 @@
+"""Bulk admin actions (app/bulk.py)"""
+
+import os
+
+import pytest
+
+from app import db
+from app.bulk import apply_bulk_action
+from app.file_sweep import wait_for_sweep
+from app.models import Item, ItemEvent, ItemImage, ItemTrigram
+
+
+def bulk(client, action, item_ids, **fields):
+    data = {'action': action, 'item_ids': [str(item_id) for item_id in item_ids], **fields}
+    response = client.post('/admin/items/bulk', data=data)
+    assert response.status_code == 302
+
+
+def test_mark_sold_and_reprice(app, admin_client, add_item):
+    ids = [add_item(f'Item {n}', 100) for n in range(3)]
+    bulk(admin_client, 'mark_sold', ids[:2] + ['junk'])
+    bulk(admin_client, 'reprice', ids, percent='-25')
+    with app.app_context():
+        items = [db.session.get(Item, item_id) for item_id in ids]
+        assert [item.is_sold for item in items] == [True, True, False]
+        assert items[0].sold_at is not None and items[2].sold_at is None
+        assert [item.price for item in items] == [75.0] * 3
+        kinds = db.session.scalars(db.select(ItemEvent.kind).where(ItemEvent.item_id == ids[0])).all()
+        assert kinds[-2:] == ['sold', 'price']
+
+
+def test_invalid_reprice_changes_nothing(app, add_item):
+    item_id = add_item(price=100)
+    with app.app_context():
+        with pytest.raises(ValueError):
+            apply_bulk_action('reprice', [item_id], percent=-100)
+        assert db.session.get(Item, item_id).price == 100
+
+
+def test_delete_removes_rows_and_unshared_files(app, admin_client, add_item):
+    folder = app.config['UPLOAD_FOLDER']
+    ids = [add_item(f'Item {n}') for n in range(2)]
+    survivor = add_item('Survivor')
+    with app.app_context():
+        for n, item_id in enumerate(ids):
+            db.session.add(ItemImage(item_id=item_id, filename=f'{n}.jpg'))
+        # The first file is also used by an item that stays
+        db.session.add(ItemImage(item_id=survivor, filename='0.jpg'))
+        db.session.commit()
+    for n in range(2):
+        with open(os.path.join(folder, f'{n}.jpg'), 'wb') as f:
+            f.write(b'x')
+
+    bulk(admin_client, 'delete', ids)
+    wait_for_sweep()
+    assert os.path.exists(os.path.join(folder, '0.jpg'))
+    assert not os.path.exists(os.path.join(folder, '1.jpg'))
+    with app.app_context():
+        assert [item.id for item in Item.query.all()] == [survivor]
+        assert db.session.scalar(db.select(db.func.count()).select_from(ItemImage)
+                                 .where(ItemImage.item_id.in_(ids))) == 0
+        assert db.session.scalar(db.select(db.func.count()).select_from(ItemTrigram)
+                                 .where(ItemTrigram.item_id.in_(ids))) == 0
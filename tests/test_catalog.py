@@ -0,0 +1,66 @@
+"""The per-process catalog snapshot and the events it follows"""
+
+from app import db
+from app.models import ItemEvent
+
+
+def test_catalog_follows_item_events(app, client, add_item):
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Chair')
+    assert 'Chair' in client.get('/').get_data(as_text=True)
+    add_item('Table')
+    assert 'Table' in client.get('/').get_data(as_text=True)
+
+
+def test_catalog_without_item_event_table(app, client, add_item, caplog):
+    """A database from an older release, before init_db.py upgraded it"""
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Chair')
+    with app.app_context():
+        ItemEvent.__table__.drop(db.engine)
+
+    for _ in range(3):
+        response = client.get('/')
+        assert response.status_code == 200
+        assert 'Chair' in response.get_data(as_text=True)
+    # A streamed response: close it, or its request context outlives the test
+    with client.get('/events') as response:
+        assert response.status_code == 200
+    warnings = [record for record in caplog.records if 'item_event' in record.getMessage()]
+    assert len(warnings) == 1
+    assert not [record for record in caplog.records if record.exc_info]
+
+    # Once the table exists, events are picked up again
+    with app.app_context():
+        ItemEvent.__table__.create(db.engine)
+    add_item('Table')
+    assert 'Table' in client.get('/').get_data(as_text=True)
+
+
+def test_catalog_after_event_ids_start_over(app, add_item):
+    """Every event pruned from a database whose ids restart, then an item added and one sold"""
+    from sqlalchemy import text
+
+    from app.catalog import get_catalog
+    from app.events import record_item_event
+    from app.models import Item
+
+    app.config['SSE_POLL_SECONDS'] = 0
+    chair = add_item('Chair')
+    add_item('Lamp')
+    with app.app_context():
+        assert sorted(record.name for record in get_catalog().ordered('newest')) == ['Chair', 'Lamp']
+        db.session.execute(db.delete(ItemEvent))
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        db.session.commit()
+
+    add_item('Table')
+    with app.app_context():
+        item = db.session.get(Item, chair)
+        item.is_sold = True
+        record_item_event('sold', item)
+        db.session.commit()
+
+        records = {record.name: record for record in get_catalog().ordered('newest')}
+        assert sorted(records) == ['Chair', 'Lamp', 'Table']
+        assert records['Chair'].is_sold
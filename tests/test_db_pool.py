@@ -0,0 +1,87 @@
+"""Connection pooling and fork safety (gunicorn --preload)"""
+
+import os
+import threading
+
+import pytest
+from sqlalchemy import event
+
+import app as app_module
+from app import create_app, db
+from app.models import Item
+
+
+def tag_connections(app):
+    """Record in each new connection's pool info which process opened it"""
+    def tag(dbapi_connection, connection_record):
+        connection_record.info['opened_by'] = os.getpid()
+
+    with app.app_context():
+        event.listen(db.engine, 'connect', tag)
+
+
+def test_threads_share_pool_without_errors(app, add_item):
+    item_id = add_item()
+    errors = []
+
+    def worker():
+        try:
+            with app.app_context():
+                for i in range(20):
+                    if i % 5 == 0:
+                        db.session.execute(db.update(Item).where(Item.id == item_id)
+                                           .values(view_count=Item.view_count + 1))
+                        db.session.commit()
+                    else:
+                        Item.query.count()
+                db.session.remove()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    with app.app_context():
+        assert db.session.get(Item, item_id).view_count == 8 * 4
+
+
+def test_fork_hook_registered_once(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr(app_module, '_fork_hook_registered', False)
+    monkeypatch.setattr(os, 'register_at_fork', lambda **hooks: calls.append(hooks), raising=False)
+    second = create_app()
+    third = create_app()
+    assert len(calls) == 1
+    for each in (second, third):
+        with each.app_context():
+            assert db.engine in app_module._fork_engines
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_forked_child_opens_its_own_connection(app):
+    tag_connections(app)
+    with app.app_context():
+        connection = db.engine.raw_connection()  # opened before the fork
+        connection.close()  # back into the pool
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        status = b'0'
+        try:
+            with app.app_context():
+                connection = db.engine.raw_connection()
+                if connection.info.get('opened_by') == os.getpid():
+                    status = b'1'
+                connection.close()
+        finally:
+            os.write(write_fd, status)
+            os._exit(0)
+    os.close(write_fd)
+    status = os.read(read_fd, 1)
+    os.waitpid(pid, 0)
+    assert status == b'1'
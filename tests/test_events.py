@@ -0,0 +1,75 @@
+"""The per-process event hub and the item_event ids it follows"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app import db
+from app.events import get_hub
+from app.models import ItemEvent
+from schema import MIGRATIONS
+
+
+def age_events(app, minutes=120):
+    with app.app_context():
+        db.session.execute(db.update(ItemEvent).values(created_at=datetime.utcnow() - timedelta(minutes=minutes)))
+        db.session.commit()
+
+
+def test_pruning_every_event_keeps_running_workers_current(app, client, add_item):
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Chair')
+    add_item('Lamp')
+    assert 'Lamp' in client.get('/').get_data(as_text=True)
+
+    age_events(app)
+    with app.app_context():
+        get_hub()._prune(app.config['SSE_EVENT_RETENTION_MINUTES'])
+        # The newest event stays behind, so its id is never handed out again
+        assert db.session.execute(db.select(db.func.count(ItemEvent.id))).scalar() == 1
+    add_item('Table')
+    assert 'Table' in client.get('/').get_data(as_text=True)
+
+
+def test_hub_resets_when_ids_start_over(app, add_item):
+    app.config['SSE_POLL_SECONDS'] = 0
+    add_item('Chair')
+    add_item('Lamp')
+    with app.app_context():
+        hub = get_hub()
+        seen = hub.latest_id()
+        generation = hub.generation()
+        # As a database from before AUTOINCREMENT does once every event is pruned
+        db.session.execute(db.delete(ItemEvent))
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        db.session.commit()
+    add_item('Table')
+    with app.app_context():
+        hub = get_hub()
+        assert hub.latest_id() == 1 < seen
+        assert hub.generation() == generation + 1
+        assert hub.events_since(seen) is None
+        assert hub.events_since(1) == []
+
+
+def test_autoincrement_migration_keeps_events(app, add_item):
+    add_item('Chair')
+    with app.app_context():
+        with db.engine.begin() as connection:
+            connection.execute(text('DROP TABLE item_event'))
+            connection.execute(text(
+                'CREATE TABLE item_event (id INTEGER NOT NULL, item_id INTEGER, kind VARCHAR(16) NOT NULL, '
+                'payload TEXT NOT NULL, created_at DATETIME, PRIMARY KEY (id))'))
+            connection.execute(text('CREATE INDEX ix_item_event_created_at ON item_event (created_at)'))
+            connection.execute(text("INSERT INTO item_event (id, kind, payload) VALUES (7, 'new', '{}')"))
+        for _ in range(2):  # migrations must be idempotent
+            with db.engine.begin() as connection:
+                MIGRATIONS[10](connection)
+
+        ddl = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'item_event'")).scalar()
+        assert 'AUTOINCREMENT' in ddl
+        assert 'ix_item_event_created_at' in {i['name'] for i in db.inspect(db.engine).get_indexes('item_event')}
+        db.session.execute(db.delete(ItemEvent))
+        db.session.add(ItemEvent(kind='new', payload='{}'))
+        db.session.commit()
+        assert db.session.execute(db.select(ItemEvent.id)).scalar() == 8
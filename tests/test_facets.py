@@ -0,0 +1,47 @@
+"""Facet counts and the per-worker cache in front of them (app/facets.py)"""
+
+from sqlalchemy import text
+
+from app import db
+from app.events import record_item_event
+from app.facets import facet_counts, parse_filters
+from app.models import Item, ItemEvent
+
+
+def sell(item_id):
+    item = db.session.get(Item, item_id)
+    item.is_sold = True
+    record_item_event('sold', item)
+    db.session.commit()
+
+
+def availability(app):
+    with app.app_context():
+        counts = facet_counts('', parse_filters({}))
+        return counts['available'], counts['sold']
+
+
+def test_counts_follow_sales(app, add_item):
+    app.config['SSE_POLL_SECONDS'] = 0
+    chair = add_item('Chair')
+    add_item('Lamp')
+    assert availability(app) == (2, 0)
+    with app.app_context():
+        sell(chair)
+    assert availability(app) == (1, 1)
+
+
+def test_counts_after_event_ids_start_over(app, add_item):
+    """Every event pruned from a database whose ids restart"""
+    app.config['SSE_POLL_SECONDS'] = 0
+    chair = add_item('Chair')
+    lamp = add_item('Lamp')
+    assert availability(app) == (2, 0)
+    with app.app_context():
+        db.session.execute(db.delete(ItemEvent))
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        db.session.commit()
+        # As many events as before, so the last event id comes round again
+        sell(chair)
+        sell(lamp)
+    assert availability(app) == (0, 2)
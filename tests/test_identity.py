@@ -0,0 +1,78 @@
+"""Cached identities of logged-in users (app/identity.py)"""
+
+from datetime import datetime
+
+import pytest
+
+from app import create_app, db
+from app import identity
+from app.identity import invalidate_user
+from app.models import User, UserSession
+
+
+@pytest.fixture
+def second_worker(app, admin_client):
+    """Another app on the same database, sharing the admin's browser session"""
+    worker = create_app()
+    client = worker.test_client()
+    with admin_client.session_transaction() as original, client.session_transaction() as copy:
+        copy.update(original)
+    yield worker, client
+    with worker.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+def cached_usernames(app):
+    return [entry.user.username for entry in app.extensions['identity_cache']._entries.values()]
+
+
+def test_identity_is_cached(app, admin_client):
+    assert admin_client.get('/admin/dashboard').status_code == 200
+    assert cached_usernames(app) == ['admin']
+
+
+def test_invalidation_reaches_other_workers(app, admin_client, second_worker, monkeypatch):
+    monkeypatch.setattr(identity, 'VERSION_CHECK_SECONDS', 0)
+    worker, client = second_worker
+    assert client.get('/admin/dashboard').status_code == 200
+    assert cached_usernames(worker) == ['admin']
+
+    with app.app_context():
+        user = db.session.scalar(db.select(User).filter_by(username='admin'))
+        user.username = 'renamed'
+        invalidate_user(user.id)
+        db.session.commit()
+
+    assert client.get('/admin/dashboard').status_code == 200
+    assert cached_usernames(worker) == ['renamed']
+
+
+def test_password_change_bumps_user_version(app, admin_client):
+    response = admin_client.post('/admin/change-password', data={
+        'current_password': 'secret', 'new_password': 'changed', 'confirm_password': 'changed',
+    })
+    assert response.status_code == 302
+    with app.app_context():
+        user = db.session.scalar(db.select(User).filter_by(username='admin'))
+        assert user.user_version == 1
+        assert user.check_password('changed')
+
+
+def test_activity_is_not_written_to_ended_sessions(app, admin_client):
+    app.config['SESSION_ACTIVITY_INTERVAL'] = 0
+    long_ago = datetime(2020, 1, 1)
+    with app.app_context():
+        session = db.session.scalar(db.select(UserSession))
+        session.last_activity = long_ago
+        db.session.commit()
+    admin_client.get('/admin/dashboard')
+    with app.app_context():
+        session = db.session.scalar(db.select(UserSession))
+        assert session.last_activity > long_ago
+        session.last_activity = long_ago
+        session.is_active = False  # as a logout in another worker leaves it
+        db.session.commit()
+    admin_client.get('/admin/dashboard')
+    with app.app_context():
+        assert db.session.scalar(db.select(UserSession.last_activity)) == long_ago
@@ -0,0 +1,105 @@
+"""Image uploads and their placeholders (app/images.py)"""
+
+import io
+import os
+
+import pytest
+from PIL import Image
+
+from app import db
+from app.images import MAX_IMAGE_SIZE, ImageTooLarge, backfill_placeholders, save_upload_image
+from app.models import ItemImage
+from app.storage import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(str(tmp_path / 'store'))
+
+
+def saved_size(storage, filename):
+    with Image.open(storage.path(filename)) as image:
+        return image.size
+
+
+def test_large_jpeg_is_shrunk(app, storage, jpeg):
+    with app.app_context():
+        save_upload_image(io.BytesIO(jpeg(size=(4000, 3000))), 'big.jpg', storage)
+    assert saved_size(storage, 'big.jpg') == MAX_IMAGE_SIZE
+
+
+def test_exif_rotation_is_applied(app, storage, jpeg):
+    source = Image.open(io.BytesIO(jpeg(size=(1600, 1200))))
+    exif = source.getexif()
+    exif[0x0112] = 6  # rotated 90 degrees
+    buffer = io.BytesIO()
+    source.save(buffer, 'JPEG', exif=exif)
+    buffer.seek(0)
+    with app.app_context():
+        save_upload_image(buffer, 'rotated.jpg', storage)
+    assert saved_size(storage, 'rotated.jpg') == (450, 600)
+
+
+def test_image_over_pixel_limit_is_refused(storage):
+    buffer = io.BytesIO()
+    Image.new('RGB', (3000, 3000)).save(buffer, 'PNG')
+    buffer.seek(0)
+    with pytest.raises(ImageTooLarge):
+        save_upload_image(buffer, 'huge.png', storage, max_pixels=1_000_000)
+    assert not storage.exists('huge.png')
+
+
+def test_pixel_limit_comes_from_the_app_config(app, storage):
+    app.config['MAX_IMAGE_PIXELS'] = 1_000_000
+    buffer = io.BytesIO()
+    Image.new('RGB', (1500, 1000)).save(buffer, 'PNG')
+    buffer.seek(0)
+    with app.app_context(), pytest.raises(ImageTooLarge):
+        save_upload_image(buffer, 'wide.png', storage)
+
+
+def test_jpeg_is_decoded_reduced_within_the_limit(storage, jpeg):
+    # 17.3 MP on disk; draft mode decodes it at half size, 2400x1800
+    save_upload_image(io.BytesIO(jpeg(size=(4800, 3600))), 'draft.jpg', storage, max_pixels=5_000_000)
+    assert saved_size(storage, 'draft.jpg') == MAX_IMAGE_SIZE
+
+
+def test_upload_stores_placeholder_shown_on_cards(app, admin_client, client, jpeg):
+    response = admin_client.post('/admin/item/new', data={
+        'name': 'Green thing', 'description': '', 'price': '3',
+        'images': (io.BytesIO(jpeg(color=(30, 120, 60))), 'green.jpg'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    with app.app_context():
+        image = ItemImage.query.filter_by(filename='green.jpg').one()
+        red, green, blue = (int(image.dominant_color[i:i + 2], 16) for i in (1, 3, 5))
+        assert green > red and green > blue
+        assert len(image.blurhash) > 6
+    page = client.get('/').get_data(as_text=True)
+    assert f'background-color: {image.dominant_color}' in page
+    assert f'data-blurhash="{image.blurhash}"' in page
+
+
+def test_only_the_first_cards_load_eagerly(app, client, add_item):
+    with app.app_context():
+        for n in range(6):
+            db.session.add(ItemImage(item_id=add_item(f'Item {n}'), filename=f'{n}.jpg', is_primary=True))
+        db.session.commit()
+    page = client.get('/').get_data(as_text=True)
+    assert page.count('fetchpriority="high"') == 1
+    assert page.count('loading="lazy"') == 2
+
+
+def test_backfill_fills_missing_placeholders(app, add_item, jpeg):
+    item_id = add_item()
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'old.jpg'), 'wb') as f:
+        f.write(jpeg(color='blue'))
+    with app.app_context():
+        db.session.add(ItemImage(item_id=item_id, filename='old.jpg'))
+        db.session.add(ItemImage(item_id=item_id, filename='missing.jpg'))
+        db.session.commit()
+        with db.engine.begin() as connection:
+            backfill_placeholders(connection)
+        old, missing = (ItemImage.query.filter_by(filename=name).one() for name in ('old.jpg', 'missing.jpg'))
+        assert old.blurhash and old.dominant_color
+        assert missing.blurhash is None
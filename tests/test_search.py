@@ -0,0 +1,49 @@
+"""Diacritic-insensitive, typo-tolerant search (app/search.py)"""
+
+import pytest
+
+from app import db
+from app.models import Item, ItemTrigram
+from app.search import normalize, search_condition
+
+
+def matching_names(query):
+    return sorted(db.session.scalars(db.select(Item.name).where(search_condition(query))))
+
+
+def trigram_count(item_id):
+    return db.session.scalar(db.select(db.func.count()).select_from(ItemTrigram)
+                             .where(ItemTrigram.item_id == item_id))
+
+
+def test_normalize_folds_case_and_diacritics():
+    assert normalize('Stöl, KOŠÍK!') == 'stol kosik'
+    assert normalize('Smørbrød') == 'smorbrod'
+
+
+@pytest.mark.parametrize('query', ['košík', 'KOSIK', 'pleteny', 'nakupny kosik'])
+def test_search_ignores_case_and_diacritics(app, add_item, query):
+    add_item('Nákupný košík', description='Pletený')
+    add_item('Stol')
+    with app.app_context():
+        assert matching_names(query) == ['Nákupný košík']
+
+
+def test_index_follows_renames_and_deletes(app, add_item):
+    item_id = add_item('Nákupný košík')
+    with app.app_context():
+        assert trigram_count(item_id) > 0
+        db.session.get(Item, item_id).name = 'Lampa'
+        db.session.commit()
+        assert matching_names('kosik') == []
+        assert matching_names('lampa') == ['Lampa']
+        db.session.delete(db.session.get(Item, item_id))
+        db.session.commit()
+        assert trigram_count(item_id) == 0
+
+
+def test_catalog_shows_close_matches_for_typos(client, add_item):
+    add_item('Nákupný košík')
+    page = client.get('/?search=kosk').get_data(as_text=True)
+    assert 'Nákupný košík' in page
+    assert 'close matches' in page
@@ -0,0 +1,21 @@
+"""Which exported pages an incremental static export redoes"""
+
+from app.static_export import STALE_EVENTS, _is_affected
+
+
+def test_pages_unaffected_without_new_events():
+    page = {'event_id': 10}
+    assert not _is_affected('newest', page, (1, 10, 10))
+    assert not _is_affected('newest', page, (None, None, None))
+
+
+def test_view_events_only_affect_view_orderings():
+    page = {'event_id': 10}
+    assert _is_affected('views', page, (1, 11, 10))
+    assert not _is_affected('newest', page, (1, 11, 10))
+    assert _is_affected('newest', page, (1, 10 + STALE_EVENTS, 10))
+
+
+def test_pages_ahead_of_the_events_are_affected():
+    """The event ids started over since the page was written"""
+    assert _is_affected('newest', {'event_id': 10}, (1, 3, 3))
@@ -0,0 +1,97 @@
+"""Media storage backends (app/storage.py)"""
+
+import io
+
+import pytest
+
+from app.models import ItemImage
+from app.storage import LocalStorage, get_storage
+
+
+class FailingReader(io.BytesIO):
+    """A file object whose reads fail after the first chunk"""
+
+    def __init__(self):
+        super().__init__(b'x' * 1024)
+        self.reads = 0
+
+    def read(self, *args):
+        self.reads += 1
+        if self.reads > 1:
+            raise OSError('client went away')
+        return super().read(*args)
+
+
+def test_local_storage_round_trip(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'store'))
+    storage.save('a.jpg', io.BytesIO(b'data'))
+    assert storage.exists('a.jpg')
+    with storage.open('a.jpg') as f:
+        assert f.read() == b'data'
+    assert storage.delete('a.jpg') is True
+    assert storage.delete('a.jpg') is False
+    with pytest.raises(FileNotFoundError):
+        storage.open('a.jpg')
+
+
+def test_local_storage_leaves_nothing_behind_on_failure(tmp_path):
+    storage = LocalStorage(str(tmp_path / 'store'))
+    with pytest.raises(OSError):
+        storage.save('a.jpg', FailingReader())
+    assert list((tmp_path / 'store').iterdir()) == []
+
+
+@pytest.fixture
+def s3_app(app, monkeypatch):
+    """The app with STORAGE_BACKEND=s3 against an in-process S3 stand-in"""
+    pytest.importorskip('boto3')
+    moto = pytest.importorskip('moto')
+    for name, value in (('AWS_ACCESS_KEY_ID', 'test'), ('AWS_SECRET_ACCESS_KEY', 'test'),
+                        ('AWS_DEFAULT_REGION', 'us-east-1')):
+        monkeypatch.setenv(name, value)
+    with moto.mock_aws():
+        import boto3
+        boto3.client('s3').create_bucket(Bucket='media')
+        app.config.update(STORAGE_BACKEND='s3', STORAGE_S3_BUCKET='media')
+        app.extensions.pop('media_storage', None)
+        yield app
+
+
+def test_s3_storage_round_trip(s3_app):
+    with s3_app.app_context():
+        storage = get_storage()
+        storage.save('a.png', io.BytesIO(b'data'))
+        assert storage.exists('a.png') and not storage.exists('b.png')
+        assert storage.open('a.png').read() == b'data'
+        storage.delete('a.png')
+        with pytest.raises(FileNotFoundError):
+            storage.open('a.png')
+
+
+def test_s3_presigned_urls_are_reused(s3_app):
+    with s3_app.test_request_context():
+        storage = get_storage()
+        url = storage.url('a.png')
+        assert url.startswith(storage.origin + '/')
+        assert 'Signature' in url and storage.url('a.png') == url
+        assert storage.url_lifetime == s3_app.config['STORAGE_S3_URL_EXPIRES'] / 2
+
+
+def test_s3_upload_and_serving(s3_app, admin_client, jpeg):
+    response = admin_client.post('/admin/item/new', data={
+        'name': 'Lamp', 'description': '', 'price': '5',
+        'images': (io.BytesIO(jpeg()), 'lamp.jpg'),
+    }, content_type='multipart/form-data')
+    assert response.status_code == 302
+    with s3_app.app_context():
+        storage = get_storage()
+        assert storage.exists('lamp.jpg')
+        assert ItemImage.query.filter_by(filename='lamp.jpg').count() == 1
+        origin = storage.origin
+
+    response = admin_client.get('/')
+    assert f"img-src 'self' data: {origin};" in response.headers['Content-Security-Policy']
+    assert f'src="{origin}/' in response.get_data(as_text=True)
+    # Old /media links redirect to the bucket
+    response = admin_client.get('/media/lamp.jpg')
+    assert response.status_code == 302 and response.location.startswith(origin)
@@ -0,0 +1,45 @@
+"""Name suggestions from the per-process prefix index (app/suggest.py)"""
+
+from sqlalchemy import text
+
+from app import db
+from app.events import record_item_event
+from app.models import Item, ItemEvent
+from app.suggest import get_suggest_index
+
+
+def rename(item_id, name):
+    item = db.session.get(Item, item_id)
+    item.name = name
+    record_item_event('updated', item)
+    db.session.commit()
+
+
+def test_suggestions_follow_renames(app, add_item):
+    app.config['SSE_POLL_SECONDS'] = 0
+    chair = add_item('Old chair')
+    with app.app_context():
+        assert get_suggest_index().suggest('cha') == ['Old chair']
+        rename(chair, 'Armchair')
+        assert get_suggest_index().suggest('cha') == []
+        assert get_suggest_index().suggest('arm') == ['Armchair']
+
+
+def test_suggestions_after_event_ids_start_over(app, add_item):
+    """Every event pruned from a database whose ids restart"""
+    app.config['SSE_POLL_SECONDS'] = 0
+    chair = add_item('Chair')
+    lamp = add_item('Lamp')
+    with app.app_context():
+        assert get_suggest_index().suggest('cha') == ['Chair']
+        db.session.execute(db.delete(ItemEvent))
+        db.session.execute(text('DELETE FROM sqlite_sequence'))
+        db.session.commit()
+        # As many events as before, so the index's last id comes round again
+        rename(chair, 'Sofa')
+        rename(lamp, 'Desk')
+
+        index = get_suggest_index()
+        assert index.suggest('cha') == []
+        assert index.suggest('so') == ['Sofa']
+        assert index.suggest('de') == ['Desk']
@@ -0,0 +1,76 @@
+"""Bulk export and import of items and images (app/transfer.py)"""
+
+import io
+import json
+import os
+import zipfile
+
+from app import db
+from app.models import Item, ItemImage
+from app.transfer import ImageSource, import_items, read_records
+
+
+def jsonl(*records):
+    lines = [record if isinstance(record, str) else json.dumps(record) for record in records]
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+def test_export_content_types(admin_client, add_item):
+    add_item()
+    for fmt, content_type in (('csv', 'text/csv; charset=utf-8'),
+                              ('jsonl', 'application/x-ndjson; charset=utf-8'),
+                              ('zip', 'application/zip')):
+        response = admin_client.get(f'/admin/export?format={fmt}')
+        response.get_data()
+        assert response.headers['Content-Type'] == content_type
+
+
+def test_zip_export_imports_items_with_images(app, admin_client, add_item, jpeg):
+    item_id = add_item('Lamp', 25, description='Brass')
+    with open(os.path.join(app.config['UPLOAD_FOLDER'], 'lamp.jpg'), 'wb') as f:
+        f.write(jpeg())
+    with app.app_context():
+        db.session.add(ItemImage(item_id=item_id, filename='lamp.jpg', is_primary=True))
+        db.session.commit()
+
+    data = admin_client.get('/admin/export?format=zip').get_data()
+    assert sorted(zipfile.ZipFile(io.BytesIO(data)).namelist()) == ['images/lamp.jpg', 'items.jsonl']
+
+    response = admin_client.post('/admin/import', data={'import_file': (io.BytesIO(data), 'items.zip')},
+                                 content_type='multipart/form-data')
+    assert response.status_code == 302
+    with app.app_context():
+        copies = Item.query.filter_by(name='Lamp').order_by(Item.id).all()
+        assert len(copies) == 2
+        assert (copies[1].description, copies[1].price) == ('Brass', 25)
+        # The imported image doesn't overwrite the existing upload
+        assert [image.filename for image in copies[1].images] == ['lamp-1.jpg']
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], 'lamp-1.jpg'))
+
+
+def test_import_reports_bad_rows_and_keeps_good_ones(app):
+    records = read_records(jsonl(
+        {'name': 'Chair', 'price': 10},
+        {'name': '', 'price': 1},
+        {'name': 'Shelf', 'price': 'cheap'},
+        'not json',
+        {'name': 'Mirror', 'price': 5, 'images': ['missing.jpg']},
+    ), 'jsonl')
+    with app.app_context():
+        summary = import_items(records, chunk_size=2)
+        assert summary['rows'] == 5
+        assert summary['imported'] == 2
+        assert [line for line, _ in summary['errors']] == [2, 3, 4, 5]
+        assert sorted(item.name for item in Item.query.all()) == ['Chair', 'Mirror']
+
+
+def test_import_applies_the_app_pixel_limit(app, tmp_path, jpeg):
+    """Images are processed on pool threads, which have no app context"""
+    app.config['MAX_IMAGE_PIXELS'] = 1000
+    (tmp_path / 'images').mkdir()
+    (tmp_path / 'images' / 'big.jpg').write_bytes(jpeg(size=(60, 40)))
+    records = read_records(jsonl({'name': 'Lamp', 'price': 5, 'images': ['big.jpg']}), 'jsonl')
+    with app.app_context():
+        summary = import_items(records, images=ImageSource(directory=str(tmp_path / 'images')))
+        assert summary['imported'] == 1 and summary['images'] == 0
+        assert 'the limit is' in summary['errors'][0][1]
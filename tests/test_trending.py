@@ -0,0 +1,62 @@
+"""Time-decayed trending scores (app/trending.py)"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import db
+from app.catalog import CatalogSnapshot
+from app.events import get_hub
+from app.models import Item, ItemEvent
+from app.trending import REBASE_AFTER, record_views
+
+START = datetime(2026, 1, 1)
+
+
+@pytest.fixture
+def half_life(app):
+    return timedelta(hours=app.config['TRENDING_HALF_LIFE_HOURS'])
+
+
+def scores(ids):
+    return [db.session.get(Item, item_id).trending_score for item_id in ids]
+
+
+def test_recent_views_outrank_older_ones(app, add_item, half_life):
+    old, recent = add_item('Old'), add_item('Recent')
+    with app.app_context():
+        record_views({old: 5}, now=START)
+        record_views({recent: 1}, now=START + 3 * half_life)
+        db.session.commit()
+        old_score, recent_score = scores([old, recent])
+        assert recent_score == pytest.approx(old_score * 8 / 5)
+        assert [item.view_count for item in Item.query.order_by(Item.id)] == [5, 1]
+
+
+def test_rebase_rescales_scores_and_resyncs_snapshots(app, add_item, half_life):
+    app.config['SSE_POLL_SECONDS'] = 0
+    first, second = add_item('First'), add_item('Second')
+    with app.app_context():
+        record_views({first: 4}, now=START)
+        db.session.commit()
+        snapshot = CatalogSnapshot()  # another worker's
+        snapshot.sync()
+
+        later = START + (REBASE_AFTER + 2) * half_life
+        record_views({second: 1}, now=later)
+        db.session.commit()
+        first_score, second_score = scores([first, second])
+        assert first_score < 1
+        # One view now weighs 2 ** (REBASE_AFTER + 2) times one at the start
+        assert second_score == pytest.approx(first_score / 4 * 2 ** (REBASE_AFTER + 2))
+        # START is long past DEFAULT_EPOCH too, so that was a rebase as well
+        events = db.session.scalars(db.select(ItemEvent).where(ItemEvent.kind == 'rescored')).all()
+        assert len(events) == 2
+        assert events[-1].item_id is None
+        assert json.loads(events[-1].payload)['half_lives'] >= REBASE_AFTER
+
+        get_hub().expire()
+        snapshot.sync()
+        assert {record.id: record.trending_score for record in snapshot.ordered('trending')} == {
+            first: first_score, second: second_score}
@@ -0,0 +1,84 @@
+"""Garbage collection of orphaned uploads (app/upload_gc.py)"""
+
+import os
+import time
+
+import pytest
+
+from app import db
+from app.models import ItemImage
+from app.upload_gc import LEGACY_QUARANTINE_DIR, collect_garbage
+
+
+@pytest.fixture
+def upload(app):
+    """Write a file to the upload folder, aged by the given seconds"""
+    def upload(name, age=7200, data=b'image'):
+        path = os.path.join(app.config['UPLOAD_FOLDER'], name)
+        with open(path, 'wb') as f:
+            f.write(data)
+        then = time.time() - age
+        os.utime(path, (then, then))
+        return path
+
+    return upload
+
+
+def attach(app, item_id, filename):
+    with app.app_context():
+        db.session.add(ItemImage(item_id=item_id, filename=filename))
+        db.session.commit()
+
+
+def test_orphans_are_quarantined_not_deleted(app, add_item, upload):
+    attach(app, add_item(), 'used.jpg')
+    used = upload('used.jpg')
+    orphan = upload('orphan.jpg', data=b'12345')
+    fresh = upload('fresh.jpg', age=0)
+    with app.app_context():
+        report = collect_garbage(min_age=3600, grace=86400)
+    assert (report['scanned'], report['referenced'], report['too_young']) == (3, 1, 1)
+    assert (report['quarantined'], report['quarantined_bytes'], report['deleted']) == (1, 5, 0)
+    assert os.path.exists(used) and os.path.exists(fresh) and not os.path.exists(orphan)
+    # Outside the upload folder, which is served to anyone
+    assert os.path.exists(os.path.join(app.config['UPLOAD_GC_QUARANTINE_DIR'], 'orphan.jpg'))
+    assert sorted(os.listdir(app.config['UPLOAD_FOLDER'])) == ['fresh.jpg', 'used.jpg']
+
+
+def test_dry_run_moves_nothing(app, upload):
+    orphan = upload('orphan.jpg')
+    with app.app_context():
+        report = collect_garbage(min_age=3600, dry_run=True)
+    assert report['quarantined'] == 1
+    assert os.path.exists(orphan)
+
+
+def test_referenced_again_is_restored(app, add_item, upload):
+    orphan = upload('back.jpg')
+    with app.app_context():
+        collect_garbage(min_age=3600)
+    assert not os.path.exists(orphan)
+    attach(app, add_item(), 'back.jpg')
+    with app.app_context():
+        assert collect_garbage(min_age=3600)['restored'] == 1
+    assert os.path.exists(orphan)
+
+
+def test_quarantine_expires_after_grace(app, upload):
+    upload('old.jpg', data=b'123')
+    with app.app_context():
+        collect_garbage(min_age=3600)
+        report = collect_garbage(min_age=3600, grace=0)
+    assert (report['deleted'], report['reclaimed_bytes']) == (1, 3)
+    assert os.listdir(app.config['UPLOAD_GC_QUARANTINE_DIR']) == []
+
+
+def test_old_quarantine_in_the_upload_folder_is_moved_out(app, upload):
+    legacy = os.path.join(app.config['UPLOAD_FOLDER'], LEGACY_QUARANTINE_DIR)
+    os.makedirs(legacy)
+    with open(os.path.join(legacy, 'old.jpg'), 'wb') as f:
+        f.write(b'123')
+    with app.app_context():
+        collect_garbage(min_age=3600)
+    assert os.listdir(legacy) == []
+    assert os.listdir(app.config['UPLOAD_GC_QUARANTINE_DIR']) == ['old.jpg']
@@ -0,0 +1,82 @@
+"""Counting item views"""
+
+import json
+
+from sqlalchemy import event
+
+from app import db
+from app.models import Item, ItemEvent
+
+
+def test_track_view_returns_incremented_count(app, client, add_item):
+    item_id = add_item(view_count=4)
+    response = client.post(f'/item/{item_id}/view')
+    assert response.get_json() == {'success': True, 'view_count': 5}
+    with app.app_context():
+        assert db.session.get(Item, item_id).view_count == 5
+
+
+def test_repeated_view_is_not_counted(app, client, add_item):
+    item_id = add_item()
+    client.post(f'/item/{item_id}/view')
+    response = client.post(f'/item/{item_id}/view')
+    assert response.get_json()['view_count'] == 1
+    with app.app_context():
+        assert db.session.get(Item, item_id).view_count == 1
+
+
+def post_views(client, item_ids, **kwargs):
+    # navigator.sendBeacon sends a string body as text/plain
+    return client.post('/item/views', data=json.dumps({'item_ids': item_ids}),
+                       content_type='text/plain;charset=UTF-8', **kwargs)
+
+
+def view_counts(app, *item_ids):
+    with app.app_context():
+        return [db.session.get(Item, item_id).view_count for item_id in item_ids]
+
+
+def test_view_batch_from_a_text_plain_beacon(app, client, add_item):
+    chair, lamp = add_item('Chair'), add_item('Lamp')
+    assert post_views(client, [chair, lamp]).status_code == 204
+    assert view_counts(app, chair, lamp) == [1, 1]
+
+
+def test_view_batch_ignores_unknown_and_duplicate_ids(app, client, add_item):
+    chair = add_item('Chair')
+    assert post_views(client, [chair, chair, str(chair), 9999, -1, 'x', None]).status_code == 204
+    assert view_counts(app, chair) == [1]
+    with app.app_context():
+        events = db.session.scalars(db.select(ItemEvent.item_id).where(ItemEvent.kind == 'views')).all()
+        assert events == [chair]
+    # A body that isn't a batch at all is ignored too
+    assert client.post('/item/views', data='not json', content_type='text/plain').status_code == 204
+
+
+def test_view_batch_counts_each_visitor_once(app, client, add_item):
+    chair, lamp = add_item('Chair'), add_item('Lamp')
+    post_views(client, [chair])
+    post_views(client, [chair, lamp])
+    assert view_counts(app, chair, lamp) == [1, 1]
+    post_views(client, [chair, lamp], headers={'User-Agent': 'another browser'})
+    assert view_counts(app, chair, lamp) == [2, 2]
+
+
+def test_view_batch_is_one_update(app, client, add_item):
+    item_ids = [add_item(f'Item {n}') for n in range(5)]
+    updates = []
+
+    def count_updates(conn, cursor, statement, parameters, context, executemany):
+        # Not the trending rebase that may run on the first view
+        if statement.startswith('UPDATE item SET view_count'):
+            updates.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', count_updates)
+    try:
+        assert post_views(client, item_ids).status_code == 204
+    finally:
+        event.remove(engine, 'before_cursor_execute', count_updates)
+    assert len(updates) == 1
+    assert view_counts(app, *item_ids) == [1] * 5
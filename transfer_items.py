@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Export or import the whole item catalog, e.g. to move items between markets.
+
+Usage:
+    python transfer_items.py export items.csv
+    python transfer_items.py export items.jsonl
+    python transfer_items.py export market.zip               # includes image files
+    python transfer_items.py import items.csv --images-dir photos/
+    python transfer_items.py import market.zip
+
+Exports are streamed in batches, so memory use does not grow with the
+catalog. Imports are committed in chunks (--chunk-size rows per
+transaction) with images processed in parallel (--workers threads);
+rows that fail are reported with their line number and skipped.
+"""
+
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from app import create_app
+
+def export_catalog(path):
+    from app.transfer import EXPORT_FORMATS, export_items
+
+    fmt = path.rsplit('.', 1)[-1].lower()
+    if fmt not in EXPORT_FORMATS:
+        print(f"❌ Export file must end in .{', .'.join(EXPORT_FORMATS)}")
+        return False
+    written = 0
+    mode = 'w' if fmt in ('csv', 'jsonl') else 'wb'
+    kwargs = {'encoding': 'utf-8', 'newline': ''} if mode == 'w' else {}
+    with open(path, mode, **kwargs) as f:
+        for chunk in export_items(fmt):
+            f.write(chunk)
+            written += len(chunk)
+    print(f"✅ Exported catalog to {path} ({written // 1024} KB)")
+    return True
+
+def import_catalog(path, images_dir, chunk_size, workers):
+    from app.transfer import open_import, import_items
+
+    def progress(summary):
+        print(f"  ⏳ {summary['rows']} rows read, {summary['imported']} imported, "
+              f"{summary['images']} images, {len(summary['errors'])} errors", flush=True)
+
+    with open(path, 'rb') as f:
+        records, images = open_import(f, os.path.basename(path), images_dir=images_dir)
+        summary = import_items(records, images, chunk_size=chunk_size, workers=workers, progress=progress)
+
+    for line_number, message in summary['errors']:
+        print(f"  ⚠️  line {line_number}: {message}")
+    print(f"✅ Imported {summary['imported']} of {summary['rows']} items and {summary['images']} images")
+    return summary['imported'] == summary['rows']
+
+def main():
+    parser = argparse.ArgumentParser(description='Export or import the item catalog.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='write the catalog to a .csv, .jsonl or .zip file')
+    export_parser.add_argument('path')
+
+    import_parser = subparsers.add_parser('import', help='read items from a .csv, .jsonl or .zip file')
+    import_parser.add_argument('path')
+    import_parser.add_argument('--images-dir', help='directory with the images named in a .csv/.jsonl file')
+    import_parser.add_argument('--chunk-size', type=int, default=200, help='rows per transaction')
+    import_parser.add_argument('--workers', type=int, default=4, help='parallel image processing threads')
+
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.command == 'export':
+            return export_catalog(args.path)
+        return import_catalog(args.path, args.images_dir, args.chunk_size, args.workers)
+
+if __name__ == '__main__':
+    sys.exit(0 if main() else 1)